@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.silver import silver_transformer as silver
+from src.silver.schema_enforcement import enforce_schema
+from src.silver.silver_polars import merge_datasets_polars, require_polars, transform_polars
+from src.gold import gold_aggregator as gold
+from src.gold.gold_polars import build_gold_polars
+
+# BENCHMARK: BACKENDS
+# Times the pandas and the Polars backend side by side on the CSVs in data/:
+# - merge + transform (the silver stage, without reading the CSVs and writing Parquet)
+# - gold from the silver DataFrame in memory
+# - gold from the silver dataset in out/silver/ (if built)
+# Each step runs once untimed first, so imports and caches do not count.
+# Usage: python benchmarks/bench_backends.py
+
+def timed(fn, *args, repeats=3):
+    fn(*args)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def silver_pandas(tables):
+    return silver.transform(silver.merge_datasets(*tables))
+
+def silver_polars(tables):
+    return transform_polars(merge_datasets_polars(*tables))
+
+
+if __name__ == "__main__":
+    require_polars()
+    tables = (
+        silver.load_orders(), silver.load_items(), silver.load_customers(),
+        silver.load_payments(), silver.load_products(), silver.load_sellers()
+    )
+    df = enforce_schema(silver.add_order_key(silver_pandas(tables)), report=False)
+
+    steps = [
+        ("merge + transform", (silver_pandas, tables), (silver_polars, tables)),
+        ("gold (memory)", (gold.build_gold, df), (build_gold_polars, df))
+    ]
+    if silver.silver_exists():
+        steps.append(("gold (dataset)", (gold.build_gold_from_dataset,), (build_gold_polars,)))
+
+    print(f"{len(tables[1]):,} items, {len(df):,} silver rows")
+    print(f"{'step':<20}{'pandas s':>10}{'polars s':>10}{'speedup':>9}")
+    for step, (pandas_fn, *pandas_args), (polars_fn, *polars_args) in steps:
+        pandas_time = timed(pandas_fn, *pandas_args)
+        polars_time = timed(polars_fn, *polars_args)
+        print(f"{step:<20}{pandas_time:>10.3f}{polars_time:>10.3f}{pandas_time / polars_time:>8.1f}x")
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from benchmarks.bench_distinct_orders import make_silver
+from src.gold.gold_aggregator import gold_order_cube
+from dashboard.queries import CubeFilter, DIMENSIONS, cube_arrays, period_labels, select_cells, summarize_cells
+
+# BENCHMARK: CUBE QUERIES
+# Time of the Explorer page's queries without their cache: the totals plus one breakdown
+# for random filter combinations (month range, categories, seller and customer states),
+# on the gold order cube built from `rows` silver-like rows. Every combination is summed
+# from the cube cells, silver is not read. The target is under 100 ms per combination.
+# Usage: python benchmarks/bench_cube_queries.py [rows ...] [--queries N]   (default 100k 1M, 200 queries)
+
+def make_cube_silver(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = make_silver(rows, seed)
+    fulfillment = rng.integers(2, 40, rows)
+    return df.assign(
+        order_status=pd.Categorical(rng.choice(["delivered", "shipped", "canceled"], rows, p=[0.9, 0.07, 0.03])),
+        fulfillment_days=pd.array(fulfillment, dtype="Int16"),
+        shipping_days=pd.array(fulfillment - rng.integers(0, 2, rows), dtype="Int16"),
+        on_time=rng.random(rows) < 0.9
+    )
+
+def random_filter(rng, periods, values):
+    def some(column):
+        # No filter half of the time, otherwise 1-5 values
+        if rng.random() < 0.5:
+            return ()
+        return tuple(sorted(rng.choice(values[column], rng.integers(1, 6), replace=False)))
+
+    start, end = sorted(rng.choice(periods, 2))
+    return CubeFilter(start, end, some("product_category_name"), some("seller_state"), some("customer_state"))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    queries = 200
+    if "--queries" in args:
+        position = args.index("--queries")
+        queries = int(args[position + 1])
+        del args[position:position + 2]
+    row_counts = [int(value) for value in args] or [100_000, 1_000_000]
+
+    for rows in row_counts:
+        start = time.perf_counter()
+        cube = gold_order_cube(make_cube_silver(rows))
+        cube = cube.assign(period=period_labels(cube))
+        build_seconds = time.perf_counter() - start
+        arrays = cube_arrays(cube)
+        sketch_mb = cube["orders_sparse_sketch"].map(len).sum() / 1e6
+
+        rng = np.random.default_rng(1)
+        periods = np.sort(cube["period"].unique())
+        values = {column: np.sort(cube[column].unique().astype(str)) for column in DIMENSIONS if column != "period"}
+        dimensions = list(DIMENSIONS)
+        times = []
+        for _ in range(queries):
+            cube_filter = random_filter(rng, periods, values)
+            query_start = time.perf_counter()
+            keep = select_cells(arrays, cube_filter)
+            summarize_cells(arrays, keep, dimensions[rng.integers(len(dimensions))])
+            times.append(time.perf_counter() - query_start)
+
+        times = np.array(times) * 1000
+        print(f"\n{rows:,} silver rows -> {len(cube):,} cube cells (built in {build_seconds:.1f}s, sketches {sketch_mb:.1f} MB)")
+        print(f"{queries} filter combinations (totals + breakdown): median {np.median(times):.1f} ms, "
+              f"p99 {np.percentile(times, 99):.1f} ms, max {times.max():.1f} ms")
@@ -0,0 +1,142 @@
+import sys
+from pathlib import Path
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from src.gold.gold_aggregator import CUBE_KEYS, distinct_orders, order_sparse_sketches
+from src.gold.gold_incremental import IncrementalGoldTable
+
+# BENCHMARK: DISTINCT ORDERS
+# Compares the old gold aggregation, groupby(...).agg(nunique on order_id strings + revenue sum),
+# with the new one (revenue sum + distinct_orders() on the integer order_key),
+# for the groupings the gold tables use. Each timing builds its groupby from scratch.
+#
+# Then the incremental path, the one the pipeline runner and the streaming consumer run:
+# - new pairs: a cycle of DELTA_ROWS rows checked against the (group, order) pairs of
+#   all the rows before it, with (group, order_id) string tuples in a set (old) and
+#   with IncrementalGoldTable.new_distinct on order_key (new)
+# - sketch: the sparse sketches of the order cube for all rows, hashing order_id
+#   strings (old) or order_key (new)
+# The old pairs set is skipped above OLD_PAIRS_MAX_ROWS rows (it needs GBs of tuples).
+# Usage: python benchmarks/bench_distinct_orders.py [rows ...]   (default 100k 1M 10M)
+
+DELTA_ROWS = 5_000
+OLD_PAIRS_MAX_ROWS = 2_000_000
+
+GROUPINGS = {
+    "month":    ["order_year", "order_month"],
+    "category": ["product_category_name"],
+    "seller":   ["seller_id", "seller_state"],
+    "state":    ["customer_state"]
+}
+
+def make_silver(rows, seed=0):
+    # Silver-like rows: ~1.15 items per order, Olist-like cardinalities
+    rng = np.random.default_rng(seed)
+    order_keys = np.sort(rng.integers(0, int(rows / 1.15), rows))
+    order_ids = pd.array([f"{k:032x}" for k in order_keys], dtype="string")
+    states = pd.Categorical(rng.choice([f"S{i:02d}" for i in range(27)], rows))
+    sellers = rng.integers(0, 3000, rows)
+    return pd.DataFrame({
+        "order_id": order_ids,
+        "order_key": pd.factorize(order_ids)[0].astype(np.int64),
+        "order_year": rng.integers(2016, 2019, rows).astype(np.int32),
+        "order_month": rng.integers(1, 13, rows).astype(np.int32),
+        "product_category_name": pd.Categorical(rng.choice([f"cat_{i}" for i in range(70)], rows)),
+        "seller_id": pd.array([f"seller_{i}" for i in sellers], dtype="string"),
+        "seller_state": pd.Categorical([f"S{i % 27:02d}" for i in sellers]),   # one state per seller
+        "customer_state": states,
+        "payment_value": rng.uniform(10, 500, rows)
+    })
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def old_aggregation(df, keys):
+    result = df.groupby(keys).agg(
+        total_orders=("order_id", "nunique"),
+        total_revenue=("payment_value", "sum")
+    )
+    return result["total_orders"].to_numpy()
+
+def new_aggregation(df, keys):
+    grouped = df.groupby(keys)
+    result = grouped.agg(total_revenue=("payment_value", "sum"))
+    result.insert(0, "total_orders", distinct_orders(grouped, df))
+    return result["total_orders"].to_numpy()
+
+# INCREMENTAL
+
+TABLES = {
+    "month":    "gold_sales_overview",
+    "category": "gold_top_categories",
+    "seller":   "gold_seller_performance",
+    "state":    "gold_customer_geography"
+}
+
+def old_new_pairs(seen, df, keys):
+    # The previous new_distinct: string tuples, one set lookup per row
+    pairs = df[keys + ["order_id"]].dropna().astype(object).drop_duplicates()
+    new_pairs = [pair for pair in pairs.itertuples(index=False, name=None) if pair not in seen]
+    seen.update(new_pairs)
+    return pd.DataFrame(new_pairs, columns=keys + ["order_id"]).groupby(keys).size()
+
+def time_new_pairs(history, delta, name, old):
+    # Best of 3, each on a fresh state holding the pairs of `history` (not timed)
+    times = []
+    for _ in range(3):
+        table = IncrementalGoldTable(TABLES[name])
+        if old:
+            seen = set()
+            old_new_pairs(seen, history, table.keys)
+        else:
+            table.new_distinct(history, "order_key")
+        start = time.perf_counter()
+        counts = old_new_pairs(seen, delta, table.keys) if old else table.new_distinct(delta, "order_key")
+        times.append(time.perf_counter() - start)
+    return min(times), counts.sort_index().to_numpy()
+
+def run_incremental(df):
+    history, delta = df.iloc[:-DELTA_ROWS], df.iloc[-DELTA_ROWS:]
+    print(f"incremental: new pairs of {DELTA_ROWS:,} rows against {len(history):,} rows")
+    print(f"{'grouping':<10}{'order_id (s)':>14}{'order_key (s)':>16}{'speedup':>10}")
+    for name in TABLES:
+        new_time, new = time_new_pairs(history, delta, name, old=False)
+        if len(df) > OLD_PAIRS_MAX_ROWS:
+            print(f"{name:<10}{'-':>14}{new_time:>16.4f}{'-':>10}")
+            continue
+        old_time, old = time_new_pairs(history, delta, name, old=True)
+        assert np.array_equal(old, new), f"{name}: new pairs differ"
+        print(f"{name:<10}{old_time:>14.4f}{new_time:>16.4f}{old_time / new_time:>9.1f}x")
+
+    grouped = df.groupby(CUBE_KEYS, observed=True)
+    old_time, old = best_of(lambda: order_sparse_sketches(grouped, df.drop(columns="order_key")))
+    new_time, new = best_of(lambda: order_sparse_sketches(grouped, df))
+    assert len(old) == len(new)
+    print(f"{'sketch':<10}{old_time:>14.3f}{new_time:>16.3f}{old_time / new_time:>9.1f}x")
+
+
+def run(rows):
+    df = make_silver(rows)
+    print(f"\n{rows:,} rows")
+    print(f"{'grouping':<10}{'nunique (s)':>14}{'order_key (s)':>16}{'speedup':>10}")
+    for name, keys in GROUPINGS.items():
+        old_time, old = best_of(lambda: old_aggregation(df, keys))
+        new_time, new = best_of(lambda: new_aggregation(df, keys))
+        assert np.array_equal(old, new), f"{name}: counts differ"
+        print(f"{name:<10}{old_time:>14.3f}{new_time:>16.3f}{old_time / new_time:>9.1f}x")
+    run_incremental(df)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000, 10_000_000]
+    for rows in sizes:
+        run(rows)
@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+import resource
+import subprocess
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# BENCHMARK: GOLD MEMORY
+# Peak memory and time of the gold stage on the silver dataset in out/silver/:
+# - "all":    read every column of silver, filter delivered rows in pandas (the old way)
+# - "pruned": each gold table reads only its columns, delivered rows filtered in parquet
+# Each mode runs in its own process, so the peak resident memory (ru_maxrss) is its own.
+# Build silver first (python src/silver/silver_transformer.py).
+# Usage: python benchmarks/bench_gold_memory.py
+
+MODES = ["all", "pruned"]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def run_mode(mode):
+    from src.gold.gold_aggregator import build_gold, build_gold_from_dataset, load_silver
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "all":
+        datasets = build_gold(load_silver())
+    else:
+        datasets = build_gold_from_dataset()
+    elapsed = time.perf_counter() - start
+    rows = sum(len(df) for df in datasets.values())
+    print(f"RESULT {mode} {elapsed:.3f} {peak_rss_mb() - before:.1f} {rows}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+        sys.exit()
+
+    print(f"{'mode':<8}{'seconds':>10}{'peak MB':>10}{'gold rows':>11}")
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, mode], capture_output=True, text=True, check=True).stdout
+        _, name, seconds, peak, rows = next(line for line in output.splitlines() if line.startswith("RESULT")).split()
+        print(f"{name:<8}{float(seconds):>10.3f}{float(peak):>10.1f}{int(rows):>11,}")
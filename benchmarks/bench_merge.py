@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+import resource
+import subprocess
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from src.silver.silver_transformer import merge_datasets
+
+# BENCHMARK: MERGE
+# Wall time and peak memory of merge_datasets() (hash lookups + take) against the
+# previous chain of five DataFrame.merge calls, on Olist-shaped tables.
+# Each mode runs in its own process; peak memory is the growth of the peak resident
+# memory (ru_maxrss) during the merge, on top of the input tables.
+# Usage: python benchmarks/bench_merge.py [items ...]   (default 1M 3M)
+
+MODES = ["merge", "take"]
+
+def merge_chain(orders, items, customers, payments, products, sellers):
+    # The previous merge_datasets(), kept here as the reference
+    df = items.merge(orders, on="order_id", how="left")
+    df = df.merge(customers, on="customer_id", how="left")
+    df = df.merge(products, on="product_id", how="left")
+    df = df.merge(sellers, on="seller_id", how="left")
+
+    payments_agg = payments.groupby("order_id").agg(
+        payment_type=("payment_type", "first"),
+        payment_installments=("payment_installments", "sum"),
+        payment_value=("payment_value", "sum")
+    ).reset_index()
+
+    df = df.merge(payments_agg, on="order_id", how="left")
+    return df
+
+def ids(prefix, n):
+    return pd.array([f"{prefix}{i:028x}" for i in range(n)], dtype="string")
+
+def make_tables(items_rows, seed=0):
+    # ~1.15 items and ~1.05 payments per order, 32k products, 3k sellers, like Olist
+    rng = np.random.default_rng(seed)
+    n_orders = int(items_rows / 1.15)
+    order_ids, customer_ids = ids("o", n_orders), ids("c", n_orders)
+    product_ids, seller_ids = ids("p", 32_000), ids("s", 3_000)
+    states = [f"S{i:02d}" for i in range(27)]
+    purchase = np.datetime64("2017-01-01") + rng.integers(0, 600 * 86_400, n_orders) * np.timedelta64(1, "s")
+
+    orders = pd.DataFrame({
+        "order_id": order_ids,
+        "customer_id": customer_ids,
+        "order_status": pd.Categorical(rng.choice(["delivered", "shipped", "canceled"], n_orders)),
+        "order_purchase_timestamp": purchase.astype("datetime64[us]"),
+        "order_delivered_customer_date": (purchase + np.timedelta64(9, "D")).astype("datetime64[us]")
+    })
+    item_orders = rng.integers(0, n_orders, items_rows)
+    items = pd.DataFrame({
+        "order_id": order_ids[item_orders],
+        "order_item_id": rng.integers(1, 4, items_rows),
+        "product_id": product_ids[rng.integers(0, len(product_ids), items_rows)],
+        "seller_id": seller_ids[rng.integers(0, len(seller_ids), items_rows)],
+        "price": rng.uniform(5, 500, items_rows),
+        "freight_value": rng.uniform(5, 50, items_rows)
+    })
+    customers = pd.DataFrame({
+        "customer_id": customer_ids,
+        "customer_zip_code_prefix": rng.integers(1000, 99999, n_orders),
+        "customer_state": pd.Categorical(rng.choice(states, n_orders))
+    })
+    products = pd.DataFrame({
+        "product_id": product_ids,
+        "product_category_name": pd.Categorical(rng.choice([f"cat_{i}" for i in range(70)], len(product_ids))),
+        "product_weight_g": rng.integers(50, 30_000, len(product_ids))
+    })
+    sellers = pd.DataFrame({
+        "seller_id": seller_ids,
+        "seller_state": pd.Categorical(rng.choice(states, len(seller_ids)))
+    })
+    payment_orders = rng.integers(0, n_orders, int(n_orders * 1.05))
+    payments = pd.DataFrame({
+        "order_id": order_ids[payment_orders],
+        "payment_type": pd.Categorical(rng.choice(["credit_card", "boleto", "voucher"], len(payment_orders))),
+        "payment_installments": rng.integers(1, 10, len(payment_orders)),
+        "payment_value": rng.uniform(10, 600, len(payment_orders))
+    })
+    return orders, items, customers, payments, products, sellers
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def run_mode(mode, items_rows):
+    fn = merge_chain if mode == "merge" else merge_datasets
+    fn(*make_tables(10_000))   # warm-up: first-call setup of pandas/pyarrow kernels
+    tables = make_tables(items_rows)
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    df = fn(*tables)
+    elapsed = time.perf_counter() - start
+    print(f"RESULT {mode} {elapsed:.3f} {peak_rss_mb() - before:.1f} {df.shape[0]} {df.shape[1]}")
+
+def check_same(items_rows):
+    tables = make_tables(items_rows)
+    pd.testing.assert_frame_equal(merge_chain(*tables), merge_datasets(*tables))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] in MODES:
+        run_mode(sys.argv[1], int(sys.argv[2]))
+        sys.exit()
+
+    check_same(100_000)
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 3_000_000]
+    print(f"{'items':>12}{'mode':>7}{'seconds':>10}{'peak MB':>10}")
+    for items_rows in sizes:
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, mode, str(items_rows)],
+                                    capture_output=True, text=True, check=True).stdout
+            _, name, seconds, peak, _, _ = next(line for line in output.splitlines() if line.startswith("RESULT")).split()
+            print(f"{items_rows:>12,}{name:>7}{float(seconds):>10.3f}{float(peak):>10.1f}")
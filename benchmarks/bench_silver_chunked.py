@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+import resource
+import subprocess
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# BENCHMARK: CHUNKED SILVER BUILD
+# Peak memory and time of the full silver build on the CSVs in data/:
+# - "full":          build_silver, the whole fact table in memory
+# - "chunked <MB>":  build_silver_chunked with that memory budget
+# Each mode runs in its own process, so the peak resident memory (ru_maxrss) is its own.
+# Both write out/silver/, so run the build you want to keep last.
+# Usage: python benchmarks/bench_silver_chunked.py [budget MB ...]   (default 1024 512 256)
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def run_mode(mode, budget_mb=None):
+    from src.silver.silver_transformer import build_silver, build_silver_chunked
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "full":
+        rows = len(build_silver())
+    else:
+        rows = build_silver_chunked(budget_mb)
+    elapsed = time.perf_counter() - start
+    print(f"RESULT {elapsed:.3f} {peak_rss_mb() - before:.1f} {rows}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("full", "chunked"):
+        run_mode(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        sys.exit()
+
+    budgets = [int(arg) for arg in sys.argv[1:]] or [1024, 512, 256]
+    runs = [("full", [])] + [("chunked", [str(budget)]) for budget in budgets]
+
+    print(f"{'mode':<16}{'seconds':>10}{'peak MB':>10}{'rows':>12}")
+    for mode, args in runs:
+        run = subprocess.run([sys.executable, __file__, mode, *args], capture_output=True, text=True)
+        name = f"{mode} {args[0]} MB" if args else mode
+        if run.returncode != 0:
+            # e.g. a budget smaller than the dimension tables
+            print(f"{name:<16}{run.stderr.strip().splitlines()[-1]}")
+            continue
+        _, seconds, peak, rows = next(line for line in run.stdout.splitlines() if line.startswith("RESULT")).split()
+        print(f"{name:<16}{float(seconds):>10.3f}{float(peak):>10.1f}{int(rows):>12,}")
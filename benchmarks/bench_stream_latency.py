@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from producer.send_orders import make_order
+from src.streaming.order_consumer import OrderConsumer, QueueSource
+
+# BENCHMARK: STREAMING LATENCY
+# Order-to-gold latency of the streaming consumer: a thread sends `rate` orders per
+# second into an in-process queue for `seconds` seconds, the consumer runs its
+# micro-batches, and every new order's age when its batch reached gold is collected.
+# For comparison, run_pipeline.py picks an order up after up to 300 s of sleep plus
+# a pipeline cycle.
+# Needs a silver dataset (python src/silver/silver_transformer.py). The generated orders
+# are written to out/silver and out/gold like live orders.
+# Usage: python benchmarks/bench_stream_latency.py [rate] [seconds] [batch seconds]   (default 50 20 2)
+
+def send(source, rate, seconds):
+    interval = 1 / rate
+    next_send = time.monotonic()
+    end = next_send + seconds
+    while next_send < end:
+        source.put(make_order())
+        next_send += interval
+        time.sleep(max(0.0, next_send - time.monotonic()))
+
+# Keeps the stats of every batch with new orders
+class TimedConsumer(OrderConsumer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batch_stats = []
+
+    def run_batch(self, orders):
+        stats = super().run_batch(orders)
+        if stats["new_orders"]:
+            self.batch_stats.append(stats)
+        return stats
+
+
+if __name__ == "__main__":
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 20
+    batch_seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    source = QueueSource()
+    consumer = TimedConsumer(source, batch_seconds, catch_up=False)
+    loop = threading.Thread(target=consumer.run)
+    loop.start()
+    consumer.started.wait()
+
+    send(source, rate, seconds)
+    time.sleep(2 * batch_seconds)
+    consumer.stop()
+    loop.join()
+
+    stats = consumer.batch_stats
+    orders = sum(batch["new_orders"] for batch in stats)
+    print(f"\n{orders:,} orders in {len(stats)} batches ({rate:g}/s for {seconds:g}s, batches every {batch_seconds:g}s)")
+    print(f"order-to-gold latency: median {np.median([batch['p50_age'] for batch in stats]):.2f}s, "
+          f"worst {max(batch['max_age'] for batch in stats):.2f}s, "
+          f"batch processing {np.median([batch['seconds'] for batch in stats]) * 1000:.0f} ms")
+    print("run_pipeline.py: up to 300 s of sleep plus one pipeline cycle")
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from benchmarks.bench_distinct_orders import GROUPINGS, make_silver
+from src.gold import hll
+
+# ACCURACY CHECK: HYPERLOGLOG DISTINCT ORDERS
+# Compares the HyperLogLog counts of GOLD_DISTINCT_MODE=hll with the exact nunique,
+# for every gold grouping and a few precisions, and checks them against the
+# documented error bound of 1.04 / sqrt(2**precision):
+# - at least 99% of the groups are within 3x the bound (3 standard errors)
+# - with 30 groups or more, the root mean square relative error stays within 1.5x the bound
+#   (fewer groups are too small a sample for that)
+# It also rolls the monthly sketches up to yearly and all-time counts (merge only,
+# no rescan) and checks those the same way.
+# Usage: python benchmarks/check_hll_accuracy.py [rows] [precision ...]   (default 1M, 10 12 14)
+
+def relative_errors(estimated, exact):
+    return np.abs(np.asarray(estimated, dtype=np.float64) / np.asarray(exact, dtype=np.float64) - 1)
+
+def check(label, errors, bound):
+    rms = float(np.sqrt(np.mean(errors ** 2)))
+    within = float(np.mean(errors <= 3 * bound))
+    ok = within >= 0.99 and (len(errors) < 30 or rms <= 1.5 * bound)
+    print(f"  {label:<10}{len(errors):>8}{rms:>12.4f}{errors.max():>12.4f}{within:>10.1%}{'ok' if ok else 'FAIL':>6}")
+    return ok
+
+def run(df, precision):
+    bound = hll.relative_error(precision)
+    hashes = hll.hash_values(df["order_id"])
+    print(f"\nprecision {precision}: {2 ** precision:,} bytes per group, error bound {bound:.4f}")
+    print(f"  {'grouping':<10}{'groups':>8}{'rms error':>12}{'max error':>12}{'within 3x':>10}")
+
+    ok = True
+    monthly = None
+    for name, keys in GROUPINGS.items():
+        grouped = df.groupby(keys, observed=True)
+        exact = grouped["order_id"].nunique().to_numpy()
+
+        start = time.perf_counter()
+        registers = hll.sketch_groups(grouped.ngroup().to_numpy(), hashes, grouped.ngroups, precision)
+        estimated = hll.count(registers)
+        elapsed = time.perf_counter() - start
+
+        ok &= check(name, relative_errors(estimated, exact), bound)
+        print(f"  {'':<10}sketched in {elapsed:.3f}s")
+        if name == "month":
+            monthly = grouped.size().reset_index()[keys]
+            monthly["orders_sketch"] = hll.to_bytes(registers)
+
+    # Rollups from the monthly sketches
+    yearly = hll.rollup(monthly, "orders_sketch", ["order_year"])
+    exact_yearly = df.groupby("order_year")["order_id"].nunique().reindex(yearly["order_year"]).to_numpy()
+    ok &= check("year", relative_errors(yearly["total_orders"], exact_yearly), bound)
+
+    all_time = hll.rollup(monthly, "orders_sketch")
+    ok &= check("all time", relative_errors([all_time], [df["order_id"].nunique()]), bound)
+    return ok
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    precisions = [int(arg) for arg in sys.argv[2:]] or [10, 12, 14]
+
+    df = make_silver(rows)
+    print(f"{rows:,} rows, {df['order_id'].nunique():,} distinct orders")
+    results = [run(df, precision) for precision in precisions]
+    if not all(results):
+        sys.exit("HyperLogLog error above the documented bound")
+    print("\nAll counts within the documented error bound")
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+import io
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+from src.silver import silver_transformer as silver
+from src.silver.schema_enforcement import enforce_schema
+from src.silver.silver_polars import merge_datasets_polars, require_polars, transform_polars
+from src.gold import gold_aggregator as gold
+from src.gold.gold_polars import build_gold_polars
+
+# CHECK: POLARS PARITY
+# Runs the silver and gold stages with both backends on the CSVs in data/ and checks
+# that they give the same DataFrames, and the same gold Parquet bytes.
+# The "dataset" gold check reads the silver dataset in out/silver/ (build it first).
+# Usage: python benchmarks/check_polars_parity.py
+
+def parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+def check_frames(stage, expected, actual):
+    pd.testing.assert_frame_equal(expected, actual)
+    print(f"{stage}: same DataFrame")
+
+def check_gold(stage, expected, actual):
+    for name in expected:
+        pd.testing.assert_frame_equal(expected[name], actual[name])
+        same_bytes = parquet_bytes(expected[name]) == parquet_bytes(actual[name])
+        print(f"{stage} {name}: same DataFrame, {'same' if same_bytes else 'DIFFERENT'} Parquet bytes")
+        if not same_bytes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    require_polars()
+    tables = (
+        silver.load_orders(), silver.load_items(), silver.load_customers(),
+        silver.load_payments(), silver.load_products(), silver.load_sellers()
+    )
+
+    merged = silver.merge_datasets(*tables)
+    merged_polars = merge_datasets_polars(*tables)
+    check_frames("merge", merged, merged_polars)
+
+    df = silver.transform(merged)
+    df_polars = transform_polars(merged_polars)
+    check_frames("transform", df, df_polars)
+
+    df = enforce_schema(silver.add_order_key(df), report=False)
+    check_gold("gold (memory)", gold.build_gold(df), build_gold_polars(df))
+
+    if silver.silver_exists():
+        # build_gold_from_dataset runs the pandas backend unless PIPELINE_BACKEND=polars
+        check_gold("gold (dataset)", gold.build_gold_from_dataset(), build_gold_polars())
+    print("Parity OK")
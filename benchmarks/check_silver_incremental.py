@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+from src.silver.silver_store import read_silver, silver_exists
+from src.silver.silver_transformer import build_silver, build_silver_incremental
+
+# CHECK: INCREMENTAL SILVER
+# Checks that the silver dataset in out/silver/, as incremental builds left it (pipeline
+# runner, build_silver_incremental or the streaming consumer), holds the same rows as a
+# full build of the same CSVs and bronze orders: rows, distinct orders and revenue
+# (payment_value), in total and per month.
+# An incremental build runs first, so bronze orders not upserted yet do not count as a
+# difference. Stream orders must have reached bronze too (the full build reads bronze).
+# The full build replaces out/silver/ (with the silver a rebuild would give anyway).
+# Usage: python benchmarks/check_silver_incremental.py
+
+def month_totals(df):
+    totals = df.groupby(["order_year", "order_month"], observed=True).agg(
+        rows=("order_id", "size"),
+        orders=("order_id", "nunique"),
+        revenue=("payment_value", "sum")
+    )
+    totals["revenue"] = totals["revenue"].round(2)
+    return totals
+
+def print_totals(label, totals):
+    print(f"{label}: {totals['rows'].sum():,} rows, {totals['orders'].sum():,} orders, "
+          f"revenue {totals['revenue'].sum():,.2f}")
+
+
+if __name__ == "__main__":
+    if not silver_exists():
+        sys.exit("No silver dataset: run some incremental builds first")
+
+    print("Catching up with bronze...")
+    build_silver_incremental()
+    incremental = month_totals(read_silver(columns=["order_id", "payment_value", "order_year", "order_month"]))
+
+    print("Running a full build...")
+    full = month_totals(build_silver())
+
+    print_totals("incremental", incremental)
+    print_totals("full       ", full)
+    months = incremental.join(full, how="outer", lsuffix="_incremental", rsuffix="_full")
+    different = months[
+        (months["rows_incremental"] != months["rows_full"])
+        | (months["orders_incremental"] != months["orders_full"])
+        | ((months["revenue_incremental"] - months["revenue_full"]).abs() > 0.005)
+    ]
+    if len(different):
+        print(f"{len(different):,} months differ:")
+        print(different.to_string())
+        sys.exit(1)
+    print("Incremental silver matches the full build")
@@ -3,22 +3,13 @@ from pathlib import Path
 from streamlit_autorefresh import st_autorefresh
 import plotly.express as px
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
-import pandas as pd
 import streamlit as st
-from paths import OUT
-import requests
+from src.gold.gold_store import load_gold_manifest
+from src.gold.hll import rollup
+from dashboard.geo import load_states_geojson
+from dashboard import queries
 import time
-
-# Mapping from Brazilian state codes to ISO-3166-2 codes for the choropleth map
-BR_STATE_CODES = {
-    "AC": "BR-AC", "AL": "BR-AL", "AP": "BR-AP", "AM": "BR-AM",
-    "BA": "BR-BA", "CE": "BR-CE", "DF": "BR-DF", "ES": "BR-ES",
-    "GO": "BR-GO", "MA": "BR-MA", "MT": "BR-MT", "MS": "BR-MS",
-    "MG": "BR-MG", "PA": "BR-PA", "PB": "BR-PB", "PR": "BR-PR",
-    "PE": "BR-PE", "PI": "BR-PI", "RJ": "BR-RJ", "RN": "BR-RN",
-    "RS": "BR-RS", "RO": "BR-RO", "RR": "BR-RR", "SC": "BR-SC",
-    "SP": "BR-SP", "SE": "BR-SE", "TO": "BR-TO"
-}
+import os
 
 # CONFIG
 st.set_page_config(
@@ -27,28 +18,68 @@ st.set_page_config(
     layout="wide"
 )
 
-st_autorefresh(interval=40000, key="autorefresh")
-
-# We are loading the gold parquet files
-# @st.cache_data : Stores the data in memory so that it does not reread the files every time the user changes pages.
-@st.cache_data(ttl=40)
-def load_data():
-    gold = OUT / "gold"
-    return {
-        "sales":      pd.read_parquet(gold / "gold_sales_overview.parquet"),
-        "delivery":   pd.read_parquet(gold / "gold_delivery_performance.parquet"),
-        "categories": pd.read_parquet(gold / "gold_top_categories.parquet"),
-        "sellers":    pd.read_parquet(gold / "gold_seller_performance.parquet"),
-        "geography":  pd.read_parquet(gold / "gold_customer_geography.parquet")
-    }
-data = load_data()
+# Seconds between refreshes: 40 suits the batch pipeline, a few seconds the streaming consumer
+REFRESH_SECONDS = int(os.environ.get("DASHBOARD_REFRESH_SECONDS", 40))
+st_autorefresh(interval=REFRESH_SECONDS * 1000, key="autorefresh")
+
+# We are loading the gold tables
+# Every save_gold publishes gold as a new folder out/gold/versions/<version>/ and then swaps
+# out/gold/manifest.json to it (see src/gold/gold_store.py), so a rerun reads only that
+# small file and a version's folder is always complete.
+# The pages get their data from dashboard/queries.py: the tables are loaded once per gold
+# version (memory-mapped Feather) and shared by every session, and every answer (top N,
+# the sellers of a state, a range of months, ...) is computed once per version and argument.
+manifest = load_gold_manifest()
+if manifest is None:
+    st.error("No gold data yet: run python src/gold/gold_aggregator.py")
+    st.stop()
+version = manifest["version"]
+
+# Month range of the Sales and Delivery pages (all months by default)
+def month_range(name):
+    options = queries.periods(version, name)
+    if len(options) < 2:
+        return None, None
+    return st.select_slider("Months", options=options, value=(options[0], options[-1]))
+
+# Choropleth map of the Geography page
+# The Brazil GeoJSON is read once per process (vendored file or disk cache, see geo.py:
+# simplified outlines, state code already in each feature's "id"), and the figure is
+# built once per gold version instead of on every render. Without a file and without
+# internet the map is left out (and the download is not tried again until a restart).
+@st.cache_resource
+def load_geojson():
+    return load_states_geojson()
+
+@st.cache_resource(max_entries=2)
+def choropleth_figure(version):
+    fig_map = px.choropleth(
+        queries.table(version, "geography"),
+        geojson=load_geojson(),
+        locations="customer_state",
+        color="total_orders",
+        color_continuous_scale="Blues",
+        labels={"total_orders": "Orders", "customer_state": "State"},
+        fitbounds="locations",
+    )
+    fig_map.update_geos(fitbounds="locations", visible=False)
+    fig_map.update_layout(
+        height=600,
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        coloraxis_colorbar=dict(
+            thickness=15,
+            len=0.6,
+            x=1.0
+        )
+    )
+    return fig_map
 
 # Side bar
 
 st.sidebar.title("🛒 E-Commerce")
 page = st.sidebar.radio(
     "Πλοήγηση",
-    ["Sales Overview", "Delivery Performance", "Top Categories", "Seller Performance", "Geography"]
+    ["Sales Overview", "Delivery Performance", "Top Categories", "Seller Performance", "Geography", "Explorer"]
 )
 
 
@@ -59,13 +90,17 @@ page = st.sidebar.radio(
 if page == "Sales Overview":
     st.title("📈 Sales Overview")
 
-    df_sales = data["sales"]
-    df_geo = data["geography"]
-    df_categories = data["categories"]
+    start, end = month_range("sales")
+    df_sales = queries.months(version, "sales", start, end)
 
-    # KPI Cards
+    # KPI Cards (over the selected months)
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Orders", f"{df_sales['total_orders'].sum():,}")
+    # With GOLD_DISTINCT_MODE=hll the monthly sketches are merged into an all-time count
+    if "orders_sketch" in df_sales.columns:
+        total_orders = rollup(df_sales, "orders_sketch")
+    else:
+        total_orders = df_sales["total_orders"].sum()
+    col1.metric("Total Orders", f"{total_orders:,}")
     col2.metric("Total Revenue", f"R$ {df_sales['total_revenue'].sum():,.2f}")
     col3.metric("Avg Order Value", f"R$ {df_sales['avg_order_value'].mean():,.2f}")
     col4.metric("Total Months", f"{len(df_sales)}")
@@ -73,8 +108,6 @@ if page == "Sales Overview":
     st.divider()
 
     # Line Chart: Monthly Revenue
-    df_sales["period"] = df_sales["order_year"].astype(str) + "-" + df_sales["order_month"].astype(str).str.zfill(2)
-
     st.subheader("Monthly Revenue")
     fig_revenue = px.line(
         df_sales,
@@ -98,7 +131,7 @@ if page == "Sales Overview":
 
     # Pie Chart: Revenue by Top 5 Categories
     st.subheader("Revenue Share — Top 5 Categories")
-    top5 = df_categories.head(5)
+    top5 = queries.top_n(version, "categories", "total_revenue", 5)
     fig_pie = px.pie(
         top5,
         values="total_revenue",
@@ -113,9 +146,10 @@ if page == "Sales Overview":
 elif page == "Delivery Performance":
     st.title("🚚 Delivery Performance")
 
-    df_delivery = data["delivery"]
+    start, end = month_range("delivery")
+    df_delivery = queries.months(version, "delivery", start, end)
 
-    # KPI Cards
+    # KPI Cards (over the selected months)
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Avg Fulfillment Days", f"{df_delivery['avg_fulfillment_days'].mean():.1f} days")
     col2.metric("Avg Shipping Days", f"{df_delivery['avg_shipping_days'].mean():.1f} days")
@@ -125,8 +159,6 @@ elif page == "Delivery Performance":
     st.divider()
 
     # Line Chart: Avg Fulfillment Days per Month
-    df_delivery["period"] = df_delivery["order_year"].astype(str) + "-" + df_delivery["order_month"].astype(str).str.zfill(2)
-
     st.subheader("Avg Fulfillment Days per Month")
     fig_fulfillment = px.line(
         df_delivery,
@@ -171,7 +203,7 @@ elif page == "Delivery Performance":
 elif page == "Top Categories":
     st.title("🏆 Top Categories")
 
-    df_categories = data["categories"]
+    df_categories = queries.table(version, "categories")
 
     # KPI Cards
     col1, col2, col3 = st.columns(3)
@@ -184,7 +216,7 @@ elif page == "Top Categories":
     # Bar Chart: Top 10 by Revenue
     st.subheader("Top 10 Categories by Revenue")
     fig_rev = px.bar(
-        df_categories.head(10),
+        queries.top_n(version, "categories", "total_revenue", 10),
         x="product_category_name",
         y="total_revenue",
         color="total_revenue",
@@ -194,7 +226,7 @@ elif page == "Top Categories":
 
     # Bar Chart: Top 10 by Orders
     st.subheader("Top 10 Categories by Orders")
-    top10_orders = df_categories.sort_values("total_orders", ascending=False).head(10)
+    top10_orders = queries.top_n(version, "categories", "total_orders", 10)
     fig_ord = px.bar(
         top10_orders,
         x="product_category_name",
@@ -206,7 +238,7 @@ elif page == "Top Categories":
 
     # Pie Chart: Top 5 Categories by Orders
     st.subheader("Order Share — Top 5 Categories")
-    top5_orders = df_categories.sort_values("total_orders", ascending=False).head(5)
+    top5_orders = queries.top_n(version, "categories", "total_orders", 5)
     fig_pie = px.pie(
         top5_orders,
         values="total_orders",
@@ -220,28 +252,26 @@ elif page == "Top Categories":
 elif page == "Seller Performance":
     st.title("🏪 Seller Performance")
 
-    df_sellers = data["sellers"]
+    # The KPIs, the states and the revenue per state are computed once per gold version,
+    # so changing the state filter only looks up that state's sellers
+    kpis = queries.seller_kpis(version)
 
     # KPI Cards
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Sellers", f"{len(df_sellers):,}")
-    col2.metric("Avg Fulfillment Days", f"{df_sellers['avg_fulfillment_days'].mean():.1f} days")
-    col3.metric("Avg On-Time Rate", f"{df_sellers['on_time_rate'].mean():.1f}%")
+    col1.metric("Total Sellers", f"{kpis['sellers']:,}")
+    col2.metric("Avg Fulfillment Days", f"{kpis['avg_fulfillment_days']:.1f} days")
+    col3.metric("Avg On-Time Rate", f"{kpis['avg_on_time_rate']:.1f}%")
     col4.metric(
         "Sellers > 90% On-Time",
-        f"{len(df_sellers[df_sellers['on_time_rate'] > 90]):,}"
+        f"{kpis['over_90_on_time']:,}"
     )
 
     st.divider()
 
     # Dropdown filter by state
-    states = ["All"] + sorted(df_sellers["seller_state"].unique().tolist())
+    states = ["All"] + list(queries.seller_states(version))
     selected_state = st.selectbox("Filter by State", states)
-
-    if selected_state == "All":
-        filtered = df_sellers
-    else:
-        filtered = df_sellers[df_sellers["seller_state"] == selected_state]
+    filtered = queries.sellers(version, None if selected_state == "All" else selected_state)
 
     # Bar Chart: Top 10 Sellers by Revenue
     st.subheader("Top 10 Sellers by Revenue")
@@ -256,7 +286,7 @@ elif page == "Seller Performance":
 
     # Pie Chart: Revenue Share by State
     st.subheader("Revenue Share by Seller State")
-    state_revenue = df_sellers.groupby("seller_state")["total_revenue"].sum().reset_index()
+    state_revenue = queries.seller_state_revenue(version)
     fig_pie = px.pie(
         state_revenue,
         values="total_revenue",
@@ -277,8 +307,7 @@ elif page == "Seller Performance":
 
 elif page == "Geography":
     st.title("🗺️ Customer Geography")
-    df_geo = data["geography"]
-    df_geo["state_iso"] = df_geo["customer_state"].map(BR_STATE_CODES)
+    df_geo = queries.table(version, "geography")
 
     # KPI Cards
     col1, col2, col3 = st.columns(3)
@@ -323,45 +352,82 @@ elif page == "Geography":
 
     # Full Table
     st.subheader("All States")
-    st.dataframe(df_geo, use_container_width=True)
+    st.dataframe(df_geo.drop(columns=["orders_sketch"], errors="ignore"), use_container_width=True)
 
     # Choropleth Map: Orders by State
     st.subheader("Orders by State — Map")
 
-    # Load Brazil states GeoJSON
-    geojson_url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
-    brazil_geojson = requests.get(geojson_url).json()
+    # The figure is built once per gold version and shared by every session
+    brazil_geojson = load_geojson()
+    if brazil_geojson is None:
+        st.warning("Map unavailable: the Brazil GeoJSON is not vendored or cached and could not be downloaded.")
+    else:
+        st.plotly_chart(choropleth_figure(version), use_container_width=True)
 
-    # Match state codes to GeoJSON
-    for feature in brazil_geojson["features"]:
-        feature["id"] = feature["properties"]["sigla"]
+# PAGE 6 — EXPLORER
+# Any date range and any mix of categories, seller states and customer states, broken
+# down by one of them. Answered from the gold order cube (see queries.py): the selected
+# cells are summed and their order sketches merged, so distinct orders are approximate
+# (HyperLogLog, about 1.6% error) and an order with items in two cells counts once.
 
-    fig_map = px.choropleth(
-        df_geo,
-        geojson=brazil_geojson,
-        locations="customer_state",
-        color="total_orders",
-        color_continuous_scale="Blues",
-        labels={"total_orders": "Orders", "customer_state": "State"},
-        fitbounds="locations",
-    )
-    fig_map.update_geos(fitbounds="locations", visible=False)
-    fig_map.update_layout(
-        height=600,
-        margin={"r": 0, "t": 0, "l": 0, "b": 0},
-        coloraxis_colorbar=dict(
-            thickness=15,
-            len=0.6,
-            x=1.0
-        )
-    )
+elif page == "Explorer":
+    st.title("🔎 Explorer")
 
-    fig_map.update_geos(fitbounds="locations", visible=False)
-    st.plotly_chart(fig_map, use_container_width=True)
+    # Filters
+    start, end = month_range("cube")
+    col1, col2, col3 = st.columns(3)
+    categories = col1.multiselect("Categories", queries.cube_values(version, "product_category_name"), placeholder="All")
+    seller_states = col2.multiselect("Seller States", queries.cube_values(version, "seller_state"), placeholder="All")
+    customer_states = col3.multiselect("Customer States", queries.cube_values(version, "customer_state"), placeholder="All")
+    cube_filter = queries.CubeFilter(start, end, tuple(sorted(categories)), tuple(sorted(seller_states)), tuple(sorted(customer_states)))
+
+    by = st.selectbox("Break Down by", list(queries.DIMENSIONS), format_func=queries.DIMENSIONS.get)
+
+    query_start = time.perf_counter()
+    summary = queries.cube_summary(version, cube_filter, by)
+    query_ms = (time.perf_counter() - query_start) * 1000
+    totals, breakdown = summary["totals"], summary["breakdown"]
+
+    if totals["cells"] == 0:
+        st.info("No orders match these filters.")
+    else:
+        # KPI Cards
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Orders", f"{totals['total_orders']:,}")
+        col2.metric("Revenue", f"R$ {totals['total_revenue']:,.2f}")
+        col3.metric("Avg Order Value", f"R$ {totals['avg_order_value']:,.2f}")
+        col4.metric("Avg Fulfillment Days", f"{totals['avg_fulfillment_days']:.1f} days")
+        col5.metric("On-Time Rate", f"{totals['on_time_rate']:.1f}%")
+        st.caption(f"{totals['cells']:,} cube cells in {query_ms:.0f} ms · orders are HyperLogLog estimates")
+
+        st.divider()
+
+        label = queries.DIMENSIONS[by]
+        if by == "period":
+            # Months stay in time order
+            chart_revenue = px.line(breakdown, x=by, y="total_revenue", markers=True, labels={by: label, "total_revenue": "Revenue (R$)"})
+            chart_orders = px.line(breakdown, x=by, y="total_orders", markers=True, labels={by: label, "total_orders": "Orders"})
+        else:
+            ranked = breakdown.sort_values("total_revenue", ascending=False, kind="stable")
+            chart_revenue = px.bar(ranked, x=by, y="total_revenue", color="total_revenue", labels={by: label, "total_revenue": "Revenue (R$)"})
+            chart_orders = px.bar(ranked, x=by, y="total_orders", color="total_orders", labels={by: label, "total_orders": "Orders"})
+
+        # Revenue and Orders by the chosen dimension
+        st.subheader(f"Revenue by {label}")
+        st.plotly_chart(chart_revenue, use_container_width=True)
+        st.subheader(f"Orders by {label}")
+        st.plotly_chart(chart_orders, use_container_width=True)
+
+        # Table
+        st.subheader(f"By {label}")
+        st.dataframe(
+            breakdown[[by, "total_orders", "total_revenue", "avg_order_value", "avg_fulfillment_days", "avg_shipping_days", "on_time_rate"]],
+            use_container_width=True
+        )
 
 refresh_interval = 300
 st.sidebar.divider()
-st.sidebar.caption("Auto-refreshes every 40 seconds")
+st.sidebar.caption(f"Auto-refreshes every {REFRESH_SECONDS} seconds")
+# The rerun reads the gold version again, so new gold shows up without clearing any cache
 if st.sidebar.button("🔄 Refresh Now"):
-    st.cache_data.clear()
     st.rerun()
\ No newline at end of file
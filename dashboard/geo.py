@@ -0,0 +1,139 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import requests
+from paths import OUT
+
+# BRAZIL STATES GEOJSON
+# The Geography map needs the outline of every Brazilian state. The GeoJSON is looked up:
+# 1. dashboard/assets/brazil_states.geojson  vendored file, if one was added to the checkout
+# 2. out/cache/geo/brazil_states.geojson     saved by the first download
+# 3. downloaded from GEOJSON_URL, prepared and saved to the cache
+# The vendored file is NOT in the repository yet: a fresh checkout needs internet on the
+# first start of the dashboard. `python dashboard/geo.py` writes it: it downloads
+# GEOJSON_URL, or prepares a GeoJSON file already on disk (`python dashboard/geo.py
+# brazil-states.geojson`, e.g. a copy of GEOJSON_URL or the cache file above), so it
+# also runs on a host without internet. Commit the file it writes, or copy it into
+# dashboard/assets/ on the host.
+# Prepared means: every feature gets its state code as "id" (what px.choropleth matches
+# `locations` against), only the properties the map uses are kept, and the outlines
+# are simplified (Ramer-Douglas-Peucker, SIMPLIFY_DEGREES tolerance) and rounded to
+# COORD_DECIMALS, so the browser receives and draws far fewer points.
+# Returns None when no file exists and the download fails.
+
+GEOJSON_URL = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+VENDORED_PATH = Path(__file__).resolve().parent / "assets" / "brazil_states.geojson"
+CACHE_PATH = OUT / "cache" / "geo" / "brazil_states.geojson"
+SIMPLIFY_DEGREES = 0.01   # about 1 km
+COORD_DECIMALS = 3
+DOWNLOAD_TIMEOUT_SECONDS = 10
+
+
+# SIMPLIFY
+# Ramer-Douglas-Peucker on one ring: keeps the point farthest from the segment between
+# two kept points while it is farther than `tolerance`, then splits there.
+# A ring keeps at least 4 points (first == last), otherwise it stays as it was.
+
+def simplify_ring(ring, tolerance):
+    points = np.asarray(ring, dtype=float)
+    if len(points) <= 4:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        inner = points[start + 1:end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            # Closed ring: first and last points are the same
+            distance = np.hypot(inner[:, 0] - a[0], inner[:, 1] - a[1])
+        else:
+            distance = np.abs(dx * (inner[:, 1] - a[1]) - dy * (inner[:, 0] - a[0])) / length
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.extend([(start, split), (split, end)])
+    simplified = points[keep]
+    return simplified if len(simplified) >= 4 else points
+
+def simplify_geometry(geometry, tolerance):
+    def polygon(rings):
+        return [np.round(simplify_ring(ring, tolerance), COORD_DECIMALS).tolist() for ring in rings]
+
+    if geometry["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": polygon(geometry["coordinates"])}
+    if geometry["type"] == "MultiPolygon":
+        return {"type": "MultiPolygon", "coordinates": [polygon(rings) for rings in geometry["coordinates"]]}
+    return geometry
+
+def prepare_geojson(geojson, tolerance=SIMPLIFY_DEGREES):
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": feature["properties"]["sigla"],
+                "properties": {"sigla": feature["properties"]["sigla"], "name": feature["properties"].get("name")},
+                "geometry": simplify_geometry(feature["geometry"], tolerance)
+            }
+            for feature in geojson["features"]
+        ]
+    }
+
+
+# LOAD
+
+def write_geojson(geojson, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(geojson, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+def fetch_geojson():
+    response = requests.get(GEOJSON_URL, timeout=DOWNLOAD_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.json()
+
+def load_states_geojson():
+    for path in (VENDORED_PATH, CACHE_PATH):
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+    try:
+        geojson = prepare_geojson(fetch_geojson())
+    except requests.RequestException as error:
+        print(f"Could not download the Brazil GeoJSON: {error}")
+        print(f"Without internet, add {VENDORED_PATH} (python dashboard/geo.py on a host with a connection)")
+        return None
+    write_geojson(geojson, CACHE_PATH)
+    return geojson
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Prepare the Brazil states GeoJSON into {VENDORED_PATH}")
+    parser.add_argument("source", nargs="?", help="GeoJSON file to prepare (default: download GEOJSON_URL)")
+    args = parser.parse_args()
+
+    if args.source:
+        with open(args.source, encoding="utf-8") as f:
+            original = json.load(f)
+    else:
+        original = fetch_geojson()
+    geojson = prepare_geojson(original)
+    write_geojson(geojson, VENDORED_PATH)
+    before = len(json.dumps(original))
+    after = VENDORED_PATH.stat().st_size
+    print(f"Saved {VENDORED_PATH}: {len(geojson['features'])} states, {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB")
@@ -0,0 +1,259 @@
+import sys
+from pathlib import Path
+from functools import lru_cache, wraps
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from src.gold import hll
+from src.gold.gold_store import version_dir
+
+# DASHBOARD QUERIES
+# The layer between the gold files and the Streamlit pages. Pages ask questions here
+# (top N by a metric, the sellers of a state, a range of months, ...) instead of
+# working on the gold frames themselves:
+# - tables(version) loads the gold tables once per gold version from their
+#   memory-mapped Feather files (the numeric columns stay read-only views of the file)
+#   and adds the derived columns (period, state_iso) once
+# - per version, the sellers are split by state and the seller KPIs computed once, so
+#   an interaction is a lookup, however many sellers there are
+# - every query takes the gold version as its first argument and is memoized per
+#   argument (LRU, QUERY_CACHE_SIZE answers): a new version never gets an old
+#   answer, and the answers of old versions are evicted as new ones come in
+# Module-level caches live as long as the Streamlit process, so every session shares them.
+# A query returns a shallow copy of its cached frame (and of the frames and dicts in a
+# dict): with pandas copy-on-write no data is copied, and a page that adds or changes a
+# column only changes its own copy.
+
+QUERY_CACHE_SIZE = 256
+
+GOLD_FILES = {
+    "sales":      "gold_sales_overview",
+    "delivery":   "gold_delivery_performance",
+    "categories": "gold_top_categories",
+    "sellers":    "gold_seller_performance",
+    "geography":  "gold_customer_geography",
+    "cube":       "gold_order_cube"
+}
+
+# Mapping from Brazilian state codes to ISO-3166-2 codes
+BR_STATE_CODES = {
+    "AC": "BR-AC", "AL": "BR-AL", "AP": "BR-AP", "AM": "BR-AM",
+    "BA": "BR-BA", "CE": "BR-CE", "DF": "BR-DF", "ES": "BR-ES",
+    "GO": "BR-GO", "MA": "BR-MA", "MT": "BR-MT", "MS": "BR-MS",
+    "MG": "BR-MG", "PA": "BR-PA", "PB": "BR-PB", "PR": "BR-PR",
+    "PE": "BR-PE", "PI": "BR-PI", "RJ": "BR-RJ", "RN": "BR-RN",
+    "RS": "BR-RS", "RO": "BR-RO", "RR": "BR-RR", "SC": "BR-SC",
+    "SP": "BR-SP", "SE": "BR-SE", "TO": "BR-TO"
+}
+
+def shared_copy(result):
+    if isinstance(result, pd.DataFrame):
+        return result.copy(deep=False)
+    if isinstance(result, dict):
+        return {key: shared_copy(value) for key, value in result.items()}
+    return result
+
+def shared_query(fn):
+    cached = lru_cache(maxsize=QUERY_CACHE_SIZE)(fn)
+
+    @wraps(fn)
+    def query(*args):
+        return shared_copy(cached(*args))
+
+    query.cache_info = cached.cache_info
+    query.cache_clear = cached.cache_clear
+    return query
+
+
+# TABLES
+# Two versions are kept: a session still drawing the previous version keeps it until it reruns.
+
+def period_labels(df):
+    # "2017-05", sorts like the months
+    return df["order_year"].astype(str) + "-" + df["order_month"].astype(str).str.zfill(2)
+
+@lru_cache(maxsize=2)
+def tables(version: int) -> dict:
+    data = {
+        key: feather.read_table(version_dir(version) / f"{name}.feather", memory_map=True).to_pandas(split_blocks=True)
+        for key, name in GOLD_FILES.items()
+    }
+    for name in ["sales", "delivery", "cube"]:
+        data[name] = data[name].assign(period=period_labels(data[name]))
+    data["geography"] = data["geography"].assign(state_iso=data["geography"]["customer_state"].map(BR_STATE_CODES))
+    return data
+
+@shared_query
+def table(version: int, name: str) -> pd.DataFrame:
+    return tables(version)[name]
+
+
+# MONTHS
+# For the tables with a month ("sales", "delivery", "cube"): the periods they cover, and
+# the rows between two periods (inclusive; None = open end).
+
+@shared_query
+def periods(version: int, name: str) -> tuple:
+    return tuple(sorted(tables(version)[name]["period"].unique()))
+
+@shared_query
+def months(version: int, name: str, start: str = None, end: str = None) -> pd.DataFrame:
+    df = tables(version)[name]
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= df["period"] >= start
+    if end is not None:
+        keep &= df["period"] <= end
+    return df[keep]
+
+
+# TOP N
+# The `n` rows with the largest `metric` (stable order among ties).
+
+@shared_query
+def top_n(version: int, name: str, metric: str, n: int) -> pd.DataFrame:
+    return tables(version)[name].sort_values(metric, ascending=False, kind="stable").head(n)
+
+
+# SELLERS
+
+@lru_cache(maxsize=2)
+def sellers_by_state(version: int) -> dict:
+    df = tables(version)["sellers"]
+    return {state: group for state, group in df.groupby("seller_state", observed=True, sort=True)}
+
+@shared_query
+def seller_states(version: int) -> tuple:
+    return tuple(str(state) for state in sellers_by_state(version))
+
+# Sellers of one state (None = every state), in the gold order (highest revenue first)
+@shared_query
+def sellers(version: int, state: str = None) -> pd.DataFrame:
+    if state is None:
+        return tables(version)["sellers"]
+    return sellers_by_state(version).get(state, tables(version)["sellers"].iloc[:0])
+
+@shared_query
+def seller_state_revenue(version: int) -> pd.DataFrame:
+    return tables(version)["sellers"].groupby("seller_state", observed=True)["total_revenue"].sum().reset_index()
+
+@shared_query
+def seller_kpis(version: int) -> dict:
+    df = tables(version)["sellers"]
+    return {
+        "sellers": len(df),
+        "avg_fulfillment_days": df["avg_fulfillment_days"].mean(),
+        "avg_on_time_rate": df["on_time_rate"].mean(),
+        "over_90_on_time": int((df["on_time_rate"] > 90).sum())
+    }
+
+
+# CUBE
+# Date range and drill-down filters, answered from gold_order_cube: the cells matching
+# the filters are selected and summed (distinct orders: their sparse sketches merged),
+# silver is never read. Once per version the cube is turned into arrays: every measure,
+# the code of every cell in each dimension (codes follow the sorted labels, so a month
+# range is a code range), and the decoded sketch entries. A query then only builds a
+# mask and sums with bincount, without copying cube rows.
+# A CubeFilter is hashable, so it is part of the memoized arguments. Empty tuples select everything.
+
+DIMENSIONS = {
+    "period":                "Month",
+    "product_category_name": "Category",
+    "seller_state":          "Seller State",
+    "customer_state":        "Customer State"
+}
+
+MEASURES = [
+    "total_revenue", "fulfillment_days_sum", "fulfillment_days_count",
+    "shipping_days_sum", "shipping_days_count", "on_time_sum", "on_time_count"
+]
+
+class CubeFilter(NamedTuple):
+    start: str = None            # first month ("2017-05"), None = from the first
+    end: str = None              # last month, None = up to the last
+    categories: tuple = ()
+    seller_states: tuple = ()
+    customer_states: tuple = ()
+
+def cube_arrays(cube: pd.DataFrame) -> dict:
+    dimensions = {}
+    for column in DIMENSIONS:
+        codes, labels = pd.factorize(cube[column], sort=True)
+        dimensions[column] = (codes, np.asarray(labels, dtype=object))
+    return {
+        "cells": len(cube),
+        "measures": {column: cube[column].to_numpy(dtype=np.float64) for column in MEASURES},
+        "dimensions": dimensions,
+        "sketches": hll.decode_sparse(list(cube["orders_sparse_sketch"]))
+    }
+
+@lru_cache(maxsize=2)
+def version_cube(version: int) -> dict:
+    return cube_arrays(tables(version)["cube"])
+
+def select_cells(arrays: dict, cube_filter: CubeFilter) -> np.ndarray:
+    codes, labels = arrays["dimensions"]["period"]
+    first = 0 if cube_filter.start is None else np.searchsorted(labels, cube_filter.start)
+    last = len(labels) if cube_filter.end is None else np.searchsorted(labels, cube_filter.end, side="right")
+    keep = (codes >= first) & (codes < last)
+    for column, values in [
+        ("product_category_name", cube_filter.categories),
+        ("seller_state", cube_filter.seller_states),
+        ("customer_state", cube_filter.customer_states)
+    ]:
+        if values:
+            codes, labels = arrays["dimensions"][column]
+            keep &= np.isin(labels, values)[codes]
+    return keep
+
+# Sums of the selected cells per value of `by` and in total, with the distinct orders of
+# the merged sketches and the averages derived from the summed measures. One pass: the
+# totals are the sums of the groups, and their sketch the merge of the groups' registers.
+def summarize_cells(arrays: dict, keep: np.ndarray, by: str) -> tuple:
+    precision, owners, index, rank = arrays["sketches"]
+    cells = np.flatnonzero(keep)
+    codes, labels = arrays["dimensions"][by]
+    groups = codes[cells]
+
+    sums = pd.DataFrame({
+        column: np.bincount(groups, weights=values[cells], minlength=len(labels))
+        for column, values in arrays["measures"].items()
+    })
+    # Group of every sketch entry: -1 for the entries of cells not selected
+    cell_groups = np.full(arrays["cells"], -1, dtype=np.int64)
+    cell_groups[cells] = groups
+    registers = hll.merge_entries(cell_groups[owners], index, rank, len(labels), precision)
+
+    breakdown = sums.assign(total_orders=hll.count(registers))
+    breakdown.insert(0, by, labels)
+    breakdown = breakdown[np.bincount(groups, minlength=len(labels)) > 0].reset_index(drop=True)
+    totals = sums.sum().to_frame().T.assign(total_orders=hll.count(registers.max(axis=0)))
+    return with_averages(totals).to_dict("records")[0] | {"cells": len(cells)}, with_averages(breakdown)
+
+def with_averages(df: pd.DataFrame) -> pd.DataFrame:
+    counts = [column for column in MEASURES if column != "total_revenue"]
+    df = df.astype({column: "int64" for column in counts + ["total_orders"]})
+    columns = [column for column in df.columns if column not in MEASURES + ["total_orders"]]
+    return df[columns + ["total_orders"] + MEASURES].assign(
+        avg_order_value=(df["total_revenue"] / df["total_orders"].where(df["total_orders"] > 0)).round(2),
+        avg_fulfillment_days=(df["fulfillment_days_sum"] / df["fulfillment_days_count"].where(df["fulfillment_days_count"] > 0)).round(1),
+        avg_shipping_days=(df["shipping_days_sum"] / df["shipping_days_count"].where(df["shipping_days_count"] > 0)).round(1),
+        on_time_rate=(100 * df["on_time_sum"] / df["on_time_count"].where(df["on_time_count"] > 0)).round(1),
+        total_revenue=df["total_revenue"].round(2)
+    )
+
+@shared_query
+def cube_values(version: int, column: str) -> tuple:
+    return tuple(str(label) for label in version_cube(version)["dimensions"][column][1])
+
+# {"totals": {...}, "breakdown": DataFrame with one row per value of `by`}
+@shared_query
+def cube_summary(version: int, cube_filter: CubeFilter, by: str) -> dict:
+    arrays = version_cube(version)
+    totals, breakdown = summarize_cells(arrays, select_cells(arrays, cube_filter), by)
+    return {"totals": totals, "breakdown": breakdown}
@@ -1,60 +1,118 @@
 import azure.functions as func
 import logging
 import json
-from datetime import datetime
-import uuid
+from datetime import datetime, timezone
+from typing import List
 #We improt os to access environment variables, and we import BlobServiceClient to interact with Azure Blob Storage.
 import os
-from azure.storage.blob import BlobServiceClient 
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError
+from azure.storage.blob import BlobServiceClient
 #Import the BlobServiceClient class from the azure.storage.blob module to interact with Azure Blob Storage
 
 app = func.FunctionApp()
-@app.function_name(name="eventhub_to_blob")#Name of the function
-#Trigger the function when a message is received in the
-#event hub named orders, using the connection string specified 
-#in the application settings under the key EVENTHUB_CONNECTION
-@app.event_hub_message_trigger(
-    arg_name="event",#Name of the argument that will receive the event data
-    event_hub_name="orders",#Connected to the event hub named orders
-    connection="EVENTHUB_CONNECTION"
-)
 
-#This function will be triggered when a message is received
-#in the event hub named orders. The event data will be passed
-#to the function as an argument named event.
-#The function will log the event body to the console.
-def eventhub_to_blob(event: func.EventHubEvent):
-    logging.info("Event received!")
-    body = event.get_body().decode("utf-8")#It returns bytes, so we need to decode it to a string!!!
-    try:
-        #The goal is to check if the body is a valid JSON
-        data=json.loads(body)#We create a new variable data, that it is a dictionary that contains the parsed JSON data
-        #Log the order_id if it exists in the JSON data
-        #Partitioned path
-        daily_date=datetime.utcnow()
-        year=daily_date.year
-        month=str(daily_date.month).zfill(2)
-        day=str(daily_date.day).zfill(2)
-        unique_id=str(uuid.uuid4())#Generate a unique identifier for the blob name
-        blob_name=f"orders/{year}/{month}/{day}/{unique_id}.json" #Final path (orders/2026/03/18/abc-123.json)
+#All events of one partition that arrive in the same time window go to the same append blob
+#(orders/2026/03/18/1005-p0.ndjson holds partition 0 from 10:05 to 10:10)
+WINDOW_MINUTES = int(os.environ.get("BLOB_WINDOW_MINUTES", "5"))
+#Azure refuses append blocks bigger than 4 MiB, so bigger batches are split
+MAX_APPEND_BLOCK_BYTES = 4 * 1024 * 1024
+
+#One client for the whole worker process. It keeps its HTTP connections open,
+#so we do not pay a new connection (and TLS handshake) for every batch.
+_container_client = None
+
+def get_container_client():
+    global _container_client
+    if _container_client is None:
         #We take the connection string for Azure Blob Storage from the environment variable AzureWebJobsStorage,
         #which is typically used in Azure Functions to store data and manage state.
-        connection_string=os.environ.get("AzureWebJobsStorage")
+        connection_string = os.environ.get("AzureWebJobsStorage")
         if connection_string is None:
-            logging.info("Missing AzureWebJobsStorage")
-            return
-        logging.info("Found AzureWebJobsStorage")
+            return None
         blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        container_client = blob_service_client.get_container_client("bronze")
-        container_client.upload_blob(
-            name=blob_name,
-            data=body,
-            overwrite=False #So that one event does not step on another
-        )
-        logging.info(f"Uploaded blob: {blob_name}")
-        logging.info(f"Parsed order_id:{data.get('order_id')}")
-        
-    except Exception as e:
-        logging.error(f"JSON parse faild: {e}")
+        _container_client = blob_service_client.get_container_client("bronze")
+    return _container_client
+
+
+#Partitioned path of the window blob (orders/2026/03/18/1005-p0.ndjson)
+def window_blob_name(now, partition_id):
+    window_start = now.minute - now.minute % WINDOW_MINUTES
+    return f"orders/{now:%Y/%m/%d}/{now.hour:02d}{window_start:02d}-p{partition_id}.ndjson"
+
+
+#For cardinality=many every event shares the same trigger metadata (events[0] is enough)
+def partition_id_of(events):
+    metadata = events[0].metadata or {}
+    partition_context = metadata.get("PartitionContext") or {}
+    return partition_context.get("PartitionId", "0")
+
+
+#Splits the NDJSON lines into blocks of at most MAX_APPEND_BLOCK_BYTES, never in the middle of a line
+def append_blocks(lines):
+    block = []
+    block_size = 0
+    for line in lines:
+        if block and block_size + len(line) > MAX_APPEND_BLOCK_BYTES:
+            yield b"".join(block)
+            block = []
+            block_size = 0
+        block.append(line)
+        block_size += len(line)
+    if block:
+        yield b"".join(block)
+
+
+#Appends the lines to the append blob, creating it first if it does not exist yet.
+#IfMissing makes the create fail instead of wiping the blob when another instance created it first.
+def append_to_blob(container_client, blob_name, lines):
+    blob_client = container_client.get_blob_client(blob_name)
+    try:
+        blob_client.create_append_blob(match_condition=MatchConditions.IfMissing)
+    except ResourceExistsError:
+        pass
+    for block in append_blocks(lines):
+        blob_client.append_block(block)
+
+
+@app.function_name(name="eventhub_to_blob")#Name of the function
+#Trigger the function when messages are received in the
+#event hub named orders, using the connection string specified
+#in the application settings under the key EVENTHUB_CONNECTION.
+#cardinality=MANY delivers a whole batch of events in one call (batch size is set in host.json)
+@app.event_hub_message_trigger(
+    arg_name="events",#Name of the argument that will receive the batch of events
+    event_hub_name="orders",#Connected to the event hub named orders
+    connection="EVENTHUB_CONNECTION",
+    cardinality=func.Cardinality.MANY
+)
+
+#This function will be triggered with a batch of messages from
+#the event hub named orders. Every valid JSON event becomes one line
+#of an NDJSON append blob, so one batch costs a few storage calls instead of one per event.
+def eventhub_to_blob(events: List[func.EventHubEvent]):
+    logging.info(f"Batch received: {len(events)} events")
+
+    lines = []
+    for event in events:
+        body = event.get_body().decode("utf-8")#It returns bytes, so we need to decode it to a string!!!
+        try:
+            #The goal is to check if the body is a valid JSON
+            data = json.loads(body)
+        except Exception as e:
+            logging.error(f"JSON parse faild: {e}")
+            continue
+        #Re-dump it on one line, so every line of the blob is exactly one order
+        lines.append((json.dumps(data) + "\n").encode("utf-8"))
+
+    if not lines:
+        return
+
+    container_client = get_container_client()
+    if container_client is None:
+        logging.info("Missing AzureWebJobsStorage")
         return
 
+    blob_name = window_blob_name(datetime.now(timezone.utc), partition_id_of(events))
+    append_to_blob(container_client, blob_name, lines)
+    logging.info(f"Appended {len(lines)} orders to blob: {blob_name}")
@@ -0,0 +1,21 @@
+# ORDER CATALOG
+# The values fake orders are drawn from, shared by send_orders.py and load_generator.py.
+# Kept in its own module so importing them loads nothing else (send_orders.py also
+# starts the pipeline runner, with the whole silver/gold stack).
+
+STATES = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "GO", "ES", "PE",
+          "CE", "MA", "MT", "MS", "DF", "PB", "AM", "RN", "AL", "PA"]
+
+CATEGORIES = ["cama_mesa_banho", "beleza_saude", "informatica_acessorios",
+              "moveis_decoracao", "esporte_lazer", "utilidades_domesticas",
+              "relogios_presentes", "ferramentas_jardim", "cool_stuff", "automotivo"]
+
+SELLERS = {
+    "SP": ["seller_sp_1", "seller_sp_2", "seller_sp_3"],
+    "RJ": ["seller_rj_1", "seller_rj_2"],
+    "MG": ["seller_mg_1", "seller_mg_2"],
+    "PR": ["seller_pr_1"],
+    "RS": ["seller_rs_1", "seller_rs_2"]
+}
+
+PAYMENT_TYPES = ["credit_card", "boleto", "voucher", "debit_card"]
@@ -0,0 +1,327 @@
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from producer.catalog import CATEGORIES, PAYMENT_TYPES, SELLERS, STATES
+
+try:
+    from azure.eventhub import EventData, EventHubProducerClient
+    from azure.eventhub.aio import EventHubProducerClient as AsyncEventHubProducerClient
+except ImportError:
+    EventData = EventHubProducerClient = AsyncEventHubProducerClient = None
+
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
+# LOAD GENERATOR
+# Capacity-test mode of the order producer: sends fake orders (same fields and value
+# ranges as send_orders.py) at a target rate instead of one every 2 seconds.
+# - orders are generated as NumPy arrays, a whole tick at a time, and serialized to
+#   JSON lines in one pandas call
+# - many orders are packed into each Event Hub batch, up to the batch size limit
+# - --async sends the batches of every partition concurrently (azure.eventhub.aio)
+# - --sink dir writes the same lines to local files instead, in the bronze layout of the
+#   Azure Function (orders/YYYY/MM/DD/HHMM-p<partition>.ndjson), so the run can be
+#   benchmarked offline: point BRONZE_LOCAL_DIR or the streaming consumer's --dir at it
+# Every STATS_SECONDS it prints the achieved rate and the p50/p99 latency of one batch send.
+# Usage:
+#   python producer/load_generator.py --rate 5000 --seconds 60
+#   python producer/load_generator.py --rate 5000 --async --partitions 4
+#   python producer/load_generator.py --rate 0 --sink dir --dir /tmp/bronze   (as fast as possible)
+
+TICK_SECONDS = 0.1
+STATS_SECONDS = 5
+MAX_TICK_ORDERS = 50_000
+# Event Hub's batch limit on the Basic/Standard tiers; the dir sink uses the same size
+MAX_BATCH_BYTES = 1024 * 1024
+WINDOW_MINUTES = int(os.environ.get("BLOB_WINDOW_MINUTES", "5"))
+
+SELLER_IDS = np.array([seller for sellers in SELLERS.values() for seller in sellers])
+SELLER_STATES = np.array(list(SELLERS))
+SELLER_COUNTS = np.array([len(sellers) for sellers in SELLERS.values()])
+SELLER_OFFSETS = np.concatenate([[0], np.cumsum(SELLER_COUNTS)[:-1]])
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+
+# ORDERS
+# Vectorized make_order: a seller state is picked first and then one of its sellers,
+# as send_orders.py does.
+
+def random_uuids(rng, n):
+    # Version-4 UUID strings: 16 random bytes -> 32 hex digits -> 36 characters with dashes
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    digits = np.empty((n, 32), dtype=np.uint8)
+    digits[:, 0::2] = HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = HEX_DIGITS[raw & 0x0F]
+    chars = np.insert(digits, [8, 12, 16, 20], ord("-"), axis=1)
+    return chars.view("S36").ravel().astype(str)
+
+def iso_utc(timestamps):
+    return np.char.add(np.datetime_as_string(timestamps, unit="us"), "+00:00")
+
+def make_orders(rng, n):
+    seller_state = rng.integers(0, len(SELLER_STATES), size=n)
+    seller = SELLER_OFFSETS[seller_state] + (rng.random(n) * SELLER_COUNTS[seller_state]).astype(int)
+    price = np.round(rng.uniform(20.0, 500.0, size=n), 2)
+    freight = np.round(rng.uniform(5.0, 50.0, size=n), 2)
+
+    purchase_time = np.datetime64(datetime.now(timezone.utc).replace(tzinfo=None), "us")
+    day = np.timedelta64(1, "D")
+    return pd.DataFrame({
+        "order_id": random_uuids(rng, n),
+        "customer_id": random_uuids(rng, n),
+        "order_status": "delivered",
+        "order_purchase_timestamp": iso_utc(np.full(n, purchase_time)),
+        "order_delivered_customer_date": iso_utc(purchase_time + rng.integers(5, 26, size=n) * day),
+        "order_delivered_carrier_date": iso_utc(np.full(n, purchase_time + 2 * day)),
+        "order_estimated_delivery_date": iso_utc(purchase_time + rng.integers(7, 21, size=n) * day),
+        "customer_state": np.array(STATES)[rng.integers(0, len(STATES), size=n)],
+        "seller_id": SELLER_IDS[seller],
+        "seller_state": SELLER_STATES[seller_state],
+        "product_category_name": np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), size=n)],
+        "payment_value": np.round(price + freight, 2),
+        "payment_type": np.array(PAYMENT_TYPES)[rng.integers(0, len(PAYMENT_TYPES), size=n)],
+        "payment_installments": rng.integers(1, 13, size=n),
+        "price": price,
+        "freight_value": freight
+    })
+
+def to_json_lines(df):
+    return df.to_json(orient="records", lines=True).splitlines()
+
+
+# SINKS
+# send(lines) sends the orders and returns the seconds each batch send took.
+# Consecutive batches go to the partitions in turn (None = let Event Hub pick).
+
+def pack(lines, max_bytes):
+    # Groups the lines into batches of at most `max_bytes` (for the dir sink)
+    batch = []
+    size = 0
+    for line in lines:
+        if batch and size + len(line) + 1 > max_bytes:
+            yield batch
+            batch = []
+            size = 0
+        batch.append(line)
+        size += len(line) + 1
+    if batch:
+        yield batch
+
+def require_eventhub():
+    if EventHubProducerClient is None:
+        raise RuntimeError("The Event Hub sink needs the azure-eventhub package (or use --sink dir)")
+    return os.getenv("EVENT_HUB_CONNECTION_STRING"), os.getenv("EVENT_HUB_NAME")
+
+class EventHubSink:
+    def __init__(self, partitions=None):
+        connection_string, eventhub_name = require_eventhub()
+        self.producer = EventHubProducerClient.from_connection_string(
+            conn_str=connection_string,
+            eventhub_name=eventhub_name
+        )
+        ids = self.producer.get_partition_ids()
+        self.partition_ids = ids[:partitions] if partitions else [None]
+        self.next_partition = 0
+
+    def new_batch(self):
+        partition_id = self.partition_ids[self.next_partition % len(self.partition_ids)]
+        self.next_partition += 1
+        return self.producer.create_batch(partition_id=partition_id)
+
+    def send_timed(self, batch, latencies):
+        start = time.perf_counter()
+        self.producer.send_batch(batch)
+        latencies.append(time.perf_counter() - start)
+
+    def send(self, lines):
+        latencies = []
+        batch = self.new_batch()
+        for line in lines:
+            try:
+                batch.add(EventData(line))
+            except ValueError:
+                # Batch full: send it and start the next one
+                self.send_timed(batch, latencies)
+                batch = self.new_batch()
+                batch.add(EventData(line))
+        if len(batch):
+            self.send_timed(batch, latencies)
+        return latencies
+
+    def close(self):
+        self.producer.close()
+
+
+# The lines are split evenly over the partitions and every partition sends its
+# batches on its own coroutine, so the round trips to Event Hub overlap.
+class AsyncEventHubSink:
+    def __init__(self, partitions=None):
+        connection_string, eventhub_name = require_eventhub()
+        self.loop = asyncio.new_event_loop()
+        self.producer = AsyncEventHubProducerClient.from_connection_string(
+            conn_str=connection_string,
+            eventhub_name=eventhub_name
+        )
+        ids = self.loop.run_until_complete(self.producer.get_partition_ids())
+        self.partition_ids = ids[:partitions] if partitions else ids
+
+    async def send_partition(self, partition_id, lines, latencies):
+        async def send_timed(batch):
+            start = time.perf_counter()
+            await self.producer.send_batch(batch)
+            latencies.append(time.perf_counter() - start)
+
+        batch = await self.producer.create_batch(partition_id=partition_id)
+        for line in lines:
+            try:
+                batch.add(EventData(line))
+            except ValueError:
+                await send_timed(batch)
+                batch = await self.producer.create_batch(partition_id=partition_id)
+                batch.add(EventData(line))
+        if len(batch):
+            await send_timed(batch)
+
+    async def send_all(self, lines):
+        latencies = []
+        count = len(self.partition_ids)
+        await asyncio.gather(*(
+            self.send_partition(partition_id, lines[i::count], latencies)
+            for i, partition_id in enumerate(self.partition_ids)
+        ))
+        return latencies
+
+    def send(self, lines):
+        return self.loop.run_until_complete(self.send_all(lines))
+
+    def close(self):
+        self.loop.run_until_complete(self.producer.close())
+        self.loop.close()
+
+
+# Appends each batch to the window file of its partition, like the Azure Function does
+# with the append blobs (orders/2026/03/18/1005-p0.ndjson: partition 0, 10:05 to 10:10)
+class DirectorySink:
+    def __init__(self, path, partitions=None):
+        self.path = Path(path)
+        self.partitions = partitions or 1
+        self.next_partition = 0
+
+    def window_file(self, now, partition_id):
+        window_start = now.minute - now.minute % WINDOW_MINUTES
+        return self.path / f"orders/{now:%Y/%m/%d}/{now.hour:02d}{window_start:02d}-p{partition_id}.ndjson"
+
+    def send(self, lines):
+        latencies = []
+        for batch in pack(lines, MAX_BATCH_BYTES):
+            start = time.perf_counter()
+            path = self.window_file(datetime.now(timezone.utc), self.next_partition % self.partitions)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(batch) + "\n")
+            latencies.append(time.perf_counter() - start)
+            self.next_partition += 1
+        return latencies
+
+    def close(self):
+        pass
+
+
+# STATS
+
+def percentile_ms(latencies, q):
+    return np.percentile(latencies, q) * 1000 if latencies else float("nan")
+
+class LoadStats:
+    def __init__(self, rate):
+        self.rate = rate
+        self.start = self.window_start = time.monotonic()
+        self.sent = self.window_sent = 0
+        self.latencies = []
+        self.window_latencies = []
+
+    def add(self, orders, latencies):
+        self.sent += orders
+        self.window_sent += orders
+        self.latencies.extend(latencies)
+        self.window_latencies.extend(latencies)
+
+    def report(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.window_start < STATS_SECONDS:
+            return
+        target = f" (target {self.rate:,.0f})" if self.rate else ""
+        print(f"{self.window_sent / (now - self.window_start):,.0f} orders/s{target} | "
+              f"{self.sent:,} sent | {len(self.window_latencies):,} batches | "
+              f"send p50 {percentile_ms(self.window_latencies, 50):.1f} ms "
+              f"p99 {percentile_ms(self.window_latencies, 99):.1f} ms")
+        self.window_start = now
+        self.window_sent = 0
+        self.window_latencies = []
+
+    def summary(self):
+        elapsed = time.monotonic() - self.start
+        print(f"\nSent {self.sent:,} orders in {elapsed:.1f}s: {self.sent / elapsed:,.0f} orders/s | "
+              f"{len(self.latencies):,} batches | send p50 {percentile_ms(self.latencies, 50):.1f} ms "
+              f"p99 {percentile_ms(self.latencies, 99):.1f} ms")
+
+
+# RUN
+# Every TICK_SECONDS the orders due by then (rate x elapsed time, minus what was sent)
+# are generated and sent as one block. When the sink cannot keep up, a tick sends at most
+# MAX_TICK_ORDERS and the achieved rate falls below the target. rate=0 sends blocks of
+# MAX_TICK_ORDERS back to back. seconds=0 runs until Ctrl+C.
+
+def run(sink, rate, seconds=0, seed=None):
+    rng = np.random.default_rng(seed)
+    stats = LoadStats(rate)
+    try:
+        while not seconds or time.monotonic() - stats.start < seconds:
+            tick = time.monotonic()
+            due = MAX_TICK_ORDERS if not rate else int(rate * (tick - stats.start)) - stats.sent
+            due = min(due, MAX_TICK_ORDERS)
+            if due > 0:
+                stats.add(due, sink.send(to_json_lines(make_orders(rng, due))))
+            stats.report()
+            if rate:
+                time.sleep(max(0.0, TICK_SECONDS - (time.monotonic() - tick)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+    stats.summary()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send fake orders at a target rate")
+    parser.add_argument("--rate", type=float, default=1000, help="orders per second (0 = as fast as possible)")
+    parser.add_argument("--seconds", type=float, default=0, help="run time (0 = until Ctrl+C)")
+    parser.add_argument("--sink", choices=["eventhub", "dir"], default="eventhub")
+    parser.add_argument("--dir", help="output folder of the dir sink")
+    parser.add_argument("--partitions", type=int, help="number of partitions to spread the batches over")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="send the partitions concurrently")
+    parser.add_argument("--seed", type=int, help="random seed (the same seed repeats the same order ids)")
+    args = parser.parse_args()
+
+    if args.sink == "dir":
+        if args.dir is None:
+            parser.error("--dir is needed for --sink dir")
+        sink = DirectorySink(args.dir, args.partitions)
+    elif args.use_async:
+        sink = AsyncEventHubSink(args.partitions)
+    else:
+        sink = EventHubSink(args.partitions)
+    print(f"Sending orders to {args.sink} at {args.rate:,.0f}/s..." if args.rate else f"Sending orders to {args.sink}...")
+    run(sink, args.rate, args.seconds, args.seed)
@@ -1,73 +1,68 @@
 import os
 import json
-import time
+import queue
 import uuid
 import random
 import threading
-import subprocess
 import sys
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
-from azure.eventhub import EventData, EventHubProducerClient
+
+try:
+    from azure.eventhub import EventData, EventHubProducerClient
+except ImportError:
+    EventData = EventHubProducerClient = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from producer.catalog import CATEGORIES, PAYMENT_TYPES, SELLERS, STATES
+from src.pipeline.pipeline_runner import PipelineRunner
 
 load_dotenv()
 connection_string = os.getenv("EVENT_HUB_CONNECTION_STRING")
 event_hub_name = os.getenv("EVENT_HUB_NAME")
 
-STATES = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "GO", "ES", "PE",
-          "CE", "MA", "MT", "MS", "DF", "PB", "AM", "RN", "AL", "PA"]
-
-CATEGORIES = ["cama_mesa_banho", "beleza_saude", "informatica_acessorios",
-              "moveis_decoracao", "esporte_lazer", "utilidades_domesticas",
-              "relogios_presentes", "ferramentas_jardim", "cool_stuff", "automotivo"]
-
-SELLERS = {
-    "SP": ["seller_sp_1", "seller_sp_2", "seller_sp_3"],
-    "RJ": ["seller_rj_1", "seller_rj_2"],
-    "MG": ["seller_mg_1", "seller_mg_2"],
-    "PR": ["seller_pr_1"],
-    "RS": ["seller_rs_1", "seller_rs_2"]
-}
-
-PAYMENT_TYPES = ["credit_card", "boleto", "voucher", "debit_card"]
-
-# Event that pauses the producer while the pipeline is running
-pipeline_running = threading.Event()
+SEND_INTERVAL_SECONDS = 2
+PIPELINE_INTERVAL_SECONDS = 30
+
+# PIPELINE THREAD
+# Silver and gold run in a background thread every PIPELINE_INTERVAL_SECONDS while the
+# producer keeps sending: orders are not paused during a cycle.
+# Each cycle reads a consistent snapshot of bronze: the bronze reader's watermark holds
+# how many bytes of each blob were already read, a cycle takes only the complete
+# lines there are when it reads a blob, and whatever is appended after that is picked
+# up by the next cycle (see fetch_new_orders in src/bronze/bronze_reader.py).
+#
+# The threads talk through a stop Event and a queue instead of a shared flag:
+# - stop.wait() is the sleep of both loops, so setting it ends them at once
+# - the pipeline thread puts the result of every cycle (report or exception) in the
+#   queue, and the producer prints it between two orders, so a failing pipeline
+#   stops the producer instead of dying silently
+
+def run_pipeline(stop, results):
+    # Silver and gold run in this process; the runner keeps its caches between cycles
+    runner = PipelineRunner()
+    while not stop.wait(PIPELINE_INTERVAL_SECONDS):
+        try:
+            results.put(runner.run_cycle())
+        except Exception as error:
+            results.put(error)
+            return
+
+def check_pipeline(results, sent):
+    while True:
+        try:
+            result = results.get_nowait()
+        except queue.Empty:
+            return
+        if isinstance(result, Exception):
+            raise result
+        print(f"Pipeline cycle complete ({sent:,} orders sent so far)\n")
 
-# Run silver and gold pipeline in background every 30 seconds
-is_pipeline_running = False
 
-def run_pipeline():
-    global is_pipeline_running
-    while True:
-        time.sleep(30)
-        print("\nPipeline starting - pausing orders...")
-        is_pipeline_running = True
-
-        subprocess.run([sys.executable, "../src/silver/silver_transformer.py"], check=True)
-        subprocess.run([sys.executable, "../src/gold/gold_aggregator.py"], check=True)
-
-        is_pipeline_running = False
-        print("Pipeline complete - resuming orders!\n")
-# Start pipeline thread in background
-pipeline_thread = threading.Thread(target=run_pipeline, daemon=True)
-pipeline_thread.start()
-
-producer = EventHubProducerClient.from_connection_string(
-    conn_str=connection_string,
-    eventhub_name=event_hub_name
-)
-
-print("Sending live orders to Event Hub...")
-
-while True:
-    if is_pipeline_running:
-        print("Waiting for pipeline...")
-        while is_pipeline_running:
-            time.sleep(1)
-        print("Resuming orders...")
-        continue
+# ORDERS
 
+def make_order():
     customer_state = random.choice(STATES)
     seller_state = random.choice(list(SELLERS.keys()))
     seller_id = random.choice(SELLERS[seller_state])
@@ -83,7 +78,7 @@ while True:
     estimated_delivery = purchase_time + timedelta(days=estimated_days)
     actual_delivery = purchase_time + timedelta(days=actual_days)
 
-    order = {
+    return {
         "order_id": str(uuid.uuid4()),
         "customer_id": str(uuid.uuid4()),
         "order_status": "delivered",
@@ -102,10 +97,45 @@ while True:
         "freight_value": freight
     }
 
-    event_json = json.dumps(order)
+def send_order(producer, order):
     event_data_batch = producer.create_batch()
-    event_data_batch.add(EventData(event_json))
+    event_data_batch.add(EventData(json.dumps(order)))
     producer.send_batch(event_data_batch)
 
-    print(f"Sent order: {order['order_id']} | {customer_state} | {category} | R$ {order['payment_value']}")
-    time.sleep(2)
\ No newline at end of file
+def send_orders(producer, stop, results):
+    sent = 0
+    while not stop.is_set():
+        order = make_order()
+        send_order(producer, order)
+        sent += 1
+        print(f"Sent order: {order['order_id']} | {order['customer_state']} | "
+              f"{order['product_category_name']} | R$ {order['payment_value']}")
+
+        check_pipeline(results, sent)
+        stop.wait(SEND_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    if EventHubProducerClient is None:
+        raise RuntimeError("send_orders.py needs the azure-eventhub package")
+
+    stop = threading.Event()
+    results = queue.Queue()
+    pipeline_thread = threading.Thread(target=run_pipeline, args=(stop, results), daemon=True)
+    pipeline_thread.start()
+
+    producer = EventHubProducerClient.from_connection_string(
+        conn_str=connection_string,
+        eventhub_name=event_hub_name
+    )
+
+    print("Sending live orders to Event Hub...")
+    try:
+        send_orders(producer, stop, results)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A cycle that is running finishes before the thread sees the Event
+        stop.set()
+        pipeline_thread.join()
+        producer.close()
@@ -1,15 +1,15 @@
 import time
-import subprocess
-import sys
+from src.pipeline.pipeline_runner import PipelineRunner
 
 print("Pipeline runner started - runs every 5 minutes")
 
-while True:
-    print("\nRunning silver transformer...")
-    subprocess.run([sys.executable, "src/silver/silver_transformer.py"], check=True)
+# One runner for the whole process: stages are imported once and
+# the reference tables and silver data stay in memory between cycles.
+runner = PipelineRunner()
 
-    print("Running gold aggregator...")
-    subprocess.run([sys.executable, "src/gold/gold_aggregator.py"], check=True)
+while True:
+    print("\nRunning pipeline cycle...")
+    runner.run_cycle()
 
     print("Pipeline complete - waiting 5 minutes...")
-    time.sleep(300)
\ No newline at end of file
+    time.sleep(300)
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.bronze.blob_store import DOWNLOAD_WORKERS
+
+# Attempts per blob before we give up, and the first wait between attempts (doubles each time).
+DOWNLOAD_RETRIES = int(os.getenv("BRONZE_DOWNLOAD_RETRIES", "3"))
+RETRY_BACKOFF_SECONDS = float(os.getenv("BRONZE_RETRY_BACKOFF_SECONDS", "0.5"))
+
+# READ WITH RETRY
+# Reads one blob. On failure waits backoff, 2*backoff, 4*backoff ... and tries again.
+# After the last attempt the error is raised, so the watermark is never moved past a missing blob.
+
+def read_with_retry(store, name, offset=0, retries=DOWNLOAD_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    for attempt in range(retries + 1):
+        try:
+            return store.read_blob(name, offset)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = backoff * 2 ** attempt
+            print(f"Download failed for {name} ({e}) - retrying in {wait:.1f}s")
+            time.sleep(wait)
+
+
+# DOWNLOAD BLOBS
+# Downloads many blobs with at most `workers` requests in flight.
+# `offsets` (optional, one per name) skips the bytes we already read from each blob.
+# Returns the contents as a list in the same order as `names`
+# and prints the throughput (blobs/s and MB/s).
+
+def download_blobs(store, names, offsets=None, workers=DOWNLOAD_WORKERS, retries=DOWNLOAD_RETRIES, backoff=RETRY_BACKOFF_SECONDS):
+    if not names:
+        return []
+
+    offsets = offsets or [0] * len(names)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(workers, len(names))) as pool:
+        contents = list(pool.map(
+            lambda name, offset: read_with_retry(store, name, offset, retries, backoff),
+            names, offsets
+        ))
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    total_bytes = sum(len(c) for c in contents)
+    print(
+        f"Downloaded {len(names):,} blobs ({total_bytes / 1e6:,.2f} MB) in {elapsed:.2f}s - "
+        f"{len(names) / elapsed:,.0f} blobs/s, {total_bytes / 1e6 / elapsed:,.2f} MB/s"
+    )
+    return contents
@@ -0,0 +1,105 @@
+import sys
+from pathlib import Path
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from azure.storage.blob import BlobServiceClient
+
+BRONZE_CONTAINER = "bronze"
+
+# Max parallel blob downloads, also the size of the HTTP connection pool.
+DOWNLOAD_WORKERS = int(os.getenv("BRONZE_DOWNLOAD_WORKERS", "16"))
+
+# One listed blob: its full name, size in bytes and last-modified time (UTC).
+BlobEntry = namedtuple("BlobEntry", ["name", "size", "last_modified"])
+
+# AZURE BLOB STORE
+# Thin wrapper around the bronze container in Azure Blob Storage.
+# Works the same against Azurite ("UseDevelopmentStorage=true").
+# All requests share one requests.Session whose pool holds pool_size connections,
+# so parallel downloads reuse open connections instead of opening new ones.
+
+class AzureBlobStore:
+    def __init__(self, connection_string, container=BRONZE_CONTAINER, pool_size=DOWNLOAD_WORKERS):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        blob_service_client = BlobServiceClient.from_connection_string(
+            connection_string,
+            transport=RequestsTransport(session=session)
+        )
+        self.container_client = blob_service_client.get_container_client(container)
+
+    def list_blobs(self, prefix):
+        for blob in self.container_client.list_blobs(name_starts_with=prefix):
+            yield BlobEntry(blob.name, blob.size, blob.last_modified)
+
+    def read_blob(self, name, offset=0):
+        # offset > 0 reads only the bytes appended after it (NDJSON append blobs)
+        return self.container_client.download_blob(name, offset=offset or None).readall()
+
+    def write_blob(self, name, data):
+        self.container_client.upload_blob(name=name, data=data, overwrite=True)
+
+    def delete_blob(self, name):
+        self.container_client.delete_blob(name)
+
+
+# LOCAL BLOB STORE
+# Same interface as AzureBlobStore, backed by a folder on disk.
+# Blob "orders/2026/03/18/abc.json" is the file <root>/orders/2026/03/18/abc.json.
+# Used for offline runs and tests (set BRONZE_LOCAL_DIR).
+
+class LocalBlobStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def list_blobs(self, prefix):
+        # Walk the deepest folder that the prefix fully names, then filter by the prefix
+        base = self.root / prefix.rsplit("/", 1)[0] if "/" in prefix else self.root
+        if not base.is_dir():
+            return
+        for path in sorted(base.rglob("*")):
+            if not path.is_file() or path.name.endswith(".tmp"):
+                continue
+            name = path.relative_to(self.root).as_posix()
+            if not name.startswith(prefix):
+                continue
+            stat = path.stat()
+            yield BlobEntry(name, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc))
+
+    def read_blob(self, name, offset=0):
+        with open(self.root / name, "rb") as f:
+            f.seek(offset)
+            return f.read()
+
+    def write_blob(self, name, data):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(data.encode("utf-8") if isinstance(data, str) else data)
+        os.replace(tmp_path, path)
+
+    def delete_blob(self, name):
+        (self.root / name).unlink()
+
+
+# OPEN STORE
+# BRONZE_LOCAL_DIR wins if it is set, otherwise we connect to Azure
+# with AZURE_STORAGE_CONNECTION_STRING.
+
+def open_bronze_store():
+    local_dir = os.getenv("BRONZE_LOCAL_DIR")
+    if local_dir:
+        return LocalBlobStore(local_dir)
+
+    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
+    if connection_string is None:
+        raise RuntimeError("Set AZURE_STORAGE_CONNECTION_STRING or BRONZE_LOCAL_DIR to read the bronze layer")
+    return AzureBlobStore(connection_string)
@@ -0,0 +1,141 @@
+import sys
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+from dotenv import load_dotenv
+from src.bronze.blob_store import open_bronze_store
+from src.bronze.blob_downloader import download_blobs
+from src.bronze.bronze_reader import (
+    BRONZE_DIR, ORDERS_PREFIX, PARTITION_LOOKBACK_DAYS,
+    manifest_name, normalize_bronze_orders, parse_order_ends, partition_prefix, read_manifest
+)
+
+load_dotenv(Path(__file__).resolve().parents[2] / "producer" / ".env")
+
+# Remembers the last day we compacted, so the next run only lists newer days
+STATE_PATH = BRONZE_DIR / "compactor.json"
+
+# BRONZE COMPACTOR
+# The function writes small JSON / NDJSON blobs under orders/YYYY/MM/DD/.
+# Reading thousands of them means thousands of HTTP requests and json.loads calls.
+# This job rolls every closed day into one parquet segment with the silver dtypes:
+#   compacted/orders/YYYY/MM/DD/segment-0000.parquet
+#   compacted/orders/YYYY/MM/DD/manifest.json   (which JSON blobs each segment holds)
+# bronze_reader.py reads the segments first and only the JSON blobs no segment holds.
+# A day is closed once it is older than the reader's lookback window.
+
+def load_state():
+    if not STATE_PATH.exists():
+        return {"compacted_until": None}
+    with open(STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    # Temp file + swap, so a crash never leaves half a state file
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATE_PATH.with_name(STATE_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+
+# DAYS TO COMPACT
+# First run: find the days from a full listing of orders/.
+# Next runs: every day after the last compacted one, up to the newest closed day.
+
+def days_to_compact(store, state, last_closed_day):
+    if state["compacted_until"] is None:
+        days = set()
+        for blob in store.list_blobs(ORDERS_PREFIX):
+            parts = blob.name.split("/")
+            if len(parts) == 5:
+                days.add(date(int(parts[1]), int(parts[2]), int(parts[3])))
+        return sorted(day for day in days if day <= last_closed_day)
+
+    start = date.fromisoformat(state["compacted_until"]) + timedelta(days=1)
+    return [start + timedelta(days=i) for i in range((last_closed_day - start).days + 1)]
+
+
+# COMPACT ONE DAY
+# Reads the event blobs of the day that no segment holds yet and writes them as a new segment.
+# Each row keeps the name of the blob it came from in "source_blob" and the byte offset
+# where it ends in that blob in "source_end", so the reader can skip exactly the rows it
+# already read from a blob before the day was compacted.
+# Running it twice on the same day only picks up blobs that arrived in between.
+
+def compact_day(store, day, delete_sources=False):
+    prefix = partition_prefix(day)
+    manifest_path = manifest_name(prefix)
+
+    existing = {blob.name for blob in store.list_blobs(manifest_path)}
+    manifest = read_manifest(store, manifest_path) if manifest_path in existing else {"segments": []}
+    done = {name for segment in manifest["segments"] for name in segment["sources"]}
+
+    sources = [
+        blob.name for blob in store.list_blobs(prefix)
+        if blob.name.endswith((".json", ".ndjson")) and blob.name not in done
+    ]
+    if not sources:
+        return 0
+
+    orders = []
+    source_of_row = []
+    end_of_row = []
+    for name, content in zip(sources, download_blobs(store, sources)):
+        blob_orders, ends = parse_order_ends(name, content)
+        orders.extend(blob_orders)
+        source_of_row.extend([name] * len(blob_orders))
+        end_of_row.extend(ends)
+    if not orders:
+        return 0
+
+    df = normalize_bronze_orders(pd.DataFrame(orders))
+    df["source_blob"] = pd.Categorical(source_of_row)
+    df["source_end"] = pd.array(end_of_row, dtype="int64")
+
+    segment_name = f"compacted/{prefix}segment-{len(manifest['segments']):04d}.parquet"
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    store.write_blob(segment_name, buffer.getvalue())
+
+    manifest["segments"].append({"name": segment_name, "rows": len(df), "sources": sources})
+    store.write_blob(manifest_path, json.dumps(manifest, indent=2))
+
+    if delete_sources:
+        for name in sources:
+            store.delete_blob(name)
+
+    print(f"Compacted {prefix}: {len(sources):,} blobs -> {segment_name}")
+    return len(sources)
+
+
+def compact_bronze(store=None, delete_sources=False, now=None):
+    store = store or open_bronze_store()
+    now = now or datetime.now(timezone.utc)
+    last_closed_day = now.date() - timedelta(days=PARTITION_LOOKBACK_DAYS + 1)
+
+    state = load_state()
+    total = 0
+    for day in days_to_compact(store, state, last_closed_day):
+        total += compact_day(store, day, delete_sources)
+        save_state({"compacted_until": day.isoformat()})
+
+    print(f"Compaction complete - {total:,} blobs compacted")
+    return total
+
+
+# MAIN
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll closed days of bronze JSON blobs into parquet segments")
+    parser.add_argument("--delete-sources", action="store_true", help="delete the JSON blobs once they are compacted")
+    args = parser.parse_args()
+
+    compact_bronze(delete_sources=args.delete_sources)
@@ -0,0 +1,265 @@
+import sys
+from pathlib import Path
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+from paths import OUT
+from src.bronze.blob_store import open_bronze_store
+from src.bronze.blob_downloader import download_blobs
+
+ORDERS_PREFIX = "orders/"
+# Compacted segments of a day live under compacted/orders/YYYY/MM/DD/ (see bronze_compactor.py)
+COMPACTED_PREFIX = "compacted/"
+MANIFEST_NAME = "manifest.json"
+BRONZE_DIR = OUT / "bronze"
+WATERMARK_PATH = BRONZE_DIR / "watermark.json"
+INGESTED_DIR = BRONZE_DIR / "ingested"
+
+# The function writes each event into orders/YYYY/MM/DD/ using its own clock,
+# so a blob can still show up in yesterday's partition right after midnight.
+# Every run re-lists this many days before the last scan to catch those.
+PARTITION_LOOKBACK_DAYS = 1
+
+# Local ingested files are merged into one once there are more than this.
+MAX_INGESTED_PARTS = 32
+
+BRONZE_DATE_COLUMNS = [
+    "order_purchase_timestamp",
+    "order_delivered_customer_date",
+    "order_delivered_carrier_date",
+    "order_estimated_delivery_date"
+]
+
+# Same dtypes the silver layer gives these columns when it reads the CSVs
+BRONZE_CATEGORY_COLUMNS = [
+    "order_status",
+    "customer_state",
+    "seller_state",
+    "product_category_name",
+    "payment_type"
+]
+
+# WATERMARK
+# The watermark remembers when we last scanned the bronze container and
+# how many bytes of each blob we already processed:
+# {"scanned_at": "2026-03-18T10:00:00+00:00", "blobs": {"orders/2026/03/18/abc.json": 412}}
+# Only the partitions that can still receive new blobs are kept in "blobs".
+
+def load_watermark(path=WATERMARK_PATH):
+    if not path.exists():
+        return {"scanned_at": None, "blobs": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_watermark(watermark, path=WATERMARK_PATH):
+    # Write to a temp file and swap it in, so a crash never leaves half a watermark
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(watermark, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# PARTITIONS TO SCAN
+# First run: list everything under orders/.
+# Next runs: list only the daily partitions from the last scan (minus the lookback) up to today.
+
+def partition_prefix(day):
+    return f"{ORDERS_PREFIX}{day:%Y/%m/%d}/"
+
+def partitions_to_scan(watermark, now):
+    if watermark["scanned_at"] is None:
+        return [ORDERS_PREFIX]
+
+    start = datetime.fromisoformat(watermark["scanned_at"]).date() - timedelta(days=PARTITION_LOOKBACK_DAYS)
+    days = (now.date() - start).days
+    return [partition_prefix(start + timedelta(days=i)) for i in range(days + 1)]
+
+
+def partition_of(name):
+    # "compacted/orders/2026/03/18/x" and "orders/2026/03/18/x" both belong to "orders/2026/03/18/"
+    return name.removeprefix(COMPACTED_PREFIX)
+
+
+# NORMALIZE
+# Bronze events carry timestamps as ISO strings with a UTC offset.
+# We turn them into naive UTC datetimes, like the CSV columns,
+# and give ids and low-cardinality columns the silver dtypes.
+
+def normalize_bronze_orders(df_blob):
+    df_blob["order_id"] = df_blob["order_id"].astype("string")
+    for col in BRONZE_DATE_COLUMNS:
+        if col in df_blob.columns:
+            df_blob[col] = pd.to_datetime(df_blob[col], utc=True, format="ISO8601").dt.tz_localize(None)
+    for col in BRONZE_CATEGORY_COLUMNS:
+        if col in df_blob.columns:
+            df_blob[col] = df_blob[col].astype("category")
+    return df_blob
+
+
+# PARSE BLOB
+# Two kinds of event blobs live under orders/:
+# - <uuid>.json      one order per blob (old function)
+# - <window>.ndjson  append blob, one order per line (batched function)
+# Append blobs keep growing, so we only parse complete lines and
+# return how many bytes we consumed; the next run reads from there.
+
+def parse_orders(name, content):
+    if not name.endswith(".ndjson"):
+        return [json.loads(content)], len(content)
+
+    complete = content[:content.rfind(b"\n") + 1]
+    return [json.loads(line) for line in complete.splitlines() if line.strip()], len(complete)
+
+# Same orders, with the byte offset where each one ends in the blob
+# (the compactor keeps it per row, see already_read below)
+def parse_order_ends(name, content):
+    if not name.endswith(".ndjson"):
+        return [json.loads(content)], [len(content)]
+
+    orders, ends = [], []
+    position = 0
+    for line in content[:content.rfind(b"\n") + 1].splitlines(keepends=True):
+        position += len(line)
+        if line.strip():
+            orders.append(json.loads(line))
+            ends.append(position)
+    return orders, ends
+
+
+# COMPACTED SEGMENTS
+# A day's manifest lists its parquet segments and the JSON blobs each one holds:
+# {"segments": [{"name": "compacted/orders/2026/03/18/segment-0000.parquet", "rows": 812, "sources": [...]}]}
+# Segments are written before the manifest, so a reader never sees a half-written segment.
+
+def manifest_name(prefix):
+    return f"{COMPACTED_PREFIX}{prefix}{MANIFEST_NAME}"
+
+def read_manifest(store, name):
+    return json.loads(store.read_blob(name))
+
+def read_segment(content):
+    return pd.read_parquet(io.BytesIO(content))
+
+# Segment rows we already ingested from their source blob before it was compacted.
+# Each row keeps the byte offset where it ends in its blob ("source_end"): a row is read
+# only if it ends within the bytes the watermark says we consumed, so the lines appended
+# to an NDJSON blob after our last read still come through the segment.
+# Segments written before "source_end" existed: any source blob we started reading counts as read.
+def already_read(df_segment, blobs):
+    sources = df_segment["source_blob"].astype("string")
+    if "source_end" not in df_segment.columns:
+        return sources.isin(list(blobs)).to_numpy()
+    consumed = sources.map(blobs).fillna(0).to_numpy(dtype="int64")
+    return df_segment["source_end"].to_numpy(dtype="int64") <= consumed
+
+
+# FETCH NEW ORDERS
+# Lists only the partitions that can hold new data and reads them in two steps:
+# 1. compacted segments we have not read yet - one parquet read per segment;
+#    rows we already ingested from the JSON blobs one by one are skipped
+# 2. stray JSON/NDJSON blobs that no segment holds and that grew since the watermark
+#    (only the new bytes, downloaded in parallel, see blob_downloader.py)
+# Returns a DataFrame with the new orders (or None) and the updated watermark.
+# The watermark is NOT saved here - the caller saves it once the orders are stored.
+
+def fetch_new_orders(store, watermark, now=None):
+    now = now or datetime.now(timezone.utc)
+    blobs = dict(watermark["blobs"])
+
+    frames = []
+    compacted_sources = set()
+    new_json_blobs = []
+    for prefix in partitions_to_scan(watermark, now):
+        compacted = {blob.name: blob for blob in store.list_blobs(COMPACTED_PREFIX + prefix)}
+        manifests = [name for name in compacted if name.endswith(MANIFEST_NAME)]
+
+        new_segments = []
+        for name in manifests:
+            for segment in read_manifest(store, name)["segments"]:
+                compacted_sources.update(segment["sources"])
+                blob = compacted.get(segment["name"])
+                if blob is not None and blob.size > blobs.get(blob.name, 0):
+                    new_segments.append(blob)
+
+        for blob, content in zip(new_segments, download_blobs(store, [b.name for b in new_segments])):
+            df_segment = read_segment(content)
+            keep = ~already_read(df_segment, blobs)
+            frames.append(df_segment[keep].drop(columns=["source_blob", "source_end"], errors="ignore"))
+            blobs[blob.name] = blob.size
+
+        for blob in store.list_blobs(prefix):
+            if blob.name in compacted_sources:
+                continue
+            if blob.size > blobs.get(blob.name, 0):
+                new_json_blobs.append(blob)
+
+    offsets = [blobs.get(blob.name, 0) for blob in new_json_blobs]
+    contents = download_blobs(store, [blob.name for blob in new_json_blobs], offsets)
+    orders = []
+    for blob, offset, content in zip(new_json_blobs, offsets, contents):
+        blob_orders, consumed = parse_orders(blob.name, content)
+        orders.extend(blob_orders)
+        blobs[blob.name] = offset + consumed
+    if orders:
+        frames.append(normalize_bronze_orders(pd.DataFrame(orders)))
+
+    # Forget blobs in partitions that the next run will not list anymore
+    oldest = partition_prefix(now.date() - timedelta(days=PARTITION_LOOKBACK_DAYS))
+    blobs = {name: size for name, size in blobs.items() if partition_of(name) >= oldest}
+
+    frames = [df for df in frames if len(df)]
+    df_new = pd.concat(frames, ignore_index=True) if frames else None
+    return df_new, {"scanned_at": now.isoformat(), "blobs": blobs}
+
+
+# LOCAL INGESTED COPY
+# Every order pulled from bronze is also kept locally as a small parquet file,
+# so a full silver rebuild does not need to download history again.
+
+def append_ingested(df_new):
+    INGESTED_DIR.mkdir(parents=True, exist_ok=True)
+    part_name = f"part-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.parquet"
+    df_new.to_parquet(INGESTED_DIR / part_name, index=False)
+
+    parts = sorted(INGESTED_DIR.glob("part-*.parquet"))
+    if len(parts) > MAX_INGESTED_PARTS:
+        # Merge all small files into one, keeping the name of the newest so sorting still works.
+        # The merged file replaces the newest part before the others are removed: a crash in
+        # between leaves duplicate orders (dropped by merge_blob_orders), never lost ones.
+        df_all = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        tmp_path = INGESTED_DIR / "compacted.tmp"
+        df_all.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parts[-1])
+        for p in parts[:-1]:
+            p.unlink()
+
+def load_ingested():
+    parts = sorted(INGESTED_DIR.glob("part-*.parquet")) if INGESTED_DIR.exists() else []
+    if not parts:
+        return None
+    return pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+
+
+# INGEST
+# One incremental bronze pass: fetch new orders, store them locally, then move the watermark.
+# If we crash before the watermark is saved, the next run re-reads the same blobs
+# and merge_blob_orders drops the duplicate order_ids.
+# Returns a DataFrame with only the new orders, or None.
+
+def ingest_new_orders(store=None):
+    store = store or open_bronze_store()
+    watermark = load_watermark()
+    df_new, new_watermark = fetch_new_orders(store, watermark)
+
+    if df_new is not None:
+        append_ingested(df_new)
+
+    save_watermark(new_watermark)
+    print(f"Bronze: {0 if df_new is None else len(df_new):,} new orders")
+    return df_new
@@ -1,33 +1,126 @@
 import sys
 from pathlib import Path
+import os
+import time
 
 # Add the root folder to the Python path so it can find paths.py
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+import numpy as np
 import pandas as pd
-from paths import OUT
+from src.silver.silver_store import read_silver, silver_schema
+from src.silver.silver_polars import BACKEND
+from src.gold import hll
+from src.gold.gold_store import save_gold
 
 # Load Silver Data
-# We are loading the silver parquet file 
+# We are loading the silver parquet dataset (all year/month partitions).
+# `columns` and `filters` are passed to read_silver, so only what is asked for is read.
 
-def load_silver():
-    silver_path = OUT / "silver" / "silver_orders.parquet"
-    df = pd.read_parquet(silver_path)
+def load_silver(columns=None, filters=None):
+    df = read_silver(columns=columns, filters=filters)
     print(f"Loaded silver: {df.shape[0]:,} rows x {df.shape[1]} columns")
     return df
 
+# Distinct Orders
+# Fast exact replacement for .agg(total_orders=("order_id", "nunique")).
+# Works on integers instead of strings: silver's order_key (factorized once in the
+# silver layer) and the group number of each row. Each (group, order) pair becomes one
+# int64, pd.unique drops the repeated pairs (hash table on int64, no sort), and bincount
+# counts what is left per group.
+# Returns one count per group, in the same order as the groupby result.
+
+def order_codes(df):
+    if "order_key" in df.columns:
+        return df["order_key"].to_numpy(dtype=np.int64)
+    # Silver written before order_key existed
+    return pd.factorize(df["order_id"])[0].astype(np.int64)
+
+def distinct_orders(grouped, df):
+    group_codes = grouped.ngroup().to_numpy(dtype=np.int64)
+    orders = order_codes(df)
+
+    valid = (group_codes >= 0) & (orders >= 0)
+    width = int(orders.max()) + 1 if valid.any() else 1
+    pairs = pd.unique(group_codes[valid] * width + orders[valid])
+    return np.bincount(pairs // width, minlength=grouped.ngroups)
+
+# Approximate Distinct Orders (opt-in)
+# GOLD_DISTINCT_MODE=hll counts distinct orders with HyperLogLog sketches (see hll.py)
+# instead of exactly. Every gold table then also stores the sketch of each group in an
+# "orders_sketch" column, so the dashboard can roll monthly cells up to yearly or
+# all-time counts without going back to silver.
+# GOLD_HLL_PRECISION sets the sketch size: 2**precision bytes per group, relative
+# error about 1.04 / sqrt(2**precision) (1.6% at the default of 12).
+
+DISTINCT_MODE = os.environ.get("GOLD_DISTINCT_MODE", "exact")
+HLL_PRECISION = hll.check_precision(int(os.environ.get("GOLD_HLL_PRECISION", hll.DEFAULT_PRECISION)))
+SKETCH_COLUMN = "orders_sketch"
+
+if DISTINCT_MODE not in ("exact", "hll"):
+    raise ValueError(f"GOLD_DISTINCT_MODE must be 'exact' or 'hll', got {DISTINCT_MODE!r}")
+
+# Group code of every row (-1 without an order) and the hash of its order. The sketches
+# hash the integer order_key, much cheaper than hashing the order_id strings; silver
+# written before order_key existed hashes order_id.
+def order_hashes(grouped, df):
+    if "order_key" in df.columns:
+        orders = df["order_key"].to_numpy(dtype=np.int64)
+        valid = orders >= 0
+    else:
+        orders = df["order_id"]
+        valid = orders.notna().to_numpy()
+    group_codes = np.where(valid, grouped.ngroup().to_numpy(dtype=np.int64), -1)
+    return group_codes, hll.hash_values(orders)
+
+# One sketch of the orders of each group, in the same order as the groupby result
+def order_sketches(grouped, df):
+    group_codes, hashes = order_hashes(grouped, df)
+    return hll.sketch_groups(group_codes, hashes, grouped.ngroups, HLL_PRECISION)
+
+# The same as sparse sketches (bytes per group, see hll.py), for tables with many small groups
+def order_sparse_sketches(grouped, df):
+    group_codes, hashes = order_hashes(grouped, df)
+    return hll.sparse_groups(group_codes, hashes, grouped.ngroups, HLL_PRECISION)
+
+# Inserts total_orders at `position` (and the sketches in hll mode)
+def insert_total_orders(result, position, grouped, df):
+    if DISTINCT_MODE == "hll":
+        registers = order_sketches(grouped, df)
+        result.insert(position, "total_orders", hll.count(registers))
+        result[SKETCH_COLUMN] = hll.to_bytes(registers)
+    else:
+        result.insert(position, "total_orders", distinct_orders(grouped, df))
+    return result
+
+# Group keys
+# A category key keeps every category of silver after the groupby, also the ones with
+# no row in this table. We keep only the values that appear, so a gold table looks the
+# same whether it was built from all of silver, from a filtered read or incrementally.
+
+def drop_unused_categories(result):
+    for col in result.columns:
+        if isinstance(result[col].dtype, pd.CategoricalDtype):
+            result[col] = result[col].cat.remove_unused_categories()
+    return result
+
 # Sales Overview
 # Group by year and month, count unique orders and sum revenue.
 
 def gold_sales_overview(df):
+    grouped = df.groupby(["order_year", "order_month"], observed=True)
     result = (
-        df.groupby(["order_year", "order_month"])
+        grouped
         .agg(
-            total_orders=("order_id", "nunique"),    # unique orders
             total_revenue=("payment_value", "sum")   # sum revenue
         )
         .reset_index()
     )
+    insert_total_orders(result, 2, grouped, df)  # unique orders
+    return finish_sales_overview(result)
+
+# Rounding and derived columns, shared with the incremental gold (gold_incremental.py)
+def finish_sales_overview(result):
     result["total_revenue"] = result["total_revenue"].round(2)
     result["avg_order_value"] = (result["total_revenue"] / result["total_orders"]).round(2)
 
@@ -40,7 +133,7 @@ def gold_delivery_performance(delivered_df):
     #Filter only delivered orders
 
     result = (
-        delivered_df.groupby(["order_year", "order_month"])
+        delivered_df.groupby(["order_year", "order_month"], observed=True)
         .agg(
             avg_fulfillment_days=("fulfillment_days", "mean"),
             avg_shipping_days=("shipping_days", "mean"),
@@ -49,8 +142,12 @@ def gold_delivery_performance(delivered_df):
         .reset_index()
     )
 
-    result["avg_fulfillment_days"] = result["avg_fulfillment_days"].round(1)
-    result["avg_shipping_days"]    = result["avg_shipping_days"].round(1)
+    return finish_delivery_performance(result)
+
+def finish_delivery_performance(result):
+    # Day counts are nullable Int16 in silver, so their means come back as Float64
+    result["avg_fulfillment_days"] = result["avg_fulfillment_days"].astype("float64").round(1)
+    result["avg_shipping_days"]    = result["avg_shipping_days"].astype("float64").round(1)
     result["on_time_rate"]         = (result["on_time_rate"] * 100).round(1)
 
     return result
@@ -63,15 +160,20 @@ def gold_top_categories(df):
     # We remove nan values from the product_category_name
     categories_df = df.dropna(subset=["product_category_name"])
 
+    grouped = categories_df.groupby("product_category_name", observed=True)
     result = (
-        categories_df.groupby("product_category_name")
+        grouped
         .agg(
-            total_orders=("order_id", "nunique"),   # unique orders
             total_revenue=("payment_value", "sum")  # total revenue
         )
         .reset_index()
     )
+    insert_total_orders(result, 1, grouped, categories_df)  # unique orders
 
+    return finish_top_categories(result)
+
+def finish_top_categories(result):
+    result = drop_unused_categories(result)
     result["total_revenue"] = result["total_revenue"].round(2)
     result = result.sort_values("total_revenue", ascending=False).reset_index(drop=True) #Sorting
 
@@ -83,19 +185,24 @@ def gold_top_categories(df):
 
 def gold_seller_performance(delivered_df):
 
+    grouped = delivered_df.groupby(["seller_id", "seller_state"], observed=True)
     result = (
-        delivered_df.groupby(["seller_id", "seller_state"])
+        grouped
         .agg(
-            total_orders=("order_id", "nunique"),          # unique orders
             total_revenue=("payment_value", "sum"),        # total revenue
             avg_fulfillment_days=("fulfillment_days", "mean"),  # avg fulfillment days
             on_time_rate=("on_time", "mean")               # on-time delivery rate
         )
         .reset_index()
     )
+    insert_total_orders(result, 2, grouped, delivered_df)  # unique orders
+
+    return finish_seller_performance(result)
 
+def finish_seller_performance(result):
+    result = drop_unused_categories(result)
     result["total_revenue"]         = result["total_revenue"].round(2)
-    result["avg_fulfillment_days"]  = result["avg_fulfillment_days"].round(1)
+    result["avg_fulfillment_days"]  = result["avg_fulfillment_days"].astype("float64").round(1)
     result["on_time_rate"]          = (result["on_time_rate"] * 100).round(1)
 
     # Sorting by highest revenue first
@@ -108,15 +215,20 @@ def gold_seller_performance(delivered_df):
 # Count total orders and revenue by customer state.
 
 def gold_customer_geography(df):
+    grouped = df.groupby("customer_state", observed=True)
     result = (
-        df.groupby("customer_state")
+        grouped
         .agg(
-            total_orders=("order_id", "nunique"),   # unique orders by state
             total_revenue=("payment_value", "sum")  # total revenue
         )
         .reset_index()
     )
+    insert_total_orders(result, 1, grouped, df)  # unique orders by state
+
+    return finish_customer_geography(result)
 
+def finish_customer_geography(result):
+    result = drop_unused_categories(result)
     result["total_revenue"] = result["total_revenue"].round(2)
 
     # Sorting by highest orders first
@@ -125,35 +237,150 @@ def gold_customer_geography(df):
     return result
 
 
-# SAVE
-# Saving each gold dataset as a separate parquet file in the "gold" folder.
-# It creates the "gold" folder if it doesn't exist and saves each DataFrame with a descriptive name.
+# Order Cube
+# Additive measures per (year, month, category, seller state, customer state) cell, so the
+# dashboard can answer any date range and drill-down by summing the selected cells
+# instead of going back to silver:
+# - total_revenue                      sum of payment_value
+# - <measure>_sum, <measure>_count     fulfillment days, shipping days and on-time flag of
+#                                      delivered rows (average = sum of sums / sum of counts)
+# - orders_sparse_sketch               sparse HyperLogLog sketch of the cell's orders, so
+#                                      distinct orders of any set of cells are a merge away
+#                                      (an order with items in two cells is counted once)
+# - total_orders                       the cell's estimate from its sketch
+# Rows without a category are kept under "unknown", so the cube adds up to the sales totals.
+# The sketches are always kept, whatever GOLD_DISTINCT_MODE is; GOLD_HLL_PRECISION sets their precision.
+
+CUBE_KEYS = ["order_year", "order_month", "product_category_name", "seller_state", "customer_state"]
+CUBE_SKETCH_COLUMN = "orders_sparse_sketch"
+UNKNOWN_KEY = "unknown"
+
+def fill_missing_key(values):
+    if not values.isna().any():
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype) and UNKNOWN_KEY not in values.cat.categories:
+        values = values.cat.add_categories(UNKNOWN_KEY)
+    return values.fillna(UNKNOWN_KEY)
+
+# Cube keys filled, and the delivery measures of delivered rows only (null elsewhere)
+def cube_rows(df):
+    delivered = df["order_status"].eq("delivered").to_numpy(dtype=bool, na_value=False)
+    return df.assign(
+        **{key: fill_missing_key(df[key]) for key in CUBE_KEYS},
+        delivered_fulfillment_days=df["fulfillment_days"].where(delivered),
+        delivered_shipping_days=df["shipping_days"].where(delivered),
+        delivered_on_time=df["on_time"].astype("float64").where(delivered)
+    )
+
+def gold_order_cube(df):
+    cube_df = cube_rows(df)
+    grouped = cube_df.groupby(CUBE_KEYS, observed=True)
+    result = (
+        grouped
+        .agg(
+            total_revenue=("payment_value", "sum"),
+            fulfillment_days_sum=("delivered_fulfillment_days", "sum"),
+            fulfillment_days_count=("delivered_fulfillment_days", "count"),
+            shipping_days_sum=("delivered_shipping_days", "sum"),
+            shipping_days_count=("delivered_shipping_days", "count"),
+            on_time_sum=("delivered_on_time", "sum"),
+            on_time_count=("delivered_on_time", "count")
+        )
+        .reset_index()
+    )
+    sketches = order_sparse_sketches(grouped, cube_df)
+    result.insert(len(CUBE_KEYS), "total_orders", hll.count_sparse(sketches))
+    result[CUBE_SKETCH_COLUMN] = sketches
+
+    return finish_order_cube(result)
 
-def save_gold(datasets: dict):
-    gold_dir = OUT / "gold"
-    gold_dir.mkdir(exist_ok=True)  # File creation if it doesn't exist
+def finish_order_cube(result):
+    result = drop_unused_categories(result)
+    result["total_revenue"] = result["total_revenue"].round(2)
+    for measure in ["fulfillment_days", "shipping_days", "on_time"]:
+        result[f"{measure}_sum"]   = result[f"{measure}_sum"].astype("int64")
+        result[f"{measure}_count"] = result[f"{measure}_count"].astype("int64")
 
-    for name, df in datasets.items():
-        output_path = gold_dir / f"{name}.parquet"
-        df.to_parquet(output_path, index=False)
-        print(f"Saved: {output_path} — {df.shape[0]:,} rows x {df.shape[1]} columns")
+    result = result.sort_values(CUBE_KEYS).reset_index(drop=True)
+
+    return result
+
+
+# SAVE
+# Each save publishes a new version of all gold tables in out/gold/versions/<version>/
+# and swaps out/gold/manifest.json to it (see src/gold/gold_store.py).
+
+# Gold tables
+# Every gold dataset with the function that builds it and the rows it needs:
+# "silver" (all rows) or "delivered" (only delivered orders).
+
+GOLD_TABLES = {
+    "gold_sales_overview":       (gold_sales_overview, "silver"),
+    "gold_delivery_performance": (gold_delivery_performance, "delivered"),
+    "gold_top_categories":       (gold_top_categories, "silver"),
+    "gold_seller_performance":   (gold_seller_performance, "delivered"),
+    "gold_customer_geography":   (gold_customer_geography, "silver"),
+    "gold_order_cube":           (gold_order_cube, "silver")
+}
+
+def delivered_orders(df):
+    return df[df["order_status"].eq("delivered")]
+
+# Silver columns each gold table uses. "order_id" stands for the column distinct orders
+# are counted on (see silver_columns).
+GOLD_COLUMNS = {
+    "gold_sales_overview":       ["order_year", "order_month", "order_id", "payment_value"],
+    "gold_delivery_performance": ["order_year", "order_month", "fulfillment_days", "shipping_days", "on_time"],
+    "gold_top_categories":       ["product_category_name", "order_id", "payment_value"],
+    "gold_seller_performance":   ["seller_id", "seller_state", "order_id", "payment_value", "fulfillment_days", "on_time"],
+    "gold_customer_geography":   ["customer_state", "order_id", "payment_value"],
+    "gold_order_cube":           CUBE_KEYS + ["order_id", "payment_value", "order_status", "fulfillment_days", "shipping_days", "on_time"]
+}
+
+# The "delivered" rows are filtered while reading: silver is sorted by order_status inside
+# each month, so the row groups without delivered orders are skipped.
+DELIVERED_FILTER = [("order_status", "==", "delivered")]
+
+# Exact counts and sketches only need the integer order_key (silver written before
+# order_key existed: order_id).
+def silver_columns(name, available):
+    order_column = "order_key" if "order_key" in available else "order_id"
+    return [order_column if col == "order_id" else col for col in GOLD_COLUMNS[name]]
+
+# Build
+# Builds all gold datasets from a silver DataFrame (read from disk or handed over in memory).
+
+def build_gold(df):
+    inputs = {"silver": df, "delivered": delivered_orders(df)}
+    return {name: fn(inputs[source]) for name, (fn, source) in GOLD_TABLES.items()}
+
+# Builds all gold datasets straight from the silver dataset on disk, one table at a time.
+# Each table reads only its own columns (and only delivered rows where it needs them),
+# so the memory peak is one table's slice of silver instead of all of it.
+
+def build_gold_from_dataset():
+    if BACKEND == "polars":
+        # Imported here: gold_polars builds on this module
+        from src.gold.gold_polars import build_gold_polars
+        return build_gold_polars()
+
+    available = silver_schema().names
+    datasets = {}
+    for name, (fn, source) in GOLD_TABLES.items():
+        filters = DELIVERED_FILTER if source == "delivered" else None
+        df = load_silver(columns=silver_columns(name, available), filters=filters)
+        datasets[name] = fn(df)
+        del df
+    return datasets
 
 # Main
 
 if __name__ == "__main__":
-    print("Loading silver...")
-    df = load_silver()
-    delivered_df = df[df["order_status"].eq("delivered")]
-
     print("Building gold datasets...")
-    datasets = {
-        "gold_sales_overview":       gold_sales_overview(df),
-        "gold_delivery_performance": gold_delivery_performance(delivered_df),
-        "gold_top_categories":       gold_top_categories(df),
-        "gold_seller_performance":   gold_seller_performance(delivered_df),
-        "gold_customer_geography":   gold_customer_geography(df)
-    }
+    start = time.perf_counter()
+    datasets = build_gold_from_dataset()
+    build_seconds = time.perf_counter() - start
 
     print("Saving...")
-    save_gold(datasets)
+    save_gold(datasets, build_seconds)
     print("Gold layer complete!")
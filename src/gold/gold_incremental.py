@@ -0,0 +1,418 @@
+import sys
+from pathlib import Path
+import json
+import os
+import uuid
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+from paths import OUT
+from src.silver.silver_store import silver_fingerprint
+from src.gold import hll
+from src.gold.gold_aggregator import (
+    CUBE_KEYS, CUBE_SKETCH_COLUMN, DISTINCT_MODE, HLL_PRECISION, SKETCH_COLUMN, cube_rows,
+    finish_customer_geography, finish_delivery_performance, finish_order_cube,
+    finish_sales_overview, finish_seller_performance, finish_top_categories,
+    order_sketches, order_sparse_sketches
+)
+
+# INCREMENTAL GOLD
+# Instead of re-running groupby over all of silver every cycle, each gold table keeps
+# mergeable partial aggregates per group and folds only the new silver rows into them:
+# - sums                      ("sum")
+# - counts of non-nulls       ("count")
+# - sum + count of non-nulls  ("mean" = sum / count)
+# - the (group, order_key) pairs seen so far ("nunique" = number of pairs per group,
+#   see SEEN PAIRS below)
+# - a sparse HyperLogLog sketch of order_key ("sketch", kept in the output, see hll.py)
+# Orders are identified by silver's integer order_key (-1 = no order), never by the
+# order_id strings.
+# Sums and counts of two batches simply add up; for distinct orders only the pairs
+# not seen before add to the count, and sketches merge. A typical cycle only touches
+# the current month's row of gold_sales_overview and gold_delivery_performance.
+# With GOLD_DISTINCT_MODE=hll the set of pairs is replaced by one HyperLogLog sketch
+# per group (fixed size, merged with an element-wise max, see hll.py).
+#
+# The output is rebuilt from the partial aggregates (one row per group, no silver scan)
+# and finished with the same rounding and sorting as gold_aggregator.py.
+#
+# State is kept in memory and written to out/gold_state/ after each change, together with
+# the silver fingerprint it covers (see BUILD INFO in silver_store.py).
+
+STATE_DIR = OUT / "gold_state"
+
+# name -> keys, rows it needs ("silver"/"delivered"), output columns in gold order
+# as (column, aggregation, silver column), the finishing function, and optionally a
+# "prepare" function that derives the columns it aggregates from the silver rows
+INCREMENTAL_TABLES = {
+    "gold_sales_overview": {
+        "keys": ["order_year", "order_month"],
+        "source": "silver",
+        "columns": [("total_orders", "nunique", "order_key"), ("total_revenue", "sum", "payment_value")],
+        "finish": finish_sales_overview
+    },
+    "gold_delivery_performance": {
+        "keys": ["order_year", "order_month"],
+        "source": "delivered",
+        "columns": [
+            ("avg_fulfillment_days", "mean", "fulfillment_days"),
+            ("avg_shipping_days", "mean", "shipping_days"),
+            ("on_time_rate", "mean", "on_time")
+        ],
+        "finish": finish_delivery_performance
+    },
+    "gold_top_categories": {
+        "keys": ["product_category_name"],
+        "source": "silver",
+        "columns": [("total_orders", "nunique", "order_key"), ("total_revenue", "sum", "payment_value")],
+        "finish": finish_top_categories
+    },
+    "gold_seller_performance": {
+        "keys": ["seller_id", "seller_state"],
+        "source": "delivered",
+        "columns": [
+            ("total_orders", "nunique", "order_key"),
+            ("total_revenue", "sum", "payment_value"),
+            ("avg_fulfillment_days", "mean", "fulfillment_days"),
+            ("on_time_rate", "mean", "on_time")
+        ],
+        "finish": finish_seller_performance
+    },
+    "gold_customer_geography": {
+        "keys": ["customer_state"],
+        "source": "silver",
+        "columns": [("total_orders", "nunique", "order_key"), ("total_revenue", "sum", "payment_value")],
+        "finish": finish_customer_geography
+    },
+    "gold_order_cube": {
+        "keys": CUBE_KEYS,
+        "source": "silver",
+        "prepare": cube_rows,
+        "columns": [
+            ("total_orders", "sketch", "order_key"),
+            ("total_revenue", "sum", "payment_value"),
+            ("fulfillment_days_sum", "sum", "delivered_fulfillment_days"),
+            ("fulfillment_days_count", "count", "delivered_fulfillment_days"),
+            ("shipping_days_sum", "sum", "delivered_shipping_days"),
+            ("shipping_days_count", "count", "delivered_shipping_days"),
+            ("on_time_sum", "sum", "delivered_on_time"),
+            ("on_time_count", "count", "delivered_on_time")
+        ],
+        "finish": finish_order_cube
+    }
+}
+
+
+# SEEN PAIRS
+# Exact distinct orders need every (group, order) pair seen so far, to count only the
+# new ones. Each pair is one int64, group id << 32 | order_key (group id = position of
+# the group in `groups`, in order of first appearance), kept in a few sorted runs:
+# - a batch's pairs are checked against every run with a binary search (searchsorted),
+#   so the check costs about the batch size times log(history), not the history
+# - the new pairs become a run; the last runs are merged while the one before is at
+#   most RUN_MERGE_FACTOR times larger, so there are about log2(history) runs and a
+#   pair is merged about log2(history) times in total
+# On disk every run is a parquet file in out/gold_state/<name>_pairs/, written once: a
+# save only writes the runs created (or merged) since the last save, and the files
+# no run uses anymore are removed after the state metadata lists the new ones.
+
+RUN_MERGE_FACTOR = 2
+
+class SeenPairs:
+    def __init__(self, keys):
+        self.keys = keys
+        self.groups = None       # group keys (Index or MultiIndex), position = group id
+        self.groups_file = None  # file holding `groups`, None when it changed since the last save
+        self.runs = []           # [sorted int64 pairs, file name or None when not saved yet]
+
+    def group_index(self, frame):
+        if len(self.keys) == 1:
+            return pd.Index(frame[self.keys[0]], name=self.keys[0])
+        return pd.MultiIndex.from_frame(frame[self.keys])
+
+    def group_ids(self, frame):
+        index = self.group_index(frame)
+        ids = self.groups.get_indexer(index) if self.groups is not None else np.full(len(index), -1)
+        missing = ids < 0
+        if missing.any():
+            added = index[missing].unique()
+            self.groups = added if self.groups is None else self.groups.append(added)
+            self.groups_file = None
+            ids[missing] = self.groups.get_indexer(index[missing])
+        return ids.astype(np.int64)
+
+    def contains(self, pairs):
+        seen = np.zeros(len(pairs), dtype=bool)
+        for run, _ in self.runs:
+            position = np.minimum(np.searchsorted(run, pairs), len(run) - 1)
+            seen |= run[position] == pairs
+        return seen
+
+    def add(self, pairs):
+        self.runs.append([pairs, None])
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= RUN_MERGE_FACTOR * len(self.runs[-1][0]):
+            last, _ = self.runs.pop()
+            self.runs[-1] = [np.sort(np.concatenate([self.runs[-1][0], last]), kind="stable"), None]
+
+    # Number of pairs per group that were not seen before (and remembers them)
+    def new_counts(self, df, source):
+        orders = df[source].to_numpy(dtype=np.int64, na_value=-1)
+        valid = (orders >= 0) & df[self.keys].notna().all(axis=1).to_numpy()
+        if not valid.any():
+            return pd.Series(dtype="int64")
+        ids = self.group_ids(df.loc[valid, self.keys])
+        pairs = np.unique((ids << 32) | orders[valid])
+        new = pairs[~self.contains(pairs)]
+        if len(new):
+            self.add(new)
+
+        counts = np.bincount(new >> 32, minlength=len(self.groups))
+        present = np.flatnonzero(counts)
+        return pd.Series(counts[present], index=self.groups[present])
+
+    # SAVE / LOAD
+    # save() returns the files of the current pairs ({"groups": ..., "runs": [...]}) for the
+    # state metadata; remove_unused() runs once the metadata lists them.
+
+    def save(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.groups is not None and self.groups_file is None:
+            self.groups_file = f"groups-{uuid.uuid4().hex}.parquet"
+            self.groups.to_frame(index=False).to_parquet(directory / self.groups_file, index=False)
+        for run in self.runs:
+            if run[1] is None:
+                run[1] = f"run-{uuid.uuid4().hex}.parquet"
+                pd.DataFrame({"pair": run[0]}).to_parquet(directory / run[1], index=False)
+        return {"groups": self.groups_file, "runs": [name for _, name in self.runs]}
+
+    def remove_unused(self, directory):
+        used = {self.groups_file} | {name for _, name in self.runs}
+        for path in directory.glob("*.parquet"):
+            if path.name not in used:
+                path.unlink()
+
+    def load(self, directory, files):
+        if files["groups"] is not None:
+            self.groups = self.group_index(pd.read_parquet(directory / files["groups"]))
+            self.groups_file = files["groups"]
+        self.runs = [
+            [pd.read_parquet(directory / name)["pair"].to_numpy(dtype=np.int64), name]
+            for name in files["runs"]
+        ]
+
+
+class IncrementalGoldTable:
+    def __init__(self, name):
+        self.name = name
+        self.spec = INCREMENTAL_TABLES[name]
+        self.keys = self.spec["keys"]
+        self.state = None        # partial aggregates, indexed by the group keys
+        self.pairs = SeenPairs(self.keys)  # exact mode: seen (group, order_key) pairs
+        self.sketches = {}       # hll mode and "sketch" columns: column -> {group key: registers / sparse bytes}
+        self.key_dtypes = {}
+        self.rows = 0            # silver rows folded in so far
+
+    # PARTIAL AGGREGATES
+    # sum -> <col>_sum, count -> <col>_count, mean -> <col>_sum + <col>_count,
+    # nunique -> <col>_distinct, sketch -> self.sketches.
+    # Group keys stay plain values (not categories) so partial results from different
+    # batches line up.
+
+    def partial(self, df):
+        if "prepare" in self.spec:
+            df = self.spec["prepare"](df)
+        df = df.dropna(subset=self.keys)
+        keys = {k: df[k].astype(object) if isinstance(df[k].dtype, pd.CategoricalDtype) else df[k] for k in self.keys}
+        grouped = df.groupby([keys[k] for k in self.keys])
+
+        parts = {}
+        for column, aggregation, source in self.spec["columns"]:
+            if aggregation == "sum":
+                parts[f"{column}_sum"] = grouped[source].sum()
+            elif aggregation == "count":
+                parts[f"{column}_count"] = grouped[source].count()
+            elif aggregation == "mean":
+                parts[f"{column}_sum"] = grouped[source].sum()
+                parts[f"{column}_count"] = grouped[source].count()
+        partial = pd.DataFrame(parts)
+
+        for column, aggregation, source in self.spec["columns"]:
+            if aggregation == "sketch":
+                self.merge_sketches(column, partial.index, order_sparse_sketches(grouped, df))
+            if aggregation != "nunique":
+                continue
+            if DISTINCT_MODE == "hll":
+                self.merge_sketches(column, partial.index, order_sketches(grouped, df))
+            else:
+                partial[f"{column}_distinct"] = self.new_distinct(df, source).reindex(partial.index, fill_value=0)
+        return partial
+
+    def new_distinct(self, df, source):
+        # Number of (group, order) pairs per group that were not seen before
+        return self.pairs.new_counts(df, source)
+
+    def merge_sketches(self, column, index, registers):
+        merge = hll.merge_sparse if self.aggregation(column) == "sketch" else hll.merge
+        sketches = self.sketches.setdefault(column, {})
+        for key, row in zip(index, registers):
+            sketches[key] = row if key not in sketches else merge(sketches[key], row)
+
+    def aggregation(self, column):
+        return next(aggregation for name, aggregation, _ in self.spec["columns"] if name == column)
+
+    def aggregations(self):
+        return {aggregation for _, aggregation, _ in self.spec["columns"]}
+
+    # REBUILD / FOLD
+
+    def rebuild(self, df):
+        self.pairs = SeenPairs(self.keys)
+        self.sketches = {}
+        self.key_dtypes = {k: df[k].dtype for k in self.keys}
+        self.state = self.partial(df)
+        self.rows = len(df)
+
+    def fold(self, df_new):
+        if self.state is None:
+            raise RuntimeError(f"{self.name}: rebuild the state from silver before folding new rows")
+        if df_new.empty:
+            return
+        partial = self.partial(df_new)
+        self.state = pd.concat([self.state, partial]).fillna(0).groupby(level=list(range(len(self.keys)))).sum()
+        self.rows += len(df_new)
+
+    # UPDATE
+    # Called by the pipeline with the full silver and the rows new since the last call
+    # (delta is None after a full silver build or on start). A saved state is reused only
+    # if it was saved for the current silver fingerprint: a full build or rows written
+    # after the last save change the fingerprint, and the state is rebuilt from `df`.
+
+    def update(self, df, delta):
+        if delta is not None and self.state is not None:
+            self.fold(delta)
+        elif not (self.load() and self.rows == len(df)):
+            self.rebuild(df)
+        self.save()
+        return self.emit()
+
+    # EMIT
+    # Builds the gold table from the partial aggregates.
+
+    def emit(self):
+        state = self.state.sort_index()
+        result = pd.DataFrame(index=state.index)
+        registers = None
+        sparse = None
+        for column, aggregation, source in self.spec["columns"]:
+            if aggregation == "sum":
+                result[column] = state[f"{column}_sum"]
+            elif aggregation == "count":
+                result[column] = state[f"{column}_count"]
+            elif aggregation == "sketch":
+                sparse = [self.sketches[column][key] for key in state.index]
+                result[column] = hll.count_sparse(sparse)
+            elif aggregation == "mean":
+                result[column] = state[f"{column}_sum"] / state[f"{column}_count"]
+            elif DISTINCT_MODE == "hll":
+                registers = np.stack([self.sketches[column][key] for key in state.index])
+                result[column] = hll.count(registers)
+            else:
+                result[column] = state[f"{column}_distinct"].astype("int64")
+        result = result.reset_index()
+        result.columns = self.keys + [column for column, _, _ in self.spec["columns"]]
+        if registers is not None:
+            result[SKETCH_COLUMN] = hll.to_bytes(registers)
+        if sparse is not None:
+            result[CUBE_SKETCH_COLUMN] = sparse
+
+        for key, dtype in self.key_dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                result[key] = result[key].astype("category")
+            else:
+                result[key] = result[key].astype(dtype)
+        return self.spec["finish"](result)
+
+    # SAVE / LOAD
+    #   out/gold_state/<name>.parquet         partial aggregates
+    #   out/gold_state/<name>_pairs/          seen (group, order_key) pairs (exact mode, see SEEN PAIRS)
+    #   out/gold_state/<name>_sketches.parquet  sketch per (column, group) (hll mode, "sketch" columns)
+    #   out/gold_state/<name>.json            number of silver rows folded in, distinct mode,
+    #                                         silver fingerprint
+
+    def save(self):
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        self.state.reset_index().to_parquet(STATE_DIR / f"{self.name}.parquet", index=False)
+        if self.has_sketches():
+            self.sketch_frame().to_parquet(STATE_DIR / f"{self.name}_sketches.parquet", index=False)
+        pair_files = self.pairs.save(self.pairs_dir()) if self.has_order_pairs() else None
+
+        meta_path = STATE_DIR / f"{self.name}.json"
+        tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "rows": self.rows,
+                "key_dtypes": {k: str(v) for k, v in self.key_dtypes.items()},
+                "distinct_mode": self.distinct_mode(),
+                "silver": silver_fingerprint(),
+                "pairs": pair_files
+            }, f)
+        os.replace(tmp_path, meta_path)
+        if pair_files is not None:
+            self.pairs.remove_unused(self.pairs_dir())
+
+    def pairs_dir(self):
+        return STATE_DIR / f"{self.name}_pairs"
+
+    # "exact" or "hll-<precision>" ("sparse-<precision>" for tables with sketch columns),
+    # plus the column orders are identified by: a saved state is only reused in the same mode
+    def distinct_mode(self):
+        if "sketch" in self.aggregations():
+            mode = f"sparse-{HLL_PRECISION}"
+        else:
+            mode = f"hll-{HLL_PRECISION}" if DISTINCT_MODE == "hll" else "exact"
+        return f"{mode}:order_key"
+
+    def has_sketches(self):
+        return "sketch" in self.aggregations() or (DISTINCT_MODE == "hll" and "nunique" in self.aggregations())
+
+    def has_order_pairs(self):
+        return DISTINCT_MODE == "exact" and "nunique" in self.aggregations()
+
+    def sketch_frame(self):
+        rows = [
+            (*(key if isinstance(key, tuple) else (key,)), column, registers if isinstance(registers, bytes) else registers.tobytes())
+            for column, sketches in self.sketches.items()
+            for key, registers in sketches.items()
+        ]
+        return pd.DataFrame(rows, columns=self.keys + ["column", "sketch"], dtype=object)
+
+    def load(self):
+        # Returns False when there is no saved state for the current silver
+        meta_path = STATE_DIR / f"{self.name}.json"
+        if not meta_path.exists():
+            return False
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("distinct_mode", "exact") != self.distinct_mode():
+            return False
+        fingerprint = silver_fingerprint()
+        if fingerprint is None or meta.get("silver") != fingerprint:
+            return False
+        if self.has_order_pairs() and meta.get("pairs") is None:
+            return False
+        self.rows = meta["rows"]
+        self.key_dtypes = {k: pd.api.types.pandas_dtype(v) for k, v in meta["key_dtypes"].items()}
+        self.state = pd.read_parquet(STATE_DIR / f"{self.name}.parquet").set_index(self.keys)
+        if self.has_sketches():
+            self.sketches = {}
+            frame = pd.read_parquet(STATE_DIR / f"{self.name}_sketches.parquet")
+            for column, group in frame.groupby("column"):
+                index = group.set_index(self.keys).index
+                sketches = list(group["sketch"]) if self.aggregation(column) == "sketch" else hll.from_bytes(group["sketch"])
+                self.merge_sketches(column, index, sketches)
+        if self.has_order_pairs():
+            self.pairs = SeenPairs(self.keys)
+            self.pairs.load(self.pairs_dir(), meta["pairs"])
+        return True
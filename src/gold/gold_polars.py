@@ -0,0 +1,118 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+import pyarrow as pa
+from src.silver.silver_polars import pl, require_polars
+from src.silver.silver_store import SILVER_DIR, silver_schema
+from src.gold.gold_aggregator import DISTINCT_MODE, GOLD_TABLES, load_silver, silver_columns
+from src.gold.gold_incremental import INCREMENTAL_TABLES
+
+# POLARS GOLD
+# The gold tables as lazy Polars queries (PIPELINE_BACKEND=polars, see
+# src/silver/silver_polars.py). The queries are collected together with
+# pl.collect_all, so the tables are built in parallel and each query runs
+# multi-threaded. Reading from disk, Polars scans the silver dataset and reads
+# only the columns and months each query needs.
+#
+# The table layouts come from INCREMENTAL_TABLES (gold_incremental.py): group keys,
+# and (column, aggregation, silver column) per output column. Polars only does the
+# heavy part (filter + group by); the small aggregated tables go back to pandas,
+# get the key dtypes and row order the pandas groupby produces, and are finished
+# with the same rounding and sorting functions as gold_aggregator.py.
+# Tables with sparse sketch columns (the order cube) have no Polars counterpart
+# and are built with their pandas function.
+
+def distinct_expr(order_column):
+    order = pl.col(order_column)
+    # order_key is -1 for rows without an order_id, order_id is null
+    order = order.filter(order >= 0) if order_column == "order_key" else order.drop_nulls()
+    return order.n_unique()
+
+PANDAS_TABLES = [
+    name for name, spec in INCREMENTAL_TABLES.items()
+    if any(aggregation == "sketch" for _, aggregation, _ in spec["columns"])
+]
+POLARS_TABLES = [name for name in INCREMENTAL_TABLES if name not in PANDAS_TABLES]
+
+def table_query(source, name, order_column):
+    spec = INCREMENTAL_TABLES[name]
+    query = source
+    if spec["source"] == "delivered":
+        query = query.filter(pl.col("order_status").cast(pl.String) == "delivered")
+    # pandas' groupby drops rows with a missing key
+    query = query.filter(pl.all_horizontal([pl.col(key).is_not_null() for key in spec["keys"]]))
+
+    aggregations = []
+    for column, aggregation, source_column in spec["columns"]:
+        if aggregation == "sum":
+            aggregations.append(pl.col(source_column).sum().alias(column))
+        elif aggregation == "mean":
+            aggregations.append(pl.col(source_column).mean().alias(column))
+        else:
+            aggregations.append(distinct_expr(order_column).alias(column))
+    return query.group_by(spec["keys"]).agg(aggregations)
+
+
+# BACK TO PANDAS
+# Keys get the dtype they have in silver; category keys are ordered like the pandas
+# groupby orders them (by category), then the table is finished like in pandas.
+
+def finish_table(name, result, key_dtypes):
+    spec = INCREMENTAL_TABLES[name]
+    keys = spec["keys"]
+    df = result.to_pandas()
+    for key in keys:
+        dtype = key_dtypes[key]
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = dtype.categories if dtype.categories is not None else sorted(df[key].unique())
+            df[key] = pd.Categorical(df[key], categories=categories)
+        else:
+            df[key] = df[key].astype(dtype)
+    for column, aggregation, _ in spec["columns"]:
+        if aggregation == "nunique":
+            df[column] = df[column].astype("int64")
+
+    df = df.sort_values(keys).reset_index(drop=True)
+    df = df[keys + [column for column, _, _ in spec["columns"]]]
+    return spec["finish"](df)
+
+
+# BUILD
+# From a silver DataFrame in memory (like build_gold), or, without one, from the
+# silver dataset on disk (like build_gold_from_dataset).
+
+def scan_silver():
+    partition_types = {"order_year": pl.Int16, "order_month": pl.Int8}
+    return pl.scan_parquet(str(SILVER_DIR / "**" / "*.parquet"), hive_partitioning=True, hive_schema=partition_types)
+
+def build_gold_polars(df=None):
+    require_polars()
+    if DISTINCT_MODE != "exact":
+        raise RuntimeError("GOLD_DISTINCT_MODE=hll is only supported by the pandas backend")
+
+    if df is None:
+        schema = silver_schema()
+        available = schema.names
+        source = scan_silver()
+        # Dictionary columns come back as categories of the values present
+        key_dtypes = {
+            field.name: pd.CategoricalDtype() if pa.types.is_dictionary(field.type) else field.type.to_pandas_dtype()
+            for field in schema
+        }
+    else:
+        available = list(df.columns)
+        needed = sorted({col for name in POLARS_TABLES for col in silver_columns(name, available)} | {"order_status"})
+        source = pl.from_pandas(df[needed]).lazy()
+        key_dtypes = df.dtypes.to_dict()
+
+    order_column = "order_key" if "order_key" in available and DISTINCT_MODE == "exact" else "order_id"
+    results = pl.collect_all([table_query(source, name, order_column) for name in POLARS_TABLES])
+    datasets = {name: finish_table(name, result, key_dtypes) for name, result in zip(POLARS_TABLES, results)}
+
+    for name in PANDAS_TABLES:
+        fn = GOLD_TABLES[name][0]
+        datasets[name] = fn(load_silver(columns=silver_columns(name, available)) if df is None else df)
+    return {name: datasets[name] for name in INCREMENTAL_TABLES}
@@ -0,0 +1,144 @@
+import sys
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+from paths import OUT
+
+# GOLD STORE
+# Every save publishes a new version of gold in a folder of its own:
+#   out/gold/versions/000012/gold_sales_overview.parquet
+#   out/gold/versions/000012/gold_sales_overview.feather   (uncompressed Arrow, memory-mapped by the dashboard)
+#   ...
+#   out/gold/manifest.json
+# The folder is written as 000012.tmp and renamed once complete, then manifest.json is
+# swapped in (temp file + os.replace). The manifest always points to a complete folder,
+# so a reader going through it never sees half a table or a mix of two versions, and
+# checking one small file tells it whether anything changed:
+#   {"version": 12, "path": "versions/000012", "updated_at": "...", "build_seconds": 1.92,
+#    "tables": {"gold_sales_overview": {"rows": 21, "sha256": "..."}, ...}}
+# sha256 is the hash of the table's parquet file, so a reader can also tell which tables changed.
+
+GOLD_DIR = OUT / "gold"
+VERSIONS_DIR = GOLD_DIR / "versions"
+MANIFEST_PATH = GOLD_DIR / "manifest.json"
+KEEP_VERSIONS = int(os.environ.get("GOLD_KEEP_VERSIONS", 3))
+# Twice the dashboard refresh interval (DASHBOARD_REFRESH_SECONDS in dashboard/app.py)
+KEEP_SECONDS = float(os.environ.get("GOLD_KEEP_SECONDS", 2 * int(os.environ.get("DASHBOARD_REFRESH_SECONDS", 40))))
+
+def load_gold_manifest():
+    # None until gold was saved once
+    if not MANIFEST_PATH.exists():
+        return None
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def version_dir(version):
+    return VERSIONS_DIR / f"{version:06d}"
+
+def gold_path(name, suffix=".parquet", manifest=None):
+    manifest = manifest or load_gold_manifest()
+    if manifest is None:
+        raise FileNotFoundError("No gold data yet: run python src/gold/gold_aggregator.py")
+    return GOLD_DIR / manifest["path"] / f"{name}{suffix}"
+
+def read_gold(name):
+    return pd.read_parquet(gold_path(name))
+
+
+# SAVE
+# `datasets` maps table names to DataFrames. A save of some tables (the streaming
+# consumer writes only the tables that changed) links the files of the other tables
+# from the previous version (hard links, copies where links are not supported).
+# `build_seconds` is the time the caller spent building the tables, for the manifest.
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def link_or_copy(source, target):
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def write_manifest(manifest):
+    tmp_path = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+def save_gold(datasets: dict, build_seconds=None):
+    previous = load_gold_manifest()
+    version = (previous["version"] if previous else 0) + 1
+    target_dir = version_dir(version)
+    tmp_dir = target_dir.with_name(target_dir.name + ".tmp")
+    # Leftovers of a save that crashed before its manifest swap
+    for leftover in (tmp_dir, target_dir):
+        if leftover.exists():
+            shutil.rmtree(leftover)
+    tmp_dir.mkdir(parents=True)
+
+    tables = {}
+    for name, df in datasets.items():
+        parquet_path = tmp_dir / f"{name}.parquet"
+        df.to_parquet(parquet_path, index=False)
+        df.to_feather(tmp_dir / f"{name}.feather", compression="uncompressed")
+        tables[name] = {"rows": len(df), "sha256": file_sha256(parquet_path)}
+        print(f"Saved: {target_dir / parquet_path.name} — {df.shape[0]:,} rows x {df.shape[1]} columns")
+
+    if previous:
+        previous_dir = GOLD_DIR / previous["path"]
+        for name, entry in previous["tables"].items():
+            if name not in tables:
+                for suffix in (".parquet", ".feather"):
+                    link_or_copy(previous_dir / f"{name}{suffix}", tmp_dir / f"{name}{suffix}")
+                tables[name] = entry
+
+    os.replace(tmp_dir, target_dir)
+    manifest = {
+        "version": version,
+        "path": target_dir.relative_to(GOLD_DIR).as_posix(),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "build_seconds": None if build_seconds is None else round(build_seconds, 3),
+        "tables": tables
+    }
+    write_manifest(manifest)
+    prune_versions(version)
+    return manifest
+
+
+# PRUNE
+# A reader that read the manifest just before a save must still find its folder, so a
+# version is deleted only when it is not among the newest KEEP_VERSIONS and the version
+# after it was published (folder mtime) at least KEEP_SECONDS ago. The count alone is
+# not enough when the streaming consumer publishes every few seconds: a dashboard
+# session could lose its version while still reading it.
+# A folder that cannot be deleted yet (a file still open or memory-mapped on Windows)
+# is tried again after the next save. Leftover .tmp folders follow the same rules.
+
+def prune_versions(current):
+    now = time.time()
+    superseded_at = now
+    for path in sorted(VERSIONS_DIR.iterdir(), reverse=True):
+        number = path.name.removesuffix(".tmp")
+        if not number.isdigit():
+            continue
+        published_at = path.stat().st_mtime if path.name == number else None
+        if int(number) <= current - KEEP_VERSIONS and now - superseded_at >= KEEP_SECONDS:
+            try:
+                shutil.rmtree(path)
+            except OSError:
+                pass
+        if published_at is not None:
+            superseded_at = published_at
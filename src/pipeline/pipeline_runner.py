@@ -0,0 +1,116 @@
+import sys
+from pathlib import Path
+from collections import namedtuple
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+from src.silver.reference_cache import reference_fingerprint
+from src.silver.silver_store import load_build_info, read_silver, silver_deduped, silver_exists
+from src.silver.silver_transformer import build_silver, build_silver_incremental
+from src.gold.gold_aggregator import GOLD_TABLES, delivered_orders, save_gold
+from src.gold.gold_incremental import IncrementalGoldTable
+from src.pipeline.dag import DagRunner, Stage
+
+# PIPELINE RUNNER
+# Runs silver and gold inside one long-lived process instead of a new Python
+# interpreter per stage. Imports happen once, and between cycles we keep:
+# - the reference tables (in-memory layer of reference_cache.py)
+# - the full silver DataFrame, so gold gets it directly instead of re-reading parquet
+# - the last output of every stage, so unchanged stages are skipped (see dag.py)
+#
+# Stages of a cycle:
+#   silver -> delivered -> gold_delivery_performance, gold_seller_performance
+#          -> gold_sales_overview, gold_top_categories, gold_customer_geography
+#   all gold tables -> save_gold
+# silver always runs: full build when there is no dataset or when a CSV changed since
+# the last full build (also while the runner was down: the fingerprint of the CSVs that
+# build read is stored with silver), otherwise incremental. Its fingerprint is a version
+# number that only moves when silver really changed, so a cycle without new orders
+# skips every gold stage.
+# Gold tables are maintained incrementally (gold_incremental.py): the silver stage
+# hands over the full DataFrame plus the rows new in this cycle, and each gold table
+# folds in only those rows.
+
+# Output of the silver stage: all rows, and the rows new since the last version
+# (None when silver was rebuilt or loaded, so gold rebuilds its state)
+class SilverChange(namedtuple("SilverChange", ["df", "delta"])):
+    @property
+    def shape(self):
+        return self.df.shape
+
+
+class PipelineRunner:
+    def __init__(self, max_workers=5):
+        self.silver_df = None
+        self.silver_version = 0
+        self.cycle_start = None
+        self.gold_tables = {name: IncrementalGoldTable(name) for name in GOLD_TABLES}
+        self.dag = DagRunner(self.build_stages(), max_workers=max_workers)
+
+    def build_stages(self):
+        stages = [
+            Stage("silver", self.run_silver, fingerprint=lambda change: self.silver_version),
+            Stage("delivered", delivered_change, inputs=["silver"])
+        ]
+        for name, (_, source) in GOLD_TABLES.items():
+            stages.append(Stage(name, self.gold_table_updater(name), inputs=[source]))
+        stages.append(Stage("save_gold", self.save_gold_tables, inputs=list(GOLD_TABLES)))
+        return stages
+
+    def run_silver(self):
+        delta = None
+        if not silver_exists() or reference_changed():
+            self.silver_df = build_silver()
+            self.silver_version += 1
+        else:
+            deduped = silver_deduped()
+            df_inserted = build_silver_incremental()
+            # Not loaded yet, or the upsert deduplicated the stored rows first
+            if self.silver_df is None or deduped != silver_deduped():
+                self.silver_df = read_silver()
+                self.silver_version += 1
+            elif df_inserted is not None and len(df_inserted):
+                self.silver_df = append_rows(self.silver_df, df_inserted)
+                self.silver_version += 1
+                delta = df_inserted
+        return SilverChange(self.silver_df, delta)
+
+    def gold_table_updater(self, name):
+        table = self.gold_tables[name]
+        return lambda change: table.update(change.df, change.delta)
+
+    def save_gold_tables(self, *tables):
+        datasets = dict(zip(GOLD_TABLES, tables))
+        save_gold(datasets, build_seconds=time.perf_counter() - self.cycle_start)
+        return datasets
+
+    def run_cycle(self):
+        self.cycle_start = time.perf_counter()
+        _, report = self.dag.run()
+        return report
+
+
+# A silver dataset without build info (written before it existed, or by a build that
+# did not finish) counts as changed
+def reference_changed():
+    built = load_build_info().get("reference")
+    return built is None or [list(entry) for entry in reference_fingerprint()] != built
+
+
+def delivered_change(change):
+    delta = None if change.delta is None else delivered_orders(change.delta)
+    return SilverChange(delivered_orders(change.df), delta)
+
+
+# APPEND ROWS
+# pd.concat turns a category column into object when the two sides have
+# different categories, so we restore the category dtype afterwards.
+
+def append_rows(df, df_new):
+    combined = pd.concat([df, df_new], ignore_index=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype("category")
+    return combined
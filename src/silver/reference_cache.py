@@ -0,0 +1,115 @@
+import sys
+from pathlib import Path
+import hashlib
+import io
+import json
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pandas as pd
+from paths import DATA, OUT
+
+# REFERENCE CACHE
+# The Olist CSVs almost never change, but parsing them (dates above all) is the
+# slowest part of a silver run. Each CSV is converted once into a Feather file
+# with the declared dtypes, and later runs read the Feather file instead:
+#   out/cache/reference/olist_orders_dataset.feather
+#   out/cache/reference/olist_orders_dataset.json   (fingerprint of the source CSV)
+# The fingerprint is size + mtime + sha256 of the CSV, plus the dtypes we asked for.
+# Size and mtime are checked first; the hash is only computed when they differ,
+# so touching a file without changing it does not trigger a re-parse.
+
+CACHE_DIR = OUT / "cache" / "reference"
+
+# In a long-lived process (run_pipeline.py) the tables also stay in memory,
+# keyed by filename -> (size, mtime_ns, spec, DataFrame).
+# Callers must not modify the returned DataFrames.
+_memory_cache = {}
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_meta(meta_path):
+    if not meta_path.exists():
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_meta(meta_path, meta):
+    tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+# CACHE CHECK
+# Returns True when the cached file still matches the CSV.
+# If only the mtime moved but the content is the same, the stored mtime is updated.
+
+def cache_is_fresh(source, cache_path, meta_path, meta, spec):
+    if meta is None or not cache_path.exists() or meta["spec"] != spec:
+        return False
+
+    stat = source.stat()
+    if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if meta["size"] != stat.st_size or meta["sha256"] != file_sha256(source):
+        return False
+
+    meta["mtime_ns"] = stat.st_mtime_ns
+    write_meta(meta_path, meta)
+    return True
+
+
+# LOAD REFERENCE TABLE
+# Drop-in for pd.read_csv(DATA / filename, dtype=dtype, parse_dates=parse_dates).
+
+def load_reference(filename, dtype, parse_dates=None):
+    source = DATA / filename
+    cache_path = CACHE_DIR / f"{source.stem}.feather"
+    meta_path = CACHE_DIR / f"{source.stem}.json"
+    spec = {"dtype": dtype, "parse_dates": parse_dates or []}
+
+    stat = source.stat()
+    cached = _memory_cache.get(filename)
+    if cached is not None and cached[:3] == (stat.st_size, stat.st_mtime_ns, spec):
+        return cached[3]
+
+    meta = read_meta(meta_path)
+    if cache_is_fresh(source, cache_path, meta_path, meta, spec):
+        df = pd.read_feather(cache_path)
+        _memory_cache[filename] = (stat.st_size, stat.st_mtime_ns, spec, df)
+        return df
+
+    # The hash is taken from the bytes that are parsed (read after the stat), so a CSV
+    # rewritten meanwhile cannot leave a hash of content the cache does not hold
+    print(f"Parsing {filename} (reference cache miss)")
+    content = source.read_bytes()
+    sha256 = hashlib.sha256(content).hexdigest()
+    df = pd.read_csv(io.BytesIO(content), dtype=dtype, parse_dates=parse_dates)
+    del content
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    df.to_feather(tmp_path)
+    os.replace(tmp_path, cache_path)
+    write_meta(meta_path, {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+        "spec": spec
+    })
+    _memory_cache[filename] = (stat.st_size, stat.st_mtime_ns, spec, df)
+    return df
+
+
+# FINGERPRINT
+# Cheap check of whether any reference CSV changed: name, size and mtime of every file.
+
+def reference_fingerprint():
+    return [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in sorted(DATA.glob("*.csv"))]
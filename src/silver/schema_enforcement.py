@@ -0,0 +1,107 @@
+# SILVER SCHEMA
+# The dtype of every silver column. After the merges and transform the DataFrame
+# carries int64/int32 time parts, float64 day counts and full string ids, and the
+# state columns lose their category dtype. enforce_schema() brings it back to the
+# smallest types that hold the data:
+# - time parts as int8/int16 (year 2016..2018, month 1..12, weekday 0..6, hour 0..23)
+# - day counts as nullable Int16 (null where the order was not delivered), and the
+#   other integer columns nullable too: orders from bronze carry no item, customer,
+#   product or seller fields, so those columns are null for them
+# - low-cardinality columns (status, states, category, cities) as categories
+# - ids used for grouping and joins (customer, product, seller) as categories,
+#   i.e. dictionary-encoded: one int32 code per row plus each distinct id once.
+#   order_id stays a string: almost every order has its own value.
+# - money stays float64, so sums match the old results to the cent.
+# Columns not listed here (e.g. bronze fields we do not use) keep their dtype.
+
+SILVER_DTYPES = {
+    "order_id":                      "string",
+    "order_item_id":                 "Int16",
+    "product_id":                    "category",
+    "seller_id":                     "category",
+    "price":                         "float64",
+    "freight_value":                 "float64",
+    "customer_id":                   "category",
+    "order_status":                  "category",
+    "customer_unique_id":            "category",
+    "customer_zip_code_prefix":      "Int32",
+    "customer_city":                 "category",
+    "customer_state":                "category",
+    "product_category_name":         "category",
+    "product_name_lenght":           "Int16",
+    "product_description_lenght":    "Int16",
+    "product_photos_qty":            "Int16",
+    "product_weight_g":              "Int32",
+    "product_length_cm":             "Int16",
+    "product_height_cm":             "Int16",
+    "product_width_cm":              "Int16",
+    "seller_zip_code_prefix":        "Int32",
+    "seller_city":                   "category",
+    "seller_state":                  "category",
+    "payment_type":                  "category",
+    "payment_installments":          "Int16",
+    "payment_value":                 "float64",
+    "order_year":                    "int16",
+    "order_month":                   "int8",
+    "order_weekday":                 "int8",
+    "order_hour":                    "int8",
+    "processing_days":               "Int16",
+    "shipping_days":                 "Int16",
+    "fulfillment_days":              "Int16",
+    "sla_diff_days":                 "Int16",
+    "on_time":                       "bool",
+    "order_key":                     "int32"
+}
+
+# Columns every silver DataFrame must have after the transform
+REQUIRED_COLUMNS = [
+    "order_id", "order_status", "order_purchase_timestamp",
+    "order_year", "order_month", "order_weekday", "order_hour",
+    "processing_days", "shipping_days", "fulfillment_days", "sla_diff_days", "on_time"
+]
+
+
+# MEMORY REPORT
+
+def bytes_per_row(df):
+    if len(df) == 0:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / len(df)
+
+
+# ENFORCE
+# Casts every known column to its silver dtype and checks the result.
+# Rows without a purchase timestamp must be dropped before (they have no year/month).
+
+def enforce_schema(df, report=True):
+    before = bytes_per_row(df) if report else None
+
+    casts = {
+        col: dtype for col, dtype in SILVER_DTYPES.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    if casts:
+        df = df.astype(casts)
+    assert_schema(df)
+
+    if report:
+        print(f"Silver memory: {before:,.0f} -> {bytes_per_row(df):,.0f} bytes/row")
+    return df
+
+
+# ASSERT
+# Raises TypeError listing every column whose dtype differs from SILVER_DTYPES,
+# and KeyError when a required column is missing.
+
+def assert_schema(df):
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise KeyError(f"Silver is missing columns: {missing}")
+
+    wrong = {
+        col: f"{df[col].dtype} (expected {dtype})"
+        for col, dtype in SILVER_DTYPES.items()
+        if col in df.columns and str(df[col].dtype) != dtype
+    }
+    if wrong:
+        raise TypeError(f"Silver columns with the wrong dtype: {wrong}")
@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# BACKEND
+# PIPELINE_BACKEND=polars runs merge_datasets, transform and the five gold tables
+# as lazy Polars queries, which use every core of the machine; the default "pandas"
+# runs the pandas code. Both give the same DataFrames, so the Parquet files written
+# by either backend are the same (benchmarks/check_polars_parity.py checks it).
+# Polars is optional: it is only imported when installed and only needed when selected.
+
+BACKEND = os.environ.get("PIPELINE_BACKEND", "pandas")
+
+if BACKEND not in ("pandas", "polars"):
+    raise ValueError(f"PIPELINE_BACKEND must be 'pandas' or 'polars', got {BACKEND!r}")
+
+def require_polars():
+    if pl is None:
+        raise RuntimeError("PIPELINE_BACKEND=polars needs the polars package (pip install polars)")
+
+
+# BACK TO PANDAS
+# Polars has its own types, so each result column is cast back to the dtype the
+# pandas code produces:
+# - categories keep the categories of the pandas input (not just the values present)
+# - integer and bool columns that got nulls from a left join become float64 / object,
+#   like after DataFrame.merge
+# - everything else gets the dtype of the pandas input column
+
+def to_pandas_like(result, dtypes):
+    df = result.to_pandas()
+    for col, dtype in dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[col] = pd.Categorical(df[col], dtype=dtype)
+        elif dtype.kind in "iub" and df[col].isna().any():
+            df[col] = df[col].astype("float64" if dtype.kind in "iu" else object)
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+# MERGE
+# Same result as merge_datasets in silver_transformer.py: every item row with the
+# columns of its order, customer, product, seller and aggregated payments, in that
+# column order. The joins run as one lazy query; validate="m:1" fails on a
+# dimension key that is not unique, like the pandas version.
+
+def merge_datasets_polars(orders, items, customers, payments, products, sellers):
+    require_polars()
+
+    # pandas' groupby("first") takes the first non-null value and drops null keys
+    payments_agg = (
+        pl.from_pandas(payments).lazy()
+        .filter(pl.col("order_id").is_not_null())
+        .group_by("order_id", maintain_order=True)
+        .agg(
+            pl.col("payment_type").drop_nulls().first(),
+            pl.col("payment_installments").sum(),
+            pl.col("payment_value").sum()
+        )
+    )
+
+    query = pl.from_pandas(items).lazy()
+    joins = [
+        (pl.from_pandas(orders).lazy(), "order_id"),
+        (pl.from_pandas(customers).lazy(), "customer_id"),
+        (pl.from_pandas(products).lazy(), "product_id"),
+        (pl.from_pandas(sellers).lazy(), "seller_id"),
+        (payments_agg, "order_id")
+    ]
+    for dim, key in joins:
+        query = query.join(dim, on=key, how="left", validate="m:1", nulls_equal=True, maintain_order="left")
+
+    # Output dtypes: each column keeps the dtype of the table it comes from
+    dtypes = {}
+    for table in [items, orders, customers, products, sellers]:
+        for col in table.columns:
+            dtypes.setdefault(col, table[col].dtype)
+    dtypes["payment_type"] = payments["payment_type"].dtype
+    dtypes["payment_installments"] = payments["payment_installments"].dtype
+    dtypes["payment_value"] = np.dtype("float64")
+
+    return to_pandas_like(query.collect(), dtypes)
+
+
+# TRANSFORM
+# Same columns as transform in silver_transformer.py, computed on nanosecond integers
+# (floor division by a day, like .dt.days). Only the five columns it reads go to
+# Polars; the new columns are added to the pandas DataFrame.
+
+NS_PER_DAY = 86_400 * 10**9
+
+def ns(col):
+    return pl.col(col).cast(pl.Datetime("ns")).cast(pl.Int64)
+
+def days_between(end, start, mask):
+    return pl.when(mask).then((ns(end) - ns(start)) // NS_PER_DAY).otherwise(None)
+
+def transform_polars(df):
+    require_polars()
+
+    purchase = pl.col("order_purchase_timestamp")
+    delivered_mask = (
+        (pl.col("order_status").cast(pl.String) == "delivered").fill_null(False) &
+        pl.col("order_delivered_customer_date").is_not_null() &
+        pl.col("order_delivered_carrier_date").is_not_null() &
+        purchase.is_not_null()
+    )
+    sla_mask = delivered_mask & pl.col("order_estimated_delivery_date").is_not_null()
+
+    inputs = df[[
+        "order_status", "order_purchase_timestamp", "order_delivered_carrier_date",
+        "order_delivered_customer_date", "order_estimated_delivery_date"
+    ]]
+    result = (
+        pl.from_pandas(inputs).lazy()
+        .select(
+            purchase.dt.year().alias("order_year"),
+            purchase.dt.month().alias("order_month"),
+            (purchase.dt.weekday() - 1).alias("order_weekday"),   # Polars counts Monday as 1
+            purchase.dt.hour().alias("order_hour"),
+            days_between("order_delivered_carrier_date", "order_purchase_timestamp", delivered_mask).alias("processing_days"),
+            days_between("order_delivered_customer_date", "order_delivered_carrier_date", delivered_mask).alias("shipping_days"),
+            days_between("order_delivered_customer_date", "order_purchase_timestamp", delivered_mask).alias("fulfillment_days"),
+            days_between("order_delivered_customer_date", "order_estimated_delivery_date", sla_mask).alias("sla_diff_days")
+        )
+        .with_columns((pl.col("sla_diff_days") <= 0).fill_null(False).alias("on_time"))
+        .collect()
+    )
+
+    # Time parts are small ints, or float with NaN when a purchase timestamp is missing
+    has_purchase = df["order_purchase_timestamp"].notna().all()
+    time_dtypes = {"order_year": np.int16, "order_month": np.int8, "order_weekday": np.int8, "order_hour": np.int8}
+    for col in result.columns:
+        values = result[col].to_numpy()
+        if col in time_dtypes:
+            values = values.astype(time_dtypes[col] if has_purchase else np.float64)
+        elif col != "on_time":
+            values = values.astype(np.float64)
+        df[col] = values
+    return df
@@ -0,0 +1,328 @@
+import sys
+from pathlib import Path
+import json
+import os
+import shutil
+import uuid
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from paths import OUT
+
+# SILVER DATASET
+# Silver is stored as a Hive-partitioned parquet dataset, one folder per month:
+#   out/silver/silver_orders/order_year=2017/order_month=5/part-0.parquet
+# so an incremental run rewrites only the months that received new orders.
+
+SILVER_DIR = OUT / "silver" / "silver_orders"
+PARTITION_COLS = ["order_year", "order_month"]
+PARTITIONING = ds.partitioning(
+    pa.schema([("order_year", pa.int16()), ("order_month", pa.int8())]),
+    flavor="hive"
+)
+
+# BUILD INFO
+# out/silver/silver_build.json describes the stored dataset:
+# {"reference": [["olist_orders_dataset.csv", 17654914, 1710755000000000000], ...],
+#  "build": "5f0c...", "changes": 12, "deduped": true, "next_order_key": 99441}
+# - reference: the reference fingerprint (see reference_cache.py) of the CSVs the last
+#   full build read, so a process that starts later can tell whether a CSV changed
+#   while it was down
+# - build: a new id for every full build; changes: how many writes changed rows since then
+# - deduped: whether each order_id has one row (see DEDUPLICATE below)
+# - next_order_key: the order_key the next new order gets, so incremental writes do not
+#   scan the order_key column of the whole dataset
+# remove_silver deletes it, and a full build writes it once the dataset is complete.
+# silver_fingerprint() ("<build>-<changes>") changes whenever the rows of silver do, so
+# state derived from silver (the incremental gold tables) stores it and is only reused
+# while it still matches. Compacting month files keeps the rows, and the fingerprint.
+
+BUILD_INFO_PATH = OUT / "silver" / "silver_build.json"
+
+def load_build_info():
+    if not BUILD_INFO_PATH.exists():
+        return {}
+    with open(BUILD_INFO_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_build_info(info):
+    BUILD_INFO_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = BUILD_INFO_PATH.with_name(BUILD_INFO_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, BUILD_INFO_PATH)
+
+def record_full_build(reference, deduped, next_key):
+    save_build_info({
+        "reference": reference, "build": uuid.uuid4().hex, "changes": 0,
+        "deduped": deduped, "next_order_key": next_key
+    })
+
+def record_change(next_key=None):
+    info = load_build_info()
+    if "build" in info:
+        info["changes"] += 1
+    if next_key is not None:
+        info["next_order_key"] = next_key
+    save_build_info(info)
+
+def silver_fingerprint():
+    # None for silver without build info: nothing derived from it is reused
+    info = load_build_info()
+    return f"{info['build']}-{info['changes']}" if "build" in info else None
+
+
+def silver_exists():
+    return SILVER_DIR.exists() and any(SILVER_DIR.rglob("*.parquet"))
+
+def open_silver_dataset():
+    return ds.dataset(SILVER_DIR, format="parquet", partitioning=PARTITIONING)
+
+
+# SCHEMA
+# Every file in the dataset must have the same schema, otherwise the reader fails.
+# Categories always get int32 codes (pandas picks int8/int16 depending on how many there are).
+# Columns missing from `df` (bronze orders carry fewer fields than the CSVs) are stored as nulls.
+
+def to_silver_table(df, schema=None):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if schema is None:
+        fields = [
+            pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type)) if pa.types.is_dictionary(f.type) else f
+            for f in table.schema
+        ]
+        schema = pa.schema(fields, metadata=table.schema.metadata)
+
+    arrays = [
+        table.column(field.name).cast(field.type) if field.name in table.column_names
+        else pa.nulls(len(table), field.type)
+        for field in schema
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+def silver_schema():
+    # Schema of the stored dataset, with the month columns back in their place
+    dataset_schema = open_silver_dataset().schema
+    order = [c["name"] for c in dataset_schema.pandas_metadata["columns"] if c["name"] in dataset_schema.names]
+    return pa.schema([dataset_schema.field(name) for name in order], metadata=dataset_schema.metadata)
+
+
+# WRITE
+# existing_data_behavior="delete_matching" replaces only the month folders present in `table`.
+# Rows without a purchase timestamp have no month, so they cannot be stored.
+#
+# Inside a month the rows are sorted by order_status, so each status sits in a few
+# row groups and the min/max statistics of a row group let a filter such as
+# order_status == "delivered" skip the row groups that cannot match.
+# Row groups hold up to ROW_GROUP_ROWS rows: small enough to skip, big enough to
+# keep the per-group overhead low. preserve_order keeps the sort through the writer.
+# Each month is written on its own, with dictionaries holding only its own values.
+
+ROW_GROUP_ROWS = 32_768
+SORT_COLS = PARTITION_COLS + ["order_status"]
+
+def sort_for_write(table):
+    # Dictionary columns cannot be sorted directly, so we sort on their plain values
+    keys = pa.table({
+        name: table.column(name).cast(pa.string()) if pa.types.is_dictionary(table.schema.field(name).type)
+        else table.column(name)
+        for name in SORT_COLS
+    })
+    return table.take(pc.sort_indices(keys, sort_keys=[(name, "ascending") for name in SORT_COLS]))
+
+def month_slices(table):
+    # `table` is sorted by month, so each month is one contiguous (zero-copy) slice
+    if len(table) == 0:
+        return []
+    year = table.column("order_year").to_numpy()
+    month = table.column("order_month").to_numpy()
+    starts = np.flatnonzero((year[1:] != year[:-1]) | (month[1:] != month[:-1])) + 1
+    bounds = [0, *starts.tolist(), len(table)]
+    return [table.slice(start, end - start) for start, end in zip(bounds[:-1], bounds[1:])]
+
+def compact_dictionaries(table):
+    # A slice keeps the dictionary of the whole table, and Parquet stores it as is:
+    # re-encoding keeps only the values the month uses (customer ids would otherwise
+    # store every customer in every month file)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            values = table.column(i).cast(field.type.value_type)
+            table = table.set_column(i, field, pc.dictionary_encode(values).cast(field.type))
+    return table
+
+def write_months(table, basename_template, existing_data_behavior):
+    for month in month_slices(sort_for_write(table)):
+        ds.write_dataset(
+            compact_dictionaries(month),
+            SILVER_DIR,
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior=existing_data_behavior,
+            basename_template=basename_template,
+            file_options=ds.ParquetFileFormat().make_write_options(write_statistics=True),
+            preserve_order=True,
+            max_rows_per_group=ROW_GROUP_ROWS,
+            min_rows_per_group=min(ROW_GROUP_ROWS, len(month))
+        )
+
+def write_partitions(table):
+    write_months(table, "part-{i}.parquet", "delete_matching")
+
+def drop_unpartitioned(df):
+    missing = df["order_year"].isna()
+    if missing.any():
+        print(f"Skipping {missing.sum():,} rows without order_purchase_timestamp")
+        df = df[~missing]
+    return df
+
+def remove_silver():
+    BUILD_INFO_PATH.unlink(missing_ok=True)
+    if SILVER_DIR.exists():
+        shutil.rmtree(SILVER_DIR)
+
+def write_silver(df):
+    # Returns the rows that were stored
+    remove_silver()
+    df = drop_unpartitioned(df)
+    write_partitions(to_silver_table(df))
+    return df
+
+
+# CHUNKED WRITE
+# The chunked silver build (see build_silver_chunked in silver_transformer.py) writes
+# each chunk as extra files into the month folders it touches:
+#   order_year=2017/order_month=5/chunk-00003-0.parquet
+# and the streaming consumer (src/streaming/order_consumer.py) writes each micro-batch
+# the same way (stream-<run>-<batch>-0.parquet). compact_partitions then rewrites every
+# month folder that has at least `min_files` such files into one part-0.parquet, one
+# month at a time. Chunk and batch numbers are zero-padded and "part-0" sorts before
+# "stream-", so reading the files in name order gives the rows in the order they
+# arrived, and the month gets the same rows in the same order (and the same row
+# groups) as a one-shot write or an upsert.
+
+def write_chunk(table, chunk):
+    write_months(table, f"chunk-{chunk:05d}-{{i}}.parquet", "overwrite_or_ignore")
+
+def write_stream_batch(table, run, batch, next_key):
+    write_months(table, f"stream-{run}-{batch:06d}-{{i}}.parquet", "overwrite_or_ignore")
+    record_change(next_key)
+
+def read_month(month_dir):
+    files = sorted(str(path) for path in month_dir.glob("*.parquet"))
+    return ds.dataset(files, format="parquet", partitioning=PARTITIONING, partition_base_dir=str(SILVER_DIR)).to_table()
+
+def compact_partitions(pattern="chunk-*.parquet", min_files=1):
+    month_dirs = sorted({path.parent for path in SILVER_DIR.rglob(pattern)})
+    compacted = 0
+    for month_dir in month_dirs:
+        if len(list(month_dir.glob(pattern))) < min_files:
+            continue
+        write_partitions(read_month(month_dir))
+        compacted += 1
+    return compacted
+
+
+# DEDUPLICATE
+# A full build keeps only the first row of each order_id (one item per order) when
+# bronze has orders (merge_blob_orders in silver_transformer.py), and every row when it
+# has none. Before bronze or stream orders are added to silver built without them,
+# dedupe_silver applies the same rule to the stored rows, so the result matches a
+# full build of the same data.
+# All rows of an order fall in its purchase month, and inside a month the rows of an
+# order keep the order they were written in (they share their order_status, the sort
+# key), so the rule runs one month at a time.
+
+def silver_deduped():
+    return load_build_info().get("deduped", False)
+
+def dedupe_silver():
+    removed = 0
+    for month_dir in sorted({path.parent for path in SILVER_DIR.rglob("*.parquet")}):
+        month = read_month(month_dir)
+        first = ~month.column("order_id").to_pandas().duplicated().to_numpy()
+        if not first.all():
+            write_partitions(month.filter(pa.array(first)))
+            removed += int((~first).sum())
+
+    info = load_build_info()
+    info["deduped"] = True
+    if removed and "build" in info:
+        info["changes"] += 1
+    save_build_info(info)
+    print(f"Deduplicated silver: {removed:,} extra item rows removed")
+    return removed
+
+
+# READ
+# Returns the silver DataFrame with the same column order it was written with.
+# Category columns come back with their categories sorted: the files of different
+# months carry different dictionaries, and the merged order would depend on which
+# months were rewritten last.
+# `columns` reads only those columns (None = all of them), so the other columns
+# are never loaded from disk.
+# `filters` uses the pyarrow syntax, e.g. [("order_year", "=", 2018), ("order_month", "=", 3)]
+# or [("order_status", "==", "delivered")]. Filters on order_year/order_month skip whole
+# month folders; filters on other columns skip the row groups whose statistics rule them out.
+
+def read_silver(columns=None, filters=None):
+    names = silver_schema().names
+    if columns is not None:
+        unknown = [c for c in columns if c not in names]
+        if unknown:
+            raise KeyError(f"Columns not in silver: {unknown}")
+        names = [c for c in names if c in columns]
+    df = pd.read_parquet(SILVER_DIR, partitioning=PARTITIONING, columns=names, filters=filters)
+    for col in names:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and not df[col].cat.categories.is_monotonic_increasing:
+            df[col] = df[col].cat.reorder_categories(df[col].cat.categories.sort_values())
+    return df[names]
+
+
+# UPSERT
+# Folds new rows into the months they belong to.
+# An order that is already in silver keeps its stored row - same rule as the full build,
+# where drop_duplicates keeps the first row of each order_id. All rows of an order share
+# its purchase month, so the stored copy can only be in one of the months being
+# rewritten, and the duplicate check reuses those rows instead of scanning every month.
+# Returns only the rows that were actually inserted.
+
+def next_order_key():
+    # Kept in the build info; silver written before it was recorded is scanned once
+    info = load_build_info()
+    if "next_order_key" in info:
+        return info["next_order_key"]
+    keys = open_silver_dataset().to_table(columns=["order_key"]).column("order_key")
+    largest = pc.max(keys).as_py()
+    return 0 if largest is None else largest + 1
+
+def upsert_silver(df_new):
+    if not silver_deduped():
+        dedupe_silver()
+
+    df_new = drop_unpartitioned(df_new).drop_duplicates(subset=["order_id"])
+    if df_new.empty:
+        return df_new
+
+    months = df_new[PARTITION_COLS].drop_duplicates().itertuples(index=False)
+    month_filter = [[("order_year", "=", int(y)), ("order_month", "=", int(m))] for y, m in months]
+    df_existing = read_silver(filters=month_filter)
+    df_new = df_new[~df_new["order_id"].isin(df_existing["order_id"])]
+    if df_new.empty:
+        return df_new
+
+    # Every inserted row is a new order, so it gets the next free order_key
+    next_key = None
+    if "order_key" in df_existing.columns:
+        next_key = next_order_key()
+        df_new = df_new.assign(order_key=(np.arange(len(df_new)) + next_key).astype(np.int32))
+        next_key += len(df_new)
+
+    df_months = pd.concat([df_existing, df_new], ignore_index=True)
+    write_partitions(to_silver_table(df_months, silver_schema()))
+    record_change(next_key)
+    return df_new
@@ -1,128 +1,164 @@
 import sys
 from pathlib import Path
-import json
+import argparse
 import os
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from dotenv import load_dotenv
-from azure.storage.blob import BlobServiceClient
-from paths import DATA, OUT
+from paths import DATA
+from src.silver.reference_cache import load_reference, reference_fingerprint
+from src.bronze.bronze_reader import ingest_new_orders, load_ingested, normalize_bronze_orders
+from src.silver.schema_enforcement import enforce_schema
+from src.silver.silver_polars import BACKEND, merge_datasets_polars, transform_polars
+from src.silver.silver_store import (
+    SILVER_DIR, compact_partitions, drop_unpartitioned, record_full_build, remove_silver,
+    silver_exists, to_silver_table, upsert_silver, write_chunk, write_silver
+)
 
 load_dotenv(Path(__file__).resolve().parents[2] / "producer" / ".env")
 
+# SCHEMA TYPES
+# The dtypes we want for each CSV file.
+
+ORDERS_DTYPES = {
+    "order_id": "string",
+    "customer_id": "string",
+    "order_status": "category"
+}
+ORDERS_PARSE_DATES = [
+    "order_purchase_timestamp",
+    "order_approved_at",
+    "order_delivered_carrier_date",
+    "order_delivered_customer_date",
+    "order_estimated_delivery_date"
+]
+
+ITEMS_DTYPES = {
+    "order_id": "string",
+    "product_id": "string",
+    "seller_id": "string"
+}
+ITEMS_PARSE_DATES = ["shipping_limit_date"]
+
+CUSTOMERS_DTYPES = {
+    "customer_id": "string",
+    "customer_state": "category"
+}
+
+PAYMENTS_DTYPES = {
+    "order_id": "string",
+    "payment_type": "category"
+}
+
+PRODUCTS_DTYPES = {
+    "product_id": "string",
+    "product_category_name": "category"
+}
+
+SELLERS_DTYPES = {
+    "seller_id": "string",
+    "seller_state": "category"
+}
+
 # LOAD FUNCTIONS
 # Each function loads a CSV file and returns a DataFrame.
+# The CSVs go through the reference cache (src/silver/reference_cache.py):
+# they are parsed only when the file changed since the last run.
 
 def load_orders():
-    return pd.read_csv(
-        DATA / "olist_orders_dataset.csv",
-        dtype={
-            "order_id": "string",
-            "customer_id": "string",
-            "order_status": "category"
-        },
-        parse_dates=[
-            "order_purchase_timestamp",
-            "order_approved_at",
-            "order_delivered_carrier_date",
-            "order_delivered_customer_date",
-            "order_estimated_delivery_date"
-        ]
-    )
+    return load_reference("olist_orders_dataset.csv", ORDERS_DTYPES, ORDERS_PARSE_DATES)
 
 def load_items():
-    return pd.read_csv(
-        DATA / "olist_order_items_dataset.csv",
-        dtype={
-            "order_id": "string",
-            "product_id": "string",
-            "seller_id": "string"
-        },
-        parse_dates=["shipping_limit_date"]
-    )
+    return load_reference("olist_order_items_dataset.csv", ITEMS_DTYPES, ITEMS_PARSE_DATES)
 
 def load_customers():
-    return pd.read_csv(
-        DATA / "olist_customers_dataset.csv",
-        dtype={
-            "customer_id": "string",
-            "customer_state": "category"
-        }
-    )
+    return load_reference("olist_customers_dataset.csv", CUSTOMERS_DTYPES)
 
 def load_payments():
-    return pd.read_csv(
-        DATA / "olist_order_payments_dataset.csv",
-        dtype={
-            "order_id": "string",
-            "payment_type": "category"
-        }
-    )
+    return load_reference("olist_order_payments_dataset.csv", PAYMENTS_DTYPES)
 
 def load_products():
-    return pd.read_csv(
-        DATA / "olist_products_dataset.csv",
-        dtype={
-            "product_id": "string",
-            "product_category_name": "category"
-        }
-    )
+    return load_reference("olist_products_dataset.csv", PRODUCTS_DTYPES)
 
 def load_sellers():
-    return pd.read_csv(
-        DATA / "olist_sellers_dataset.csv",
-        dtype={
-            "seller_id": "string",
-            "seller_state": "category"
-        }
-    )
+    return load_reference("olist_sellers_dataset.csv", SELLERS_DTYPES)
 
 # LOAD FROM BLOB STORAGE
-# Reads all JSON files from the bronze/orders container in Azure Blob Storage.
-# Each JSON file is one order event sent by the producer.
-# Returns a DataFrame with all the new orders found in the blob.
+# Pulls only the new order events from the bronze container (see src/bronze/bronze_reader.py)
+# and keeps them in a local copy, so each run downloads just the blobs it has not seen.
+# Returns a DataFrame with every order ingested so far.
 # If no orders are found, returns None.
 
 def load_bronze_from_blob():
-    connection_string = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
-    blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-    container_client = blob_service_client.get_container_client("bronze")
-
-    orders = []
-    for blob in container_client.list_blobs(name_starts_with="orders/"):
-        blob_client = container_client.get_blob_client(blob)
-        content = blob_client.download_blob().readall()
-        order = json.loads(content)
-        orders.append(order)
-
-    if not orders:
+    ingest_new_orders()
+    df_blob = load_ingested()
+
+    if df_blob is None:
         print("No new orders found in Blob Storage")
         return None
 
-    df_blob = pd.DataFrame(orders)
     print(f"Loaded {len(df_blob):,} orders from Blob Storage")
     return df_blob
 
 
 # MERGE
-# Joins all datasets into a single DataFrame.
-
-def merge_datasets(orders, items, customers, payments, products, sellers):
-    df = items.merge(orders, on="order_id", how="left")
-    df = df.merge(customers, on="customer_id", how="left")
-    df = df.merge(products, on="product_id", how="left")
-    df = df.merge(sellers, on="seller_id", how="left")
-
-    payments_agg = payments.groupby("order_id").agg(
+# Joins all datasets into a single DataFrame: one row per order item, with the columns
+# of its order, customer, product, seller and aggregated payments.
+# Instead of chaining DataFrame.merge (each call copies the whole growing table),
+# every dimension table gets a hash lookup on its key (pyarrow's index_in gives the
+# row position of each key, -1 when missing; it hashes the Arrow-backed string keys
+# in C++) and its columns are gathered straight into the item table with take. Missing keys get NaN/NaT/null like a left merge, and
+# the columns come out in the same order as the merges produced them.
+# The dimension keys must be unique (they are in the Olist data).
+
+def check_unique(dim, key):
+    if not dim[key].is_unique:
+        raise ValueError(f"{key} is not unique in its table, cannot join on it")
+
+def dimension_positions(dim, key, keys, check=True):
+    if check:
+        check_unique(dim, key)
+    positions = pc.index_in(pa.array(keys), value_set=pa.array(dim[key]))
+    return positions.fill_null(-1).to_numpy()
+
+def take_column(series, positions):
+    values = series.array if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) else series.to_numpy()
+    return pd.api.extensions.take(values, positions, allow_fill=True)
+
+def aggregate_payments(payments):
+    return payments.groupby("order_id", observed=True).agg(
         payment_type=("payment_type", "first"),
         payment_installments=("payment_installments", "sum"),
         payment_value=("payment_value", "sum")
     ).reset_index()
 
-    df = df.merge(payments_agg, on="order_id", how="left")
-    return df
+def dimension_joins(orders, customers, payments_agg, products, sellers):
+    return [
+        (orders, "order_id"),
+        (customers, "customer_id"),     # customer_id comes from orders
+        (products, "product_id"),
+        (sellers, "seller_id"),
+        (payments_agg, "order_id")
+    ]
+
+def join_dimensions(items, joins, check=True):
+    columns = {col: items[col] for col in items.columns}
+    for dim, key in joins:
+        positions = dimension_positions(dim, key, columns[key], check)
+        for col in dim.columns:
+            if col != key:
+                columns[col] = take_column(dim[col], positions)
+
+    return pd.DataFrame(columns, copy=False)
+
+def merge_datasets(orders, items, customers, payments, products, sellers):
+    joins = dimension_joins(orders, customers, aggregate_payments(payments), products, sellers)
+    return join_dimensions(items, joins)
 
 
 # MERGE BLOB ORDERS
@@ -135,18 +171,7 @@ def merge_blob_orders(df_silver, df_blob):
     if df_blob is None:
         return df_silver
 
-    df_blob["order_id"] = df_blob["order_id"].astype("string")
-    
-    # Convert timestamp columns from string to datetime
-    date_cols = [
-        "order_purchase_timestamp",
-        "order_delivered_customer_date",
-        "order_delivered_carrier_date",
-        "order_estimated_delivery_date"
-    ]
-    for col in date_cols:
-        if col in df_blob.columns:
-            df_blob[col] = pd.to_datetime(df_blob[col], utc=True).dt.tz_localize(None)
+    df_blob = normalize_bronze_orders(df_blob)
 
     common_cols = [col for col in df_blob.columns if col in df_silver.columns]
     df_combined = pd.concat([df_silver, df_blob[common_cols]], ignore_index=True)
@@ -157,61 +182,99 @@ def merge_blob_orders(df_silver, df_blob):
 
 # TRANSFORM
 # Enriches the DataFrame with new computed columns.
+# Works on the int64 nanosecond values under the datetime columns with NumPy:
+# each timestamp column is converted once, the delivered mask is built once, every
+# duration is one subtraction and one floor division (same rounding as .dt.days),
+# and np.where puts NaN where a duration does not apply.
+
+NS_PER_HOUR = 3_600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+NAT = np.iinfo(np.int64).min   # NaT as int64
+
+def timestamp_ns(series):
+    return series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+# Time parts as small ints; as float with NaN if some rows have no purchase timestamp
+def with_missing(values, valid, dtype):
+    if valid.all():
+        return values.astype(dtype)
+    return np.where(valid, values, np.nan)
+
+def days_between(end, start, mask):
+    return np.where(mask, (end - start) // NS_PER_DAY, np.nan)
 
 def transform(df):
-    df["order_year"]    = df["order_purchase_timestamp"].dt.year
-    df["order_month"]   = df["order_purchase_timestamp"].dt.month
-    df["order_weekday"] = df["order_purchase_timestamp"].dt.weekday
-    df["order_hour"]    = df["order_purchase_timestamp"].dt.hour
+    purchase = timestamp_ns(df["order_purchase_timestamp"])
+    carrier = timestamp_ns(df["order_delivered_carrier_date"])
+    delivered = timestamp_ns(df["order_delivered_customer_date"])
+    estimated = timestamp_ns(df["order_estimated_delivery_date"])
+    has_purchase = purchase != NAT
+
+    # Calendar parts straight from the datetime64 values (1970-01-01 was a Thursday)
+    purchase_dt = purchase.view("datetime64[ns]")
+    days = purchase // NS_PER_DAY
+    df["order_year"]    = with_missing(purchase_dt.astype("datetime64[Y]").astype(np.int64) + 1970, has_purchase, np.int16)
+    df["order_month"]   = with_missing(purchase_dt.astype("datetime64[M]").astype(np.int64) % 12 + 1, has_purchase, np.int8)
+    df["order_weekday"] = with_missing((days + 3) % 7, has_purchase, np.int8)
+    df["order_hour"]    = with_missing(purchase // NS_PER_HOUR % 24, has_purchase, np.int8)
 
     delivered_mask = (
-        df["order_status"].eq("delivered") &
-        df["order_delivered_customer_date"].notna() &
-        df["order_delivered_carrier_date"].notna() &
-        df["order_purchase_timestamp"].notna()
+        df["order_status"].eq("delivered").to_numpy(dtype=bool, na_value=False) &
+        (delivered != NAT) &
+        (carrier != NAT) &
+        has_purchase
     )
 
-    df.loc[delivered_mask, "processing_days"] = (
-        df.loc[delivered_mask, "order_delivered_carrier_date"] -
-        df.loc[delivered_mask, "order_purchase_timestamp"]
-    ).dt.days
+    df["processing_days"]  = days_between(carrier, purchase, delivered_mask)
+    df["shipping_days"]    = days_between(delivered, carrier, delivered_mask)
+    df["fulfillment_days"] = days_between(delivered, purchase, delivered_mask)
+    sla_diff_days          = days_between(delivered, estimated, delivered_mask & (estimated != NAT))
+    df["sla_diff_days"]    = sla_diff_days
+
+    df["on_time"] = sla_diff_days <= 0   # NaN compares as False
+    return df
 
-    df.loc[delivered_mask, "shipping_days"] = (
-        df.loc[delivered_mask, "order_delivered_customer_date"] -
-        df.loc[delivered_mask, "order_delivered_carrier_date"]
-    ).dt.days
+# The transform of the selected backend (PIPELINE_BACKEND, see src/silver/silver_polars.py)
+def transform_backend(df):
+    return transform_polars(df) if BACKEND == "polars" else transform(df)
 
-    df.loc[delivered_mask, "fulfillment_days"] = (
-        df.loc[delivered_mask, "order_delivered_customer_date"] -
-        df.loc[delivered_mask, "order_purchase_timestamp"]
-    ).dt.days
 
-    df.loc[delivered_mask, "sla_diff_days"] = (
-        df.loc[delivered_mask, "order_delivered_customer_date"] -
-        df.loc[delivered_mask, "order_estimated_delivery_date"]
-    ).dt.days
+# ORDER KEY
+# Dense integer id per order (0, 1, 2, ...), factorized once here so gold can count
+# distinct orders on integers instead of hashing order_id strings.
+# Rows without an order_id get -1. Incremental runs continue the numbering
+# (see upsert_silver in silver_store.py).
 
-    df["on_time"] = df["sla_diff_days"] <= 0
+def add_order_key(df):
+    codes, _ = pd.factorize(df["order_id"])
+    df["order_key"] = codes.astype(np.int32)
     return df
 
 
+# SCHEMA
+# Before saving, every column is cast to its compact silver dtype and checked
+# (see src/silver/schema_enforcement.py), and the bytes per row before and after are printed.
+
 # SAVE
-# Saves the final DataFrame as a Parquet file.
+# Saves the final DataFrame as a parquet dataset partitioned by year and month
+# (see src/silver/silver_store.py). Returns the rows that were stored.
 
 def save_silver(df):
-    silver_dir = OUT / "silver"
-    silver_dir.mkdir(exist_ok=True)
-
-    output_path = silver_dir / "silver_orders.parquet"
-    df.to_parquet(output_path, index=False)
+    df = write_silver(df)
 
-    print(f"Saved silver layer: {output_path}")
+    print(f"Saved silver layer: {SILVER_DIR}")
     print(f"Shape: {df.shape[0]:,} rows x {df.shape[1]} columns")
+    return df
 
 
-# MAIN
+# FULL BUILD
+# Rebuilds silver from scratch: all CSV files plus every order ingested from bronze.
+# The reference fingerprint is taken before the CSVs are read and stored with the
+# dataset (see BUILD INFO in silver_store.py), so a CSV that changes during the build
+# still counts as changed.
 
-if __name__ == "__main__":
+def build_silver():
+    reference = reference_fingerprint()
     print("Loading datasets...")
     orders    = load_orders()
     items     = load_items()
@@ -220,15 +283,236 @@ if __name__ == "__main__":
     products  = load_products()
     sellers   = load_sellers()
 
-    print("Merging datasets...")
-    df = merge_datasets(orders, items, customers, payments, products, sellers)
+    print(f"Merging datasets ({BACKEND})...")
+    merge = merge_datasets_polars if BACKEND == "polars" else merge_datasets
+    df = merge(orders, items, customers, payments, products, sellers)
 
     print("Loading new orders from Blob Storage...")
     df_blob = load_bronze_from_blob()
     df = merge_blob_orders(df, df_blob)
 
     print("Transforming...")
-    df = transform(df)
+    df = transform_backend(df)
+    df = add_order_key(df)
+    df = enforce_schema(drop_unpartitioned(df))
 
     print("Saving...")
-    save_silver(df)
\ No newline at end of file
+    df = save_silver(df)
+    next_key = int(df["order_key"].max()) + 1 if len(df) else 0
+    record_full_build(reference, deduped=df_blob is not None, next_key=next_key)
+    return df
+
+
+# CHUNKED BUILD
+# Same silver as build_silver, for histories larger than RAM: the order items are read
+# from the CSV in chunks, and each chunk is joined against the dimension tables (held in
+# memory), transformed and written into its month folders before the next one is read.
+# Bronze orders follow as the last chunks (they are loaded first and held in memory,
+# like the dimension tables). At the end every month folder is compacted
+# into one file (see compact_partitions in silver_store.py), one month at a time.
+#
+# Peak memory stays around `memory_budget_mb` on top of the libraries: the first chunk
+# of PROBE_ROWS items measures the bytes per merged row, and the next chunks get as many
+# items as fit in the budget left after the dimension tables, with WORKING_COPIES
+# copies of each row alive at once (merged frame, compact frame, Arrow table).
+# The dimension keys are checked for uniqueness once, not per chunk; each lookup builds
+# a hash table of the dimension keys, about HASH_TABLE_FACTOR times their size.
+# The items CSV is parsed directly (the reference cache would load it whole).
+# Returns the number of rows stored.
+
+MEMORY_BUDGET_MB = int(os.environ.get("SILVER_MEMORY_BUDGET_MB", 1024))
+PROBE_ROWS = 10_000
+MIN_CHUNK_ROWS = 1_000
+WORKING_COPIES = 3
+HASH_TABLE_FACTOR = 4
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+def chunk_rows_for(budget_bytes, fixed_bytes, row_bytes):
+    return max(MIN_CHUNK_ROWS, int((budget_bytes - fixed_bytes) // (row_bytes * WORKING_COPIES)))
+
+# Numbers the orders across chunks like add_order_key (each order_id gets the next key
+# the first time it shows up) and, when `dedup` is set, keeps only the first row of each
+# order like drop_duplicates(subset=["order_id"]) on the whole table (done before the join,
+# so dropped items are never merged). build_silver drops duplicates only when bronze has
+# orders (merge_blob_orders), so the chunked build does the same.
+# The keys of the orders table sit in an int32 array (one slot per order); order ids
+# that are not in it (bronze orders) go to a dict.
+# Every chunk is stored with the schema of the first one.
+
+class SilverChunkWriter:
+    def __init__(self, orders, dedup):
+        self.orders = orders
+        self.dedup = dedup
+        self.keys = np.full(len(orders), -1, dtype=np.int32)
+        self.other_keys = {}
+        self.seen_null = False
+        self.next_key = 0
+        self.schema = None
+        self.chunks = 0
+        self.rows = 0
+
+    # Key of each order id so far (-1 = not seen yet), and its position in the orders table
+    def stored_keys(self, order_ids):
+        positions = dimension_positions(self.orders, "order_id", order_ids, check=False)
+        known = positions >= 0
+        keys = np.full(len(order_ids), -1, dtype=np.int32)
+        keys[known] = self.keys[positions[known]]
+        other = np.flatnonzero(~known & order_ids.notna().to_numpy())
+        keys[other] = [self.other_keys.get(order_id, -1) for order_id in order_ids.iloc[other]]
+        return keys, positions
+
+    def first_rows(self, df):
+        if not self.dedup:
+            return df
+        order_ids = df["order_id"]
+        keep = ~order_ids.duplicated().to_numpy() & (self.stored_keys(order_ids)[0] < 0)
+
+        missing = order_ids.isna().to_numpy()
+        if self.seen_null:
+            keep[missing] = False
+        self.seen_null = self.seen_null or bool((keep & missing).any())
+        return df[keep].reset_index(drop=True)
+
+    def add_order_key(self, df):
+        codes, uniques = pd.factorize(df["order_id"])
+        uniques = pd.Series(uniques, dtype=df["order_id"].dtype)
+        keys, positions = self.stored_keys(uniques)
+
+        new = keys < 0
+        keys[new] = np.arange(self.next_key, self.next_key + int(new.sum()), dtype=np.int32)
+        self.next_key += int(new.sum())
+        known = positions >= 0
+        self.keys[positions[known & new]] = keys[known & new]
+        self.other_keys.update(zip(uniques[~known & new], keys[~known & new].tolist()))
+
+        df["order_key"] = np.where(codes >= 0, keys[codes], -1).astype(np.int32)
+        return df
+
+    # `df` holds only first rows; the frame is transformed in place and dropped after the cast
+    def write(self, df):
+        df = enforce_schema(drop_unpartitioned(self.add_order_key(transform_backend(df))), report=False)
+        rows = len(df)
+        if rows:
+            table = to_silver_table(df, self.schema)
+            del df
+            self.schema = table.schema
+            write_chunk(table, self.chunks)
+        print(f"Chunk {self.chunks}: {rows:,} rows written")
+        self.chunks += 1
+        self.rows += rows
+
+def build_silver_chunked(memory_budget_mb=MEMORY_BUDGET_MB):
+    reference = reference_fingerprint()
+    print("Loading dimension tables...")
+    orders    = load_orders()
+    customers = load_customers()
+    products  = load_products()
+    sellers   = load_sellers()
+    payments  = load_payments()
+    joins = dimension_joins(orders, customers, aggregate_payments(payments), products, sellers)
+    for dim, key in joins:
+        check_unique(dim, key)
+
+    # Bronze decides whether orders are deduplicated, so it is loaded before the items
+    print("Loading new orders from Blob Storage...")
+    df_blob = load_bronze_from_blob()
+    if df_blob is not None:
+        df_blob = normalize_bronze_orders(df_blob)
+    writer = SilverChunkWriter(orders, dedup=df_blob is not None)
+
+    # The raw payments stay in the reference cache, so they count too
+    budget_bytes = memory_budget_mb * 2**20
+    hash_bytes = HASH_TABLE_FACTOR * max(dim[key].array.nbytes for dim, key in joins)
+    fixed_bytes = (
+        sum(frame_bytes(dim) for dim, _ in joins) + frame_bytes(payments) + writer.keys.nbytes + hash_bytes
+        + (frame_bytes(df_blob) if df_blob is not None else 0)
+    )
+    if fixed_bytes >= budget_bytes:
+        raise ValueError(
+            f"Memory budget of {memory_budget_mb:,} MB is too small: "
+            f"the dimension tables alone take {fixed_bytes / 2**20:,.0f} MB"
+        )
+    remove_silver()
+
+    print(f"Merging and writing order items in chunks ({memory_budget_mb:,} MB budget)...")
+    items_csv = pd.read_csv(
+        DATA / "olist_order_items_dataset.csv", dtype=ITEMS_DTYPES, parse_dates=ITEMS_PARSE_DATES, iterator=True
+    )
+    chunk_rows = PROBE_ROWS
+    silver_columns = None
+    while True:
+        try:
+            items = items_csv.get_chunk(chunk_rows)
+        except StopIteration:
+            break
+        merged = join_dimensions(writer.first_rows(items), joins, check=False)
+        del items
+        silver_columns = list(merged.columns)
+        if chunk_rows == PROBE_ROWS and len(merged):
+            row_bytes = frame_bytes(merged) / len(merged)
+            chunk_rows = chunk_rows_for(budget_bytes, fixed_bytes, row_bytes)
+            print(f"{row_bytes:,.0f} bytes per merged row -> {chunk_rows:,} items per chunk")
+        writer.write(merged)
+        del merged
+    items_csv.close()
+
+    if df_blob is not None:
+        columns = [col for col in df_blob.columns if silver_columns is None or col in silver_columns]
+        for start in range(0, len(df_blob), chunk_rows):
+            writer.write(writer.first_rows(df_blob.iloc[start:start + chunk_rows][columns]))
+
+    print("Compacting months...")
+    months = compact_partitions()
+    record_full_build(reference, deduped=writer.dedup, next_key=writer.next_key)
+    print(f"Saved silver layer: {SILVER_DIR}")
+    print(f"Shape: {writer.rows:,} rows in {months} months")
+    return writer.rows
+
+
+# INCREMENTAL BUILD
+# Transforms only the orders that arrived in bronze since the last run and
+# upserts them into the year/month partitions they belong to.
+# The CSVs are not read at all, so the run time follows the number of new orders.
+# Falls back to a full build when there is no silver dataset yet. Silver built while
+# bronze was empty is deduplicated first, like a full build would (see DEDUPLICATE in
+# silver_store.py).
+# Returns the rows that were inserted (None if nothing changed).
+
+def build_silver_incremental():
+    if not silver_exists():
+        print("No silver dataset yet - running a full build")
+        return build_silver()
+
+    print("Loading new orders from Blob Storage...")
+    df_new = ingest_new_orders()
+    if df_new is None:
+        print("Silver is up to date")
+        return None
+
+    print("Transforming...")
+    df_new = transform_backend(normalize_bronze_orders(df_new))
+    df_new = enforce_schema(drop_unpartitioned(df_new))
+
+    print("Upserting...")
+    df_inserted = upsert_silver(df_new)
+    print(f"Upserted {len(df_inserted):,} new orders into {SILVER_DIR}")
+    return df_inserted
+
+
+# MAIN
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the silver layer")
+    parser.add_argument("--incremental", action="store_true", help="only add the orders that are new in bronze")
+    parser.add_argument("--chunked", action="store_true", help="full build in chunks, for data larger than RAM")
+    parser.add_argument("--memory-budget-mb", type=int, default=MEMORY_BUDGET_MB, help="memory budget of --chunked")
+    args = parser.parse_args()
+
+    if args.incremental:
+        build_silver_incremental()
+    elif args.chunked:
+        build_silver_chunked(args.memory_budget_mb)
+    else:
+        build_silver()
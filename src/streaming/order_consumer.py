@@ -0,0 +1,329 @@
+import sys
+from pathlib import Path
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from src.bronze.bronze_reader import normalize_bronze_orders, parse_orders
+from src.silver.schema_enforcement import enforce_schema
+from src.silver.silver_store import (
+    compact_partitions, dedupe_silver, drop_unpartitioned, next_order_key, open_silver_dataset,
+    read_silver, silver_deduped, silver_exists, silver_schema, to_silver_table, write_stream_batch
+)
+from src.silver.silver_transformer import build_silver_incremental, transform_backend
+from src.gold.gold_aggregator import GOLD_TABLES, delivered_orders, save_gold, silver_columns
+from src.gold.gold_incremental import IncrementalGoldTable
+from src.gold.hll import hash_values
+
+try:
+    from azure.eventhub import EventHubConsumerClient
+except ImportError:
+    EventHubConsumerClient = None
+
+load_dotenv(Path(__file__).resolve().parents[2] / "producer" / ".env")
+
+# STREAMING CONSUMER
+# A long-running alternative to the 5-minute batch loop of run_pipeline.py: order events
+# are read as they arrive (from Event Hub, or a local folder/queue stand-in) and every
+# STREAM_BATCH_SECONDS the events received so far go through silver and gold as one
+# micro-batch:
+# - silver: normalize + transform + schema like an incremental build, skip orders
+#   already in silver, and append the rows as small files to their month folders
+#   (no month is rewritten; the folders are compacted every STREAM_COMPACT_FILES files)
+# - gold: the incremental gold tables (gold_incremental.py) fold in the new rows, and
+#   only the tables that changed are written to out/gold/
+# So a new order reaches gold a few seconds after it was sent, instead of after the
+# next pipeline cycle.
+#
+# On start the consumer catches up with bronze (build_silver_incremental), so events
+# sent while it was down are not lost, and loads (or rebuilds) the gold state. The source
+# is started first: events that arrive during the catch-up are buffered, and those that
+# bronze also had are skipped as duplicates.
+# Run either this consumer or run_pipeline.py against the same out/ folder, not both.
+
+BATCH_SECONDS = float(os.environ.get("STREAM_BATCH_SECONDS", 2))
+MAX_BATCH_EVENTS = int(os.environ.get("STREAM_MAX_BATCH_EVENTS", 50_000))
+COMPACT_FILES = int(os.environ.get("STREAM_COMPACT_FILES", 50))
+STATE_SAVE_SECONDS = float(os.environ.get("STREAM_STATE_SAVE_SECONDS", 60))
+
+
+# SOURCES
+# A source is started once and then polled; poll() returns the order dicts received
+# since the last call (at most `max_events`), without blocking.
+
+def drain(events, max_events):
+    batch = []
+    while len(batch) < max_events:
+        try:
+            batch.append(events.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+# In-process stand-in: whatever is put() into it is consumed (tests, benchmarks)
+class QueueSource:
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def put(self, order):
+        self.events.put(order)
+
+    def start(self):
+        pass
+
+    def poll(self, max_events):
+        return drain(self.events, max_events)
+
+    def stop(self):
+        pass
+
+
+# Local stand-in for Event Hub: tails the .json / .ndjson files in a folder (same
+# format as the bronze blobs). Only content written after start() is read; the content
+# already there is bronze history, which the catch-up reads.
+class DirectorySource:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offsets = {}
+
+    def files(self):
+        return sorted(p for p in self.path.rglob("*") if p.suffix in (".json", ".ndjson") and p.is_file())
+
+    def start(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.offsets = {path: path.stat().st_size for path in self.files()}
+
+    def poll(self, max_events):
+        batch = []
+        for path in self.files():
+            offset = self.offsets.get(path, 0)
+            if path.stat().st_size <= offset or len(batch) >= max_events:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offset)
+                orders, consumed = parse_orders(path.name, f.read())
+            self.offsets[path] = offset + consumed
+            batch.extend(orders)
+        return batch
+
+    def stop(self):
+        pass
+
+
+# Event Hub: a background thread receives event batches from every partition and queues
+# them. Starts at the time the source was started (the catch-up covers what came before).
+# Use a consumer group of its own (EVENT_HUB_CONSUMER_GROUP), so the consumer does not
+# compete with the Azure Function that writes bronze.
+class EventHubSource:
+    def __init__(self, connection_string, eventhub_name, consumer_group="$Default"):
+        if EventHubConsumerClient is None:
+            raise RuntimeError("The Event Hub source needs the azure-eventhub package")
+        self.client = EventHubConsumerClient.from_connection_string(
+            conn_str=connection_string,
+            consumer_group=consumer_group,
+            eventhub_name=eventhub_name
+        )
+        self.events = queue.Queue()
+        self.thread = None
+
+    def on_event_batch(self, partition_context, events):
+        for event in events:
+            self.events.put(json.loads(event.body_as_str()))
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.client.receive_batch,
+            kwargs={
+                "on_event_batch": self.on_event_batch,
+                "starting_position": datetime.now(timezone.utc),
+                "max_wait_time": BATCH_SECONDS
+            },
+            daemon=True
+        )
+        self.thread.start()
+
+    def poll(self, max_events):
+        return drain(self.events, max_events)
+
+    def stop(self):
+        self.client.close()
+
+
+# CONSUMER
+
+class OrderConsumer:
+    def __init__(self, source, batch_seconds=BATCH_SECONDS, catch_up=True):
+        self.source = source
+        self.batch_seconds = batch_seconds
+        self.catch_up = catch_up
+        self.stop_event = threading.Event()
+        self.started = threading.Event()
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        self.batches = 0
+        self.gold_tables = {name: IncrementalGoldTable(name) for name in GOLD_TABLES}
+        self.last_state_save = time.monotonic()
+
+    # START
+    # Silver deduplicated like a full build with these orders in bronze would be (see
+    # DEDUPLICATE in silver_store.py), the silver ids seen so far (to skip duplicates
+    # without scanning silver per batch), the next order_key, and the gold state
+    # covering the silver on disk.
+    # The seen ids are kept as one sorted array of their 64-bit hashes (hll.hash_values):
+    # 8 bytes per order instead of a Python string in a set, checked with a binary search
+    # and merged with each batch's new ids. Two different ids share a hash with odds of
+    # about 1 in 2^64 per pair (a new order then counts as a duplicate and is skipped).
+
+    def start(self):
+        self.source.start()
+        if self.catch_up:
+            print("Catching up with bronze...")
+            build_silver_incremental()
+        if not silver_exists():
+            raise RuntimeError("No silver dataset: build it first (python src/silver/silver_transformer.py)")
+
+        self.schema = silver_schema()
+        if "order_key" not in self.schema.names:
+            raise RuntimeError("Silver has no order_key: rebuild it (python src/silver/silver_transformer.py)")
+        if not silver_deduped():
+            dedupe_silver()
+        order_ids = open_silver_dataset().to_table(columns=["order_id"]).column("order_id")
+        self.seen_hashes = np.sort(hash_values(order_ids.to_pandas()))
+        self.next_key = next_order_key()
+
+        print("Loading gold state...")
+        # The silver columns every gold table reads (order_key for the distinct orders)
+        columns = {"order_status"}
+        for name in GOLD_TABLES:
+            columns.update(silver_columns(name, self.schema.names))
+        df = read_silver(columns=sorted(columns))
+        sources = {"silver": df, "delivered": delivered_orders(df)}
+        save_gold({
+            name: table.update(sources[GOLD_TABLES[name][1]], None)
+            for name, table in self.gold_tables.items()
+        })
+        print(f"Streaming: {len(self.seen_hashes):,} orders in silver, micro-batches every {self.batch_seconds:g}s")
+        self.started.set()
+
+    def seen(self, hashes):
+        if not len(self.seen_hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        position = np.minimum(np.searchsorted(self.seen_hashes, hashes), len(self.seen_hashes) - 1)
+        return self.seen_hashes[position] == hashes
+
+    # MICRO-BATCH
+    # Returns the new silver rows.
+
+    def silver_rows(self, orders):
+        df = normalize_bronze_orders(pd.DataFrame(orders))
+        df = df.drop_duplicates(subset=["order_id"])
+        df = df[~self.seen(hash_values(df["order_id"]))]
+        if df.empty:
+            return df
+
+        df = enforce_schema(drop_unpartitioned(transform_backend(df.reset_index(drop=True))), report=False)
+        df["order_key"] = np.arange(self.next_key, self.next_key + len(df)).astype(np.int32)
+        self.next_key += len(df)
+        write_stream_batch(to_silver_table(df, self.schema), self.run_id, self.batches, self.next_key)
+        self.seen_hashes = np.sort(np.concatenate([self.seen_hashes, hash_values(df["order_id"])]), kind="stable")
+        return df
+
+    def update_gold(self, df_new):
+        start = time.perf_counter()
+        sources = {"silver": df_new, "delivered": delivered_orders(df_new)}
+        changed = {}
+        for name, table in self.gold_tables.items():
+            rows = sources[GOLD_TABLES[name][1]]
+            if len(rows):
+                table.fold(rows)
+                changed[name] = table.emit()
+        save_gold(changed, build_seconds=time.perf_counter() - start)
+
+    def run_batch(self, orders):
+        start = time.perf_counter()
+        df_new = self.silver_rows(orders)
+        if len(df_new):
+            self.update_gold(df_new)
+        self.batches += 1
+
+        # Age of the events when their batch reached gold (purchase time = send time for live orders)
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        ages = (now - df_new["order_purchase_timestamp"]).dt.total_seconds() if len(df_new) else pd.Series(dtype=float)
+        stats = {
+            "events": len(orders),
+            "new_orders": len(df_new),
+            "seconds": time.perf_counter() - start,
+            "p50_age": ages.median() if len(ages) else None,
+            "max_age": ages.max() if len(ages) else None
+        }
+        age = f" | event age p50 {stats['p50_age']:.1f}s max {stats['max_age']:.1f}s" if len(ages) else ""
+        print(f"Batch {self.batches}: {stats['events']:,} events -> {stats['new_orders']:,} new orders "
+              f"in {stats['seconds'] * 1000:.0f} ms{age}")
+        return stats
+
+    # HOUSEKEEPING
+    # The gold state is saved every STATE_SAVE_SECONDS (it is re-built from silver if the
+    # consumer dies in between), and months with many small batch files are compacted.
+
+    def housekeeping(self, force=False):
+        if force or time.monotonic() - self.last_state_save >= STATE_SAVE_SECONDS:
+            for table in self.gold_tables.values():
+                table.save()
+            self.last_state_save = time.monotonic()
+        compact_partitions("stream-*.parquet", min_files=1 if force else COMPACT_FILES)
+
+    # LOOP
+
+    def run(self):
+        self.start()
+        try:
+            while not self.stop_event.is_set():
+                tick = time.monotonic()
+                orders = self.source.poll(MAX_BATCH_EVENTS)
+                if orders:
+                    self.run_batch(orders)
+                self.housekeeping()
+                self.stop_event.wait(max(0.0, self.batch_seconds - (time.monotonic() - tick)))
+        finally:
+            self.source.stop()
+            self.housekeeping(force=True)
+            print("Consumer stopped")
+
+    def stop(self):
+        self.stop_event.set()
+
+
+# MAIN
+
+def make_source(name, path=None):
+    if name == "dir":
+        if path is None:
+            raise ValueError("--dir is needed for the dir source")
+        return DirectorySource(path)
+    return EventHubSource(
+        os.getenv("EVENT_HUB_CONNECTION_STRING"),
+        os.getenv("EVENT_HUB_NAME"),
+        os.getenv("EVENT_HUB_CONSUMER_GROUP", "$Default")
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream new orders into silver and gold in micro-batches")
+    parser.add_argument("--source", choices=["eventhub", "dir"], default="eventhub")
+    parser.add_argument("--dir", help="folder of .json/.ndjson order events to tail (--source dir)")
+    parser.add_argument("--batch-seconds", type=float, default=BATCH_SECONDS)
+    parser.add_argument("--no-catch-up", action="store_true", help="do not read bronze on start")
+    args = parser.parse_args()
+
+    consumer = OrderConsumer(make_source(args.source, args.dir), args.batch_seconds, catch_up=not args.no_catch_up)
+    try:
+        consumer.run()
+    except KeyboardInterrupt:
+        pass